@@ -0,0 +1,313 @@
+#!/usr/bin/env python3
+# export_quantized_model.py
+# Export best.pt to static ONNX, quantize to INT8 and benchmark latency/mAP on CPU.
+# Author: Daniel Würmli
+
+"""Export the trained YOLO model for the robot CPU and pick a size that runs in real time.
+
+For every --imgsz:
+- export best.pt to a static-shape ONNX file (models/best_<imgsz>.onnx)
+- quantize it to INT8 with onnxruntime post-training quantization, calibrated
+  on images from the capture dataset (models/best_<imgsz>_int8.onnx)
+- run both through the robot's own OnnxDetector: latency per frame
+  (letterbox + network + NMS) and mAP on a holdout folder
+
+The holdout folder uses the YOLO layout (images/ + labels/ with
+"cls cx cy w h" lines, normalized) or keeps the .txt next to each image.
+
+Run from the repo root:
+    python -m scripts.export_quantized_model --weights models/best.pt --imgsz 320 416 640 \\
+        --calib dataset --holdout dataset/holdout
+"""
+
+import argparse
+import json
+import shutil
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+from src.low_level.detector import OnnxDetector
+
+try:
+    from ultralytics import YOLO
+except Exception:
+    YOLO = None
+
+try:
+    from onnxruntime.quantization import (CalibrationDataReader, CalibrationMethod, QuantFormat,
+                                          QuantType, quantize_static)
+except Exception:
+    CalibrationDataReader = object
+    quantize_static = None
+
+IMAGE_EXT = {".jpg", ".jpeg", ".png", ".bmp"}
+IOU_THRESHOLDS = np.linspace(0.5, 0.95, 10)
+EVAL_CONF = 0.001       # keep low-confidence boxes for the precision/recall curve
+
+
+def parse_args():
+    ap = argparse.ArgumentParser(description="Export best.pt to FP32/INT8 ONNX and benchmark both on CPU")
+    ap.add_argument("--weights", type=str, default="models/best.pt", help="Trained ultralytics weights")
+    ap.add_argument("--imgsz", type=int, nargs="+", default=[320, 416, 640], help="Input sizes to export")
+    ap.add_argument("--out", type=str, default="models", help="Output directory for the ONNX files")
+    ap.add_argument("--calib", type=str, default="dataset", help="Calibration images (capture_data.py output)")
+    ap.add_argument("--calib-count", type=int, default=200, help="Max. calibration images")
+    ap.add_argument("--holdout", type=str, default=None, help="Holdout folder with YOLO labels for mAP")
+    ap.add_argument("--runs", type=int, default=50, help="Timed frames per model")
+    ap.add_argument("--threads", type=int, default=2, help="onnxruntime threads (robot default: 2)")
+    ap.add_argument("--backend", type=str, default="onnxruntime", help="Detector backend: onnxruntime or opencv")
+    ap.add_argument("--skip-export", action="store_true", help="Reuse existing FP32 ONNX files in --out")
+    ap.add_argument("--report", type=str, default=None, help="Write the results as JSON")
+    return ap.parse_args()
+
+
+def list_images(folder: Path) -> List[Path]:
+    if not folder.is_dir():
+        return []
+    return sorted(p for p in folder.rglob("*") if p.suffix.lower() in IMAGE_EXT)
+
+
+# ---------- Export ----------
+def export_onnx(weights: Path, imgsz: int, out_dir: Path) -> Path:
+    """Static-shape export (batch 1, imgsz x imgsz) plus a class-name sidecar for the detector."""
+    if YOLO is None:
+        raise SystemExit("[FATAL] ultralytics is not installed (needed for the export)")
+    model = YOLO(str(weights))
+    exported = Path(model.export(format="onnx", imgsz=imgsz, dynamic=False, simplify=True, batch=1))
+    target = out_dir / f"{weights.stem}_{imgsz}.onnx"
+    shutil.move(str(exported), target)
+    write_names(target, model.names)
+    print(f"[INFO] Exported {target}")
+    return target
+
+
+def write_names(model_path: Path, names: Dict[int, str]) -> None:
+    with open(model_path.with_suffix(".names.json"), "w") as f:
+        json.dump({int(k): str(v) for k, v in names.items()}, f, indent=2)
+
+
+# ---------- Quantization ----------
+class DatasetReader(CalibrationDataReader):
+    """Feeds calibration images letterboxed exactly like the robot does (OnnxDetector.prepare)."""
+
+    def __init__(self, detector: OnnxDetector, input_name: str, images: List[Path]):
+        self.detector = detector
+        self.input_name = input_name
+        self._it = iter(images)
+
+    def get_next(self) -> Optional[dict]:
+        for path in self._it:
+            img = cv2.imread(str(path))
+            if img is None:
+                continue
+            self.detector.prepare(img)
+            return {self.input_name: self.detector.blob.copy()}
+        return None
+
+
+def head_nodes(graph) -> List[str]:
+    """Nodes of the detection head (highest /model.N/ block): kept in float, INT8 boxes lose too much."""
+    names = [n.name for n in graph.node]
+    blocks = [int(n.split("/")[1].split(".")[1]) for n in names if n.startswith("/model.") and n.count("/") > 1]
+    if not blocks:
+        return []
+    prefix = f"/model.{max(blocks)}/"
+    return [n for n in names if n.startswith(prefix)]
+
+
+def quantize(fp32: Path, imgsz: int, images: List[Path], threads: int) -> Path:
+    if quantize_static is None:
+        raise SystemExit("[FATAL] onnxruntime (with quantization tools) is not installed")
+    if not images:
+        raise SystemExit("[FATAL] No calibration images found")
+    import onnx
+    graph = onnx.load(str(fp32)).graph
+    target = fp32.with_name(fp32.stem + "_int8.onnx")
+    detector = OnnxDetector(str(fp32), imgsz=imgsz, backend="onnxruntime", threads=threads)
+    reader = DatasetReader(detector, graph.input[0].name, images)
+    quantize_static(
+        str(fp32), str(target), reader,
+        quant_format=QuantFormat.QDQ,
+        per_channel=True,
+        weight_type=QuantType.QInt8,
+        activation_type=QuantType.QUInt8,
+        calibrate_method=CalibrationMethod.MinMax,
+        nodes_to_exclude=head_nodes(graph),
+    )
+    shutil.copy(fp32.with_suffix(".names.json"), target.with_suffix(".names.json"))
+    print(f"[INFO] Quantized {target} ({len(images)} calibration images)")
+    return target
+
+
+def calibration_images(folder: Path, count: int) -> List[Path]:
+    """Evenly spaced over the capture run, so every scene of the dataset is represented."""
+    images = list_images(folder)
+    if len(images) <= count:
+        return images
+    step = len(images) / float(count)
+    return [images[int(i * step)] for i in range(count)]
+
+
+# ---------- Evaluation ----------
+def load_labels(image: Path, w: int, h: int) -> np.ndarray:
+    """Ground truth as rows of cls, x1, y1, x2, y2 in pixels."""
+    candidates = [image.with_suffix(".txt")]
+    if image.parent.name == "images":
+        candidates.insert(0, image.parent.parent / "labels" / (image.stem + ".txt"))
+    for path in candidates:
+        if path.exists():
+            if path.stat().st_size == 0:
+                break       # background image: no objects
+            rows = np.loadtxt(path, ndmin=2)
+            c, cx, cy, bw, bh = rows[:, :5].T
+            return np.stack([c, (cx - bw / 2) * w, (cy - bh / 2) * h, (cx + bw / 2) * w, (cy + bh / 2) * h], 1)
+    return np.zeros((0, 5))
+
+
+def iou_matrix(a: np.ndarray, b: np.ndarray) -> np.ndarray:
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def average_precision(tp: np.ndarray, conf: np.ndarray, n_gt: int) -> float:
+    """COCO-style 101-point interpolated AP of one class at one IoU threshold."""
+    if n_gt == 0 or not tp.size:
+        return 0.0
+    order = np.argsort(-conf, kind="stable")
+    tps = np.cumsum(tp[order])
+    fps = np.cumsum(1 - tp[order])
+    recall = tps / n_gt
+    precision = np.maximum.accumulate((tps / (tps + fps))[::-1])[::-1]
+    points = np.linspace(0, 1, 101)
+    idx = np.searchsorted(recall, points, side="left")
+    return float(np.mean([precision[i] if i < len(precision) else 0.0 for i in idx]))
+
+
+def evaluate(detector: OnnxDetector, images: List[Path]) -> Tuple[float, float]:
+    """mAP@0.5 and mAP@0.5:0.95 over the holdout images."""
+    stats = []      # per image: (pred cls, pred conf, tp matrix [preds x thresholds]), gt cls
+    gt_classes = []
+    for path in images:
+        img = cv2.imread(str(path))
+        if img is None:
+            continue
+        h, w = img.shape[:2]
+        gt = load_labels(path, w, h)
+        dets = detector.detect(img)
+        pcls = np.array([d.cls for d in dets], dtype=int)
+        pconf = np.array([d.conf for d in dets], dtype=float)
+        tp = np.zeros((len(dets), len(IOU_THRESHOLDS)), dtype=bool)
+        if len(dets) and len(gt):
+            boxes = np.array([d.box for d in dets], dtype=float)
+            ious = iou_matrix(boxes, gt[:, 1:]) * (pcls[:, None] == gt[None, :, 0].astype(int))
+            for k, thr in enumerate(IOU_THRESHOLDS):
+                used = np.zeros(len(gt), dtype=bool)
+                for i in range(len(dets)):      # dets are sorted by confidence
+                    cand = np.where((ious[i] >= thr) & ~used)[0]
+                    if cand.size:
+                        used[cand[ious[i, cand].argmax()]] = True
+                        tp[i, k] = True
+        stats.append((pcls, pconf, tp))
+        gt_classes.append(gt[:, 0].astype(int))
+
+    if not stats:
+        return 0.0, 0.0
+    pcls = np.concatenate([s[0] for s in stats])
+    pconf = np.concatenate([s[1] for s in stats])
+    tp = np.concatenate([s[2] for s in stats])
+    gcls = np.concatenate(gt_classes)
+    aps = []
+    for c in np.unique(gcls):
+        sel = pcls == c
+        n_gt = int((gcls == c).sum())
+        aps.append([average_precision(tp[sel, k].astype(float), pconf[sel], n_gt)
+                    for k in range(len(IOU_THRESHOLDS))])
+    if not aps:
+        return 0.0, 0.0
+    aps = np.array(aps)
+    return float(aps[:, 0].mean()), float(aps.mean())
+
+
+# ---------- Benchmark ----------
+def latency(detector: OnnxDetector, frames: List[np.ndarray], runs: int) -> Tuple[float, float]:
+    """Median and p90 ms per detect() call, after a short warm-up."""
+    for frame in frames[:3]:
+        detector.detect(frame)
+    times = []
+    for i in range(runs):
+        t0 = time.perf_counter()
+        detector.detect(frames[i % len(frames)])
+        times.append(1000.0 * (time.perf_counter() - t0))
+    times.sort()
+    return statistics.median(times), times[min(len(times) - 1, int(0.9 * len(times)))]
+
+
+def benchmark(model: Path, imgsz: int, args, frames, holdout) -> dict:
+    det = OnnxDetector(str(model), imgsz=imgsz, backend=args.backend, threads=args.threads)
+    med, p90 = latency(det, frames, args.runs)
+    row = {"model": str(model), "imgsz": imgsz, "size_mb": round(model.stat().st_size / 1e6, 2),
+           "latency_ms": round(med, 1), "latency_p90_ms": round(p90, 1), "map50": None, "map50_95": None}
+    if holdout:
+        eval_det = OnnxDetector(str(model), imgsz=imgsz, conf=EVAL_CONF, backend=args.backend, threads=args.threads)
+        row["map50"], row["map50_95"] = (round(v, 4) for v in evaluate(eval_det, holdout))
+    return row
+
+
+def print_table(rows: List[dict]) -> None:
+    print(f"\n{'model':<28} {'imgsz':>5} {'MB':>6} {'ms':>7} {'p90':>7} {'mAP50':>7} {'mAP50-95':>9}")
+    for r in rows:
+        m50 = "-" if r["map50"] is None else f"{r['map50']:.3f}"
+        m95 = "-" if r["map50_95"] is None else f"{r['map50_95']:.3f}"
+        print(f"{Path(r['model']).name:<28} {r['imgsz']:>5} {r['size_mb']:>6.1f} {r['latency_ms']:>7.1f} "
+              f"{r['latency_p90_ms']:>7.1f} {m50:>7} {m95:>9}")
+
+
+def main():
+    args = parse_args()
+    weights = Path(args.weights)
+    out_dir = Path(args.out)
+    out_dir.mkdir(parents=True, exist_ok=True)
+
+    calib = calibration_images(Path(args.calib), args.calib_count)
+    holdout = list_images(Path(args.holdout)) if args.holdout else []
+    if args.holdout and not holdout:
+        print(f"[WARN] No holdout images in {args.holdout}; reporting latency only")
+    if holdout:
+        # never calibrate on the images that are scored
+        held = {p.resolve() for p in holdout}
+        calib = [p for p in calib if p.resolve() not in held]
+    bench_imgs = holdout or calib
+    frames = [f for f in (cv2.imread(str(p)) for p in bench_imgs[:20]) if f is not None]
+    if not frames:
+        raise SystemExit("[FATAL] No images to benchmark on (check --calib / --holdout)")
+
+    rows = []
+    for imgsz in args.imgsz:
+        fp32 = out_dir / f"{weights.stem}_{imgsz}.onnx"
+        if not (args.skip_export and fp32.exists()):
+            fp32 = export_onnx(weights, imgsz, out_dir)
+        int8 = quantize(fp32, imgsz, calib, args.threads)
+        for model in (fp32, int8):
+            print(f"[INFO] Benchmarking {model.name} ...")
+            rows.append(benchmark(model, imgsz, args, frames, holdout))
+
+    print_table(rows)
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(rows, f, indent=2)
+        print(f"[INFO] Report: {args.report}")
+
+
+if __name__ == "__main__":
+    main()
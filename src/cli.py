@@ -5,11 +5,18 @@
 
 """CLI entry point bridging arguments to the control system."""
 
-from .control.control_system import main as control_main
+import sys
+
+from .utils import arm_socket
 
 
 def main():
-    """Dispatch to the legacy control-system CLI."""
+    """Send arm-only commands to a running arm daemon, otherwise dispatch to the control-system CLI."""
+    code = arm_socket.forward_cli(sys.argv[1:])
+    if code is not None:
+        sys.exit(code)
+    # imported here so that commands served by the daemon skip loading the control stack
+    from .control.control_system import main as control_main
     control_main()
 
 
@@ -5,6 +5,7 @@
 
 
 import argparse, time, sys, json, os
+from functools import partial
 from importlib import import_module
 
 from ..high_level.motor_system import MotorSystem
@@ -13,13 +14,19 @@ from ..low_level.lidar_driver import MS200Driver
 from ..high_level.lidar_system import LiDARSystem
 from ..high_level.buzzer_system import BuzzerSystem
 from ..high_level.arm_system import ArmSystem
+from ..high_level.arm_service import ArmService
+from ..high_level.arm_daemon import ArmDaemon
 from ..high_level.camera_system import CameraSystem
 from ..high_level.lidar_stream_system import LidarStreamSystem
 from .modes.remote import run as run_remote_mode
 from .modes.follow_wall import run as run_follow_wall
 from .modes.follow_route import run as run_follow_route
 from .modes.defined_route_getobjecttop import run as run_defined_route_getobjecttop
+from .modes.calibrate_wheels import run as run_calibrate_wheels
+from .modes.route import run as run_route_file
 from ..utils.env import expand_env_placeholders, MissingEnvValueError
+from ..utils import timeline, arm_socket
+from ..simulation import SimWorld, VirtualClock, SimMotorController, SimLidarDriver, SimBuzzer
 
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 PROJECT_ROOT = os.path.abspath(os.path.join(BASE_DIR, "..", ".."))
@@ -87,6 +94,55 @@ def parse_maybe_bool(val):
     raise ValueError(f"Invalid boolean value: {val!r}")
 
 
+def build_motors(cfg: dict) -> MotorSystem:
+    """Create the drive base, applying the per-wheel speed table and velocity profile when configured."""
+    return MotorSystem(
+        speed_table_file=_resolve_config_path(cfg.get("wheel_calib_file")),
+        profile_cfg=cfg.get("base_profile"),
+    )
+
+
+def build_simulation(cfg: dict, map_path: str = None, realtime_factor: float = None):
+    """
+    Simulated drive base, LiDAR driver and buzzer sharing one virtual clock.
+    The velocity profile runs on a wall-clock thread, so it stays off here.
+    """
+    sim_cfg = cfg.get("sim") if isinstance(cfg.get("sim"), dict) else {}
+    path = map_path or sim_cfg.get("map")
+    world = SimWorld.from_cfg(sim_cfg, map_path=_resolve_config_path(path) if path else None)
+    if realtime_factor is None:
+        realtime_factor = float(sim_cfg.get("realtime_factor", 0.0))
+    clock = VirtualClock(world, step_s=float(sim_cfg.get("step_s", 0.005)), realtime_factor=realtime_factor)
+    motors = MotorSystem(
+        speed_table_file=_resolve_config_path(cfg.get("wheel_calib_file")) if sim_cfg.get("use_wheel_calib") else None,
+        controller=partial(SimMotorController, world),
+        clock=clock,
+    )
+    return world, clock, motors, SimLidarDriver(world), SimBuzzer(clock)
+
+
+def start_timeline(args, name: str, clock=time.monotonic):
+    """Activate the mission timeline when --timeline was given."""
+    if args.timeline is None:
+        return None
+    return timeline.activate(timeline.Timeline(name=name, clock=clock))
+
+
+def finish_timeline(args, name: str):
+    """Write the active timeline and print the slowest steps."""
+    tl = timeline.current()
+    if tl is None:
+        return
+    timeline.activate(None)
+    path = args.timeline or f"timeline_{name}_{time.strftime('%Y%m%d-%H%M%S')}.json"
+    try:
+        tl.write(_resolve_config_path(path))
+        print(f"[INFO] Timeline written to {path}")
+    except Exception as exc:
+        print(f"[WARN] Timeline could not be written ({path}): {exc}")
+    print(tl.summary())
+
+
 def _run_arm_mode(name: str, arm, **kwargs):
     try:
         module = import_module(f"{__package__}.modes.{name}")
@@ -95,10 +151,15 @@ def _run_arm_mode(name: str, arm, **kwargs):
     runner = getattr(module, "run", None)
     if runner is None:
         die(f"Arm module '{name}' does not define a run() function.")
+    arm.reset_wait_stats()
     try:
-        return runner(arm, **kwargs)
+        with timeline.span("arm", name):
+            return runner(arm, **kwargs)
     except ValueError as exc:
         die(str(exc))
+    finally:
+        if arm.wait_stats["waits"]:
+            print(arm.wait_summary())
 
 
 ARM_ACTIONS = [
@@ -130,6 +191,7 @@ ARM_ACTIONS = [
     {"module": "arm_getobjecttop_left_front", "check": lambda a: bool(getattr(a, "arm_getobjecttop_left_front", False)), "kwargs": lambda a: {}},
     {"module": "arm_getobjecttop_right_left", "check": lambda a: bool(getattr(a, "arm_getobjecttop_right_left", False)), "kwargs": lambda a: {}},
     {"module": "arm_getobjecttop_left_right", "check": lambda a: bool(getattr(a, "arm_getobjecttop_left_right", False)), "kwargs": lambda a: {}},
+    {"module": "arm_release_right", "check": lambda a: bool(getattr(a, "arm_release_right", False)), "kwargs": lambda a: {}},
     {"module": "grip_object", "check": lambda a: bool(getattr(a, "arm_grip_object", False)), "kwargs": lambda a: {}},
     {"module": "gripper_open", "check": lambda a: bool(a.arm_gripper_open), "kwargs": lambda a: {}},
     {"module": "gripper_close", "check": lambda a: bool(a.arm_gripper_close), "kwargs": lambda a: {}},
@@ -165,6 +227,8 @@ ARM_ACTIONS = [
     {"module": "shoulder_down", "check": lambda a: a.arm_shoulder_down is not None, "kwargs": lambda a: {"degrees": float(a.arm_shoulder_down)}},
     {"module": "move_deg", "check": lambda a: a.arm_move_deg is not None, "kwargs": lambda a: {"joint": a.arm_move_deg[0], "degrees": float(a.arm_move_deg[1])}},
     {"module": "move_pulse", "check": lambda a: a.arm_move_pulse is not None, "kwargs": lambda a: {"joint": a.arm_move_pulse[0], "pulse": int(a.arm_move_pulse[1])}},
+    {"module": "arm_recipe", "check": lambda a: bool(a.arm_recipe), "kwargs": lambda a: {"name": a.arm_recipe}},
+    {"module": "move_xyz", "check": lambda a: a.arm_move_xyz is not None, "kwargs": lambda a: {"values": a.arm_move_xyz}},
     {"module": "read_deg", "check": lambda a: bool(a.arm_read_deg), "kwargs": lambda a: {"joint": a.arm_read_deg}},
     {"module": "read_pulse", "check": lambda a: bool(a.arm_read_pulse), "kwargs": lambda a: {"joint": a.arm_read_pulse}},
     {"module": "unload_joint", "check": lambda a: bool(a.arm_unload_joint), "kwargs": lambda a: {"joint": a.arm_unload_joint}},
@@ -173,7 +237,7 @@ ARM_ACTIONS = [
     {"module": "load_all", "check": lambda a: bool(a.arm_load), "kwargs": lambda a: {}},
 ]
 
-def main():
+def build_arg_parser() -> argparse.ArgumentParser:
     ap = argparse.ArgumentParser(description="Robot Control System without calibration but with full arm flag support")
 
     # --- Robot-Modes ---
@@ -181,13 +245,21 @@ def main():
     ap.add_argument("--follow_wall", action="store_true")
     ap.add_argument("--follow_route", action="store_true")
     ap.add_argument("--defined_route_getobjecttop", action="store_true")
+    ap.add_argument("--calibrate_wheels", action="store_true")
+    ap.add_argument("--route", type=str, metavar="FILE", help="Run a declarative route file (JSON/YAML)")
     ap.add_argument("--camera_stream", action="store_true")
+    ap.add_argument("--sim", action="store_true", help="Run navigation modes against the headless simulator")
+    ap.add_argument("--sim_map", type=str, metavar="FILE", help="Simulation map JSON (defaults to sim.map)")
+    ap.add_argument("--sim_speed", type=float, metavar="X", help="Throttle to X times real time (0 = as fast as possible)")
     ap.add_argument("--mode", choices=["remote","follow_wall","beep"], default=None)
 
     # --- ARM FLAGS (without calibration) ---
     ap.add_argument("--arm_port", default="/dev/serial0")
     ap.add_argument("--arm_baud", type=int, default=115200)
     ap.add_argument("--arm_no_gpio", action="store_true")
+    ap.add_argument("--arm_daemon", action="store_true", help="Keep the arm bus open and serve arm flags over a Unix socket")
+    ap.add_argument("--arm_socket", default=arm_socket.DEFAULT_SOCKET, metavar="PATH", help="Arm daemon socket")
+    ap.add_argument("--arm_direct", action="store_true", help="Use the bus directly even when a daemon is running")
 
     # Home / Posen
     ap.add_argument("--arm_home", action="store_true")
@@ -218,6 +290,7 @@ def main():
     ap.add_argument("--arm_getobjecttop_left_front", action="store_true")
     ap.add_argument("--arm_getobjecttop_right_left", action="store_true")
     ap.add_argument("--arm_getobjecttop_left_right", action="store_true")
+    ap.add_argument("--arm_release_right", action="store_true")
     ap.add_argument("--arm_grip_object", action="store_true")
 
     # Gripper
@@ -270,6 +343,9 @@ def main():
     # Generische Moves & Readback
     ap.add_argument("--arm_move_deg", nargs=2, metavar=("JOINT","DEG"))
     ap.add_argument("--arm_move_pulse", nargs=2, metavar=("JOINT","PULSE"))
+    ap.add_argument("--arm_recipe", type=str, metavar="NAME", help="Run a recipe from src/utils/arm_recipes.json")
+    ap.add_argument("--arm_move_xyz", nargs="+", metavar="X_Y_Z_[PITCH]",
+                    help="Gripper tip to X Y Z mm (x forward, y left, z up), optional pitch below horizontal")
     ap.add_argument("--arm_read_deg", type=str, metavar="JOINT")
     ap.add_argument("--arm_read_pulse", type=str, metavar="JOINT")
 
@@ -285,10 +361,45 @@ def main():
         default=DEFAULT_CONFIG_PATH,
         help=f"Path to robot configuration JSON (defaults to ROBOT_CONFIG_PATH or {DEFAULT_CONFIG_PATH})",
     )
+    ap.add_argument("--timeline", nargs="?", const="", default=None, metavar="FILE",
+                    help="Record a mission timeline (JSON) and print the slowest steps")
     ap.add_argument("--left_target", type=float, default=None)
     ap.add_argument("--front_stop",  type=float, default=None)
+    return ap
 
-    args = ap.parse_args()
+
+def arm_batch(args) -> list:
+    """(module, kwargs) for every arm flag set in args, in ARM_ACTIONS order."""
+    batch = []
+    for action in ARM_ACTIONS:
+        if not action["check"](args):
+            continue
+        try:
+            batch.append((action["module"], action["kwargs"](args)))
+        except ValueError:
+            raise
+        except Exception as exc:
+            raise ValueError(f"Arm-flag execution failed ({action['module']}): {exc}") from exc
+    return batch
+
+
+def run_arm_daemon(args):
+    """Serve arm flags from other CLI calls until interrupted (--arm_daemon)."""
+    service = ArmService(port=args.arm_port, baud=args.arm_baud, use_gpio=not args.arm_no_gpio, telemetry=True)
+    daemon = ArmDaemon(service, path=args.arm_socket,
+                       resolve_argv=lambda argv: arm_batch(build_arg_parser().parse_args(argv)))
+    try:
+        daemon.serve_forever()
+    except (RuntimeError, OSError) as exc:  # ArmNotReady, socket in use
+        die(str(exc))
+
+
+def main():
+    args = build_arg_parser().parse_args()
+
+    if args.arm_daemon:
+        run_arm_daemon(args)
+        return
 
     # ---------- Turn-only helper ----------
     if args.turn_degree is not None:
@@ -303,7 +414,7 @@ def main():
             def right_back_mm(self, *_, **__): return None
             def right_front_mm(self, *_, **__): return None
 
-        motors = MotorSystem()
+        motors = build_motors(cfg)
         nav = NavigationSystem(motors, _NullLidar(), cfg=cfg)
         try:
             deg = float(args.turn_degree)
@@ -316,6 +427,7 @@ def main():
                 motors.stop()
             except Exception:
                 pass
+            motors.close()
         return
 
     # ---------- ARM EARLY-EXIT ----------
@@ -323,23 +435,23 @@ def main():
         return any(action["check"](a) for action in ARM_ACTIONS)
 
     if _any_arm_flag_set(args):
+        try:
+            batch = arm_batch(args)
+        except ValueError as exc:
+            die(str(exc))
+        start_timeline(args, "arm")
         arm = ArmSystem(port=args.arm_port, baud=args.arm_baud, use_gpio=not args.arm_no_gpio)
         try:
-            for action in ARM_ACTIONS:
-                if not action["check"](args):
-                    continue
-                try:
-                    kwargs = action["kwargs"](args)
-                except ValueError as exc:
-                    die(str(exc))
-                except Exception as exc:
-                    die(f"Arm-flag execution failed ({action['module']}): {exc}")
-                _run_arm_mode(action["module"], arm, **kwargs)
+            for module, kwargs in batch:
+                _run_arm_mode(module, arm, **kwargs)
         finally:
+            if any(d["reads"] for d in arm.estimator.drift.values()):
+                print(arm.estimator.drift_summary())
             try:
                 arm.cleanup()
             except Exception:
                 pass
+            finish_timeline(args, "arm")
 
         sys.exit(0)  # Arm commands finished
 
@@ -349,19 +461,30 @@ def main():
     elif args.follow_wall: mode = "follow_wall"
     elif args.follow_route: mode = "follow_route"
     elif args.defined_route_getobjecttop: mode = "defined_route_getobjecttop"
+    elif args.calibrate_wheels: mode = "calibrate_wheels"
+    elif args.route: mode = "route"
     elif args.camera_stream: mode = "camera_stream"
     else: mode = args.mode
 
     if mode is None:
-        print("Usage: --remote | --follow_wall | --follow_route | --camera_stream")
+        print("Usage: --remote | --follow_wall | --follow_route | --route FILE | --calibrate_wheels | --camera_stream")
         print("(Arm flags operate as early exits, e.g. --arm_home)")
         return
 
     cfg = load_config(args.config)
 
+    if args.sim:
+        if mode not in ("follow_wall", "follow_route", "defined_route_getobjecttop", "route"):
+            die("--sim supports --follow_wall, --follow_route, --defined_route_getobjecttop and --route.")
+        sim_cfg = cfg.get("sim") if isinstance(cfg.get("sim"), dict) else {}
+        # Route arm tasks are skipped while simulating
+        cfg["sim"] = {**sim_cfg, "enabled": True}
+
     # CLI to configuration overrides
     set_if_not_none(cfg, "left_target_mm", args.left_target)
     set_if_not_none(cfg, "front_stop_mm",  args.front_stop)
+    if args.route:
+        cfg["route_file"] = _resolve_config_path(args.route)
     camera_cfg = cfg.get("camera") if isinstance(cfg.get("camera"), dict) else None
 
     def _build_camera(default_enabled=True):
@@ -373,9 +496,17 @@ def main():
                 outw=int(camera_cfg.get("outw", 960)),
                 maxfps=int(camera_cfg.get("maxfps", 30)),
                 host=camera_cfg.get("host", "0.0.0.0"),
+                mjpeg=_bool_from(camera_cfg.get("mjpeg"), False),
+                detection=_detection_cfg(),
             )
         return CameraSystem()
 
+    def _detection_cfg():
+        det = cfg.get("detection")
+        if not isinstance(det, dict) or not _bool_from(det.get("enabled"), False):
+            return None
+        return {**det, "model": _resolve_config_path(det.get("model", "models/best.onnx"))}
+
     def _bool_from(val, default=False):
         if val is None:
             return default
@@ -387,7 +518,7 @@ def main():
         return default if parsed is None else bool(parsed)
 
     camera_sys = None
-    if mode in ("remote", "follow_wall", "follow_route"):
+    if mode in ("remote", "follow_wall", "follow_route", "route") and not args.sim:
         if camera_cfg and _bool_from(camera_cfg.get("enabled"), False):
             camera_sys = _build_camera()
             background = _bool_from(camera_cfg.get("background"), True)
@@ -404,15 +535,16 @@ def main():
 
     # Remote / Route
     if mode == "remote":
-        motors = MotorSystem()
+        motors = build_motors(cfg)
         buzzer = BuzzerSystem(backend="gpio", gpio_pin=6, gpio_active="high", pwm_hz=0)
         try:
             run_remote_mode(motors, buzzer, cfg)
         except KeyboardInterrupt:
             pass
         finally:
-            try: motors.stop()
+            try: motors.halt()
             except Exception: pass
+            motors.close()
             try: buzzer.off()
             except Exception: pass
             buzzer.close()
@@ -420,14 +552,25 @@ def main():
             camera_sys.stop()
         return
 
-    elif mode in ("follow_wall", "follow_route", "defined_route_getobjecttop"):
-        motors = MotorSystem()
-        drv   = MS200Driver()
+    elif mode in ("follow_wall", "follow_route", "defined_route_getobjecttop", "route", "calibrate_wheels"):
+        world = None
+        if args.sim:
+            world, clock, motors, drv, buzzer = build_simulation(cfg, args.sim_map, args.sim_speed)
+            print(f"[SIM] Start pose x={world.x:.0f} y={world.y:.0f} heading={world.pose()[2]:.1f}°")
+        else:
+            clock = time
+            # The sweep measures raw wheel response, so never apply an old table to it
+            motors = MotorSystem() if mode == "calibrate_wheels" else build_motors(cfg)
+            drv   = MS200Driver()
+            buzzer = BuzzerSystem(backend="gpio", gpio_pin=6, gpio_active="high", pwm_hz=0)
         lidar = LiDARSystem(drv)
-        buzzer = BuzzerSystem(backend="gpio", gpio_pin=6, gpio_active="high", pwm_hz=0)
-        drv.start(); time.sleep(0.4)
+        drv.start(); clock.sleep(0.4)
+        wall_start = time.monotonic()
 
-        nav = NavigationSystem(motors, lidar, cfg=cfg)
+        nav = NavigationSystem(motors, lidar, cfg=cfg, clock=clock)
+        # One arm for every arm_task of the run; opened on first use
+        arm_service = None if args.sim else ArmService(port=args.arm_port, baud=args.arm_baud,
+                                                      use_gpio=not args.arm_no_gpio, telemetry=True)
         lidar_stream_cfg = cfg.get("lidar_stream", {}) if isinstance(cfg.get("lidar_stream"), dict) else {}
         lidar_stream = None
         try:
@@ -441,18 +584,27 @@ def main():
                 lidar_stream.start(background=True)
         except Exception as exc:
             print(f"[WARN] LiDAR stream failed to start: {exc}")
+        start_timeline(args, mode, clock=clock.monotonic)
         try:
-            buzzer.on(); time.sleep(cfg.get("buzzer_start_s", 3.0)); buzzer.off()
+            with timeline.span("wait", "buzzer_start"):
+                buzzer.on(); clock.sleep(cfg.get("buzzer_start_s", 3.0)); buzzer.off()
 
             if mode == "follow_wall":
-                run_follow_wall(nav, cfg, buzzer, drv)
+                run_follow_wall(nav, cfg, buzzer, drv, arm=arm_service)
             elif mode == "follow_route":
-                run_follow_route(nav, cfg, buzzer, drv)
+                run_follow_route(nav, cfg, buzzer, drv, arm=arm_service)
+            elif mode == "route":
+                run_route_file(nav, cfg, buzzer, drv, arm=arm_service)
+            elif mode == "calibrate_wheels":
+                run_calibrate_wheels(nav, cfg, buzzer, drv)
             else:
-                run_defined_route_getobjecttop(nav, cfg, buzzer, drv)
+                run_defined_route_getobjecttop(nav, cfg, buzzer, drv, arm=arm_service)
 
         except KeyboardInterrupt:
             pass
+        except ValueError as exc:
+            # Malformed route files / missing configuration keys
+            print(f"[FATAL] {exc}")
         finally:
             if lidar_stream:
                 try:
@@ -461,15 +613,27 @@ def main():
                     pass
             try: nav.shutdown()
             except Exception: pass
-            try: motors.stop()
+            if arm_service is not None:
+                try: arm_service.close()
+                except Exception as exc: print(f"[WARN] Arm shutdown failed: {exc}")
+            try: motors.halt()
             except Exception: pass
+            motors.close()
             try: drv.stop()
             except Exception: pass
             try: buzzer.off()
             except Exception: pass
             buzzer.close()
+            finish_timeline(args, mode)
+            if world is not None:
+                x, y, heading = world.pose()
+                print(f"[SIM] {world.t:.1f}s simulated in {time.monotonic() - wall_start:.1f}s; "
+                      f"end pose x={x:.0f} y={y:.0f} heading={heading:.1f}°, collisions={world.collisions}")
         if camera_sys:
             camera_sys.stop()
+        if world is not None and world.collisions:
+            # A route that only finishes by scraping along walls is not a passing run
+            die(f"Simulated {mode} hit a wall ({world.collisions} blocked ticks)")
         return
 
     elif mode == "beep":
@@ -21,3 +21,4 @@ def call_method(arm, method: str, *args, **kwargs):
     if handler is None:
         raise AttributeError(f"ArmSystem has no method '{method}'")
     return handler(*args, **kwargs)
+
@@ -5,37 +5,8 @@
 
 """Pick up an object from the top in front orientation."""
 
-import time
-
-POSE_MS = 1700
-HOME_MS = 1900
-GRIP_MS = 700
-SETTLE_S = 0.4
-
-
-def _wait(duration_ms: int, extra: float = SETTLE_S) -> None:
-    time.sleep(duration_ms / 1000.0 + extra)
-
-
-def _home(arm):
-    arm.home(duration_ms=HOME_MS)
-    _wait(HOME_MS)
-
-
-def _move_top_pose(arm):
-    arm.move_top_pick_pose(duration_ms=POSE_MS)
-    _wait(POSE_MS)
+from ...high_level.arm_sequence import run_recipe
 
 
 def run(arm):
-    _home(arm)
-
-    arm.open_gripper(duration_ms=GRIP_MS)
-    _wait(GRIP_MS, extra=0.2)
-
-    _move_top_pose(arm)
-
-    arm.gripper_object(duration_ms=GRIP_MS)
-    _wait(GRIP_MS, extra=0.2)
-
-    _home(arm)
+    run_recipe(arm, "getobjecttop_front")
@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# arm_recipe.py
+# Run a named pick/place recipe from arm_recipes.json.
+# Author: Daniel Würmli
+
+"""Run a named pick/place recipe from arm_recipes.json."""
+
+from ...high_level.arm_sequence import run_recipe
+
+
+def run(arm, name: str):
+    run_recipe(arm, name.strip())
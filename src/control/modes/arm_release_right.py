@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# arm_release_right.py
+# Set down a carried object with base rotated 90 deg right.
+# Author: Daniel Würmli
+
+"""Set down a carried object with base rotated 90 deg right."""
+
+from ...high_level.arm_sequence import run_recipe
+
+
+def run(arm):
+    run_recipe(arm, "release_right")
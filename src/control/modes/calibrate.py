@@ -12,41 +12,18 @@ from ...high_level.arm_system import pulse_to_deg
 
 
 PROMPT = "\n[CAL] Position the arm manually. Press ENTER as soon as it is aligned. "
-READ_ATTEMPTS = 5
-READ_DELAY_S = 0.15
 
 
-def _read_joint_state(arm, joint: str):
-    # ensure joint is actively powered before reading
-    try:
-        arm.load_joint(joint)
-    except Exception:
-        pass
-    time.sleep(0.2)
-
-    raw = None
-    for _ in range(READ_ATTEMPTS):
-        raw = arm.read_joint_pulse(joint)
-        if raw is not None:
-            break
-        time.sleep(READ_DELAY_S)
-
-    deg = None
-    if raw is not None:
-        try:
-            deg = pulse_to_deg(joint, raw)
-        except Exception:
-            deg = None
-    else:
-        # letzte Chance: direkter Deg-Read (kann ebenfalls None liefern)
-        for _ in range(READ_ATTEMPTS):
-            deg = arm.read_joint_deg(joint)
-            if deg is not None:
-                break
-            time.sleep(READ_DELAY_S)
-
-    return deg, raw
-
+def _read_joint_states(arm):
+    """Read all joints in one bus pass; returns {joint: (deg, pulse)}."""
+    t0 = time.monotonic()
+    pulses = arm.read_joint_pulses(sorted(VALID_JOINTS))
+    elapsed_ms = (time.monotonic() - t0) * 1000.0
+    states = {}
+    for joint, raw in pulses.items():
+        states[joint] = (None if raw is None else pulse_to_deg(joint, raw), raw)
+    print(f"[CAL] Read {len(pulses)} joints in {elapsed_ms:.1f} ms")
+    return states
 
 def run(arm):
     print("[CAL] Entering calibration mode (all servos will be unloaded).")
@@ -64,8 +41,10 @@ def run(arm):
     time.sleep(0.6)
 
     print("[CAL] Current joint positions:")
-    for joint in sorted(VALID_JOINTS):
-        deg, pulse = _read_joint_state(arm, joint)
+    for joint, (deg, pulse) in _read_joint_states(arm).items():
         print(f"  - {joint:12s} deg={deg!r}  pulse={pulse!r}")
+    stats = arm.bus.rx_stats()
+    if any(stats.values()):
+        print(f"[WARN] Servo bus read errors: {stats}")
 
     print("[CAL] Done. Values are not stored—please note them down.")
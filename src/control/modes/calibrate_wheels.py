@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+# calibrate_wheels.py
+# Per-wheel speed calibration sweep using LiDAR odometry against a wall.
+# Author: Daniel Würmli
+
+"""
+Per-wheel speed calibration sweep.
+
+Place the robot facing a flat wall (about 0.6-1.0 m away). Every wheel is
+driven alone at each register value of the sweep, first positive then
+negative, so the robot ends up roughly where it started. The change of the
+front wall distance over time gives the forward component of the body speed;
+for a single mecanum wheel that is a quarter of the wheel's surface speed.
+The resulting per-wheel, per-direction table is written to `wheel_calib_file`.
+"""
+
+import time
+
+from ...low_level.motor_controller import FWD
+from ...low_level.wheel_calibration import WheelSpeedTable, WHEEL_COUNT
+
+DEFAULT_REGISTERS = [4, 6, 8, 10, 12, 16, 20, 25, 30, 40, 50, 60]
+DRIVE_S = 1.0
+SPINUP_S = 0.25
+SETTLE_S = 0.3
+SAMPLE_S = 0.04
+MIN_FRONT_MM = 300.0
+MIN_SAMPLES = 4
+# Body forward speed produced by one wheel alone (45° rollers): v_x = w / 4
+SINGLE_WHEEL_GAIN = 4.0
+
+
+def _slope(samples):
+    """Least-squares slope (mm/s) of (t, distance) samples."""
+    n = len(samples)
+    if n < 2:
+        return None
+    mt = sum(t for t, _ in samples) / n
+    md = sum(d for _, d in samples) / n
+    stt = sum((t - mt) ** 2 for t, _ in samples)
+    if stt <= 0.0:
+        return None
+    return sum((t - mt) * (d - md) for t, d in samples) / stt
+
+
+def _measure_body_speed(nav, registers, drive_s):
+    """Drive raw registers for drive_s and return the forward body speed in mm/s."""
+    motors = nav.motors
+    samples = []
+    t0 = time.time()
+    try:
+        while True:
+            now = time.time() - t0
+            if now >= drive_s:
+                break
+            motors.drive_wheels(registers)
+            if now >= SPINUP_S:
+                df = nav.lidar.front_distance_mm(span_deg=10.0)
+                if df is not None:
+                    samples.append((now, float(df)))
+            time.sleep(SAMPLE_S)
+    finally:
+        motors.drive_wheels([0] * WHEEL_COUNT)
+        nav.hard_zero()
+    if len(samples) < MIN_SAMPLES:
+        return None
+    slope = _slope(samples)
+    # Moving forward shrinks the front distance
+    return None if slope is None else -slope
+
+
+def run(nav, cfg: dict, buzzer, drv) -> None:
+    """Sweep register values per wheel and store the measured lookup table."""
+    path = cfg.get("wheel_calib_file")
+    if not path:
+        raise ValueError("Configuration key 'wheel_calib_file' is required for wheel calibration.")
+    registers = sorted({abs(int(r)) for r in cfg.get("wheel_calib_registers", DEFAULT_REGISTERS) if int(r) != 0})
+    drive_s = float(cfg.get("wheel_calib_drive_s", DRIVE_S))
+    min_front = float(cfg.get("wheel_calib_min_front_mm", MIN_FRONT_MM))
+
+    if not nav.wait_for_valid_scan(("front",), timeout_s=2.0):
+        print("[FATAL] No front wall visible; wheel calibration aborted.")
+        return
+
+    table = WheelSpeedTable()
+    print(f"[CAL] Wheel sweep over registers {registers} ({drive_s:.2f}s each)")
+    for wheel in range(WHEEL_COUNT):
+        rows = {"pos": [], "neg": []}
+        for reg in registers:
+            for direction, sign in (("pos", +1), ("neg", -1)):
+                df = nav.read_front_mm()
+                if df is not None and df < min_front:
+                    print(f"[WARN] Front wall too close ({df:.0f}mm); stopping sweep for M{wheel + 1}.")
+                    break
+                cmd = [0] * WHEEL_COUNT
+                cmd[wheel] = sign * reg
+                body = _measure_body_speed(nav, cmd, drive_s)
+                time.sleep(SETTLE_S)
+                if body is None:
+                    print(f"[WARN] M{wheel + 1} reg={sign * reg:+d}: not enough LiDAR samples")
+                    continue
+                # Expected direction of travel for this wheel and register sign
+                wheel_mm_s = SINGLE_WHEEL_GAIN * body * FWD[wheel] * sign
+                if wheel_mm_s < 0.0:
+                    wheel_mm_s = 0.0
+                rows[direction].append((reg, wheel_mm_s))
+                print(f"[CAL] M{wheel + 1} reg={sign * reg:+4d} -> {wheel_mm_s:6.1f} mm/s")
+            else:
+                continue
+            break
+        table.set_samples(wheel, "pos", rows["pos"])
+        table.set_samples(wheel, "neg", rows["neg"])
+
+    nav.hard_zero()
+    if not table.is_calibrated():
+        print("[WARN] Sweep incomplete; at least one wheel/direction never moved. Table not saved.")
+        return
+    table.save(path)
+    print(f"[CAL] Wheel speed table written to {path}")
+    try:
+        buzzer.beep(0.2)
+    except Exception:
+        pass
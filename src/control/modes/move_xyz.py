@@ -0,0 +1,17 @@
+#!/usr/bin/env python3
+# move_xyz.py
+# Move the gripper tip to a Cartesian point via inverse kinematics.
+# Author: Daniel Würmli
+
+"""Move the gripper tip to a Cartesian point via inverse kinematics."""
+
+from .arm_common import call_method
+
+
+def run(arm, values):
+    if len(values) not in (3, 4):
+        raise ValueError("--arm_move_xyz expects X Y Z [PITCH] in mm / degrees")
+    x, y, z = (float(v) for v in values[:3])
+    pitch = float(values[3]) if len(values) == 4 else None
+    used = call_method(arm, "move_to_xyz", x, y, z, pitch)
+    print(f"[ARM] Gripper -> x={x:.0f} y={y:.0f} z={z:.0f} mm, pitch {used:.0f} deg")
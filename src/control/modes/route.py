@@ -0,0 +1,39 @@
+#!/usr/bin/env python3
+# route.py
+# Run a declarative route file on the navigation stack.
+# Author: Daniel Würmli
+
+"""Run a declarative route file (see high_level/route_machine.py)."""
+
+from ...high_level.arm_service import ArmService
+from ...high_level.route_machine import RouteContext, load_route, route_path
+
+
+def run_route_file(nav, cfg: dict, buzzer, drv, path: str, arm: ArmService = None):
+    """
+    Compile the route at path against cfg and execute it. arm_task states run
+    on arm (shared with the caller); without one, a service is opened for the
+    duration of the route, so the bus is set up at most once either way.
+    """
+    machine = load_route(path, cfg)
+    sim = cfg.get("sim") if isinstance(cfg.get("sim"), dict) else {}
+    if sim.get("enabled"):
+        # No arm in simulation: arm_task states report "skipped"
+        return nav.run_route(machine, RouteContext(cfg=cfg, buzzer=buzzer, drv=drv))
+    if arm is not None:
+        return nav.run_route(machine, RouteContext(cfg=cfg, buzzer=buzzer, drv=drv, arm_runner=arm.run_module))
+    with ArmService() as own:
+        return nav.run_route(machine, RouteContext(cfg=cfg, buzzer=buzzer, drv=drv, arm_runner=own.run_module))
+
+
+def run_named(nav, cfg: dict, buzzer, drv, name: str, arm: ArmService = None):
+    """Execute one of the bundled routes in src/utils/routes."""
+    return run_route_file(nav, cfg, buzzer, drv, route_path(name), arm=arm)
+
+
+def run(nav, cfg: dict, buzzer, drv, arm: ArmService = None) -> None:
+    """Execute the route file named by cfg['route_file']."""
+    path = cfg.get("route_file")
+    if not path:
+        raise ValueError("Configuration key 'route_file' is required for route mode.")
+    run_route_file(nav, cfg, buzzer, drv, path, arm=arm)
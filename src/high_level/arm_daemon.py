@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# arm_daemon.py
+# Background process owning the servo bus and serving arm commands over a Unix socket.
+# Author: Daniel Würmli
+
+"""
+Arm daemon.
+
+Keeps one ArmService open (port, GPIO pins and loaded servos stay set up) and
+runs command batches sent by `python -m src --arm_*` or any other client of
+the protocol in src/utils/arm_socket.py. Requests are served one at a time in
+the order they connect, so a script of arm flags behaves exactly like running
+them back to back, minus the per-call startup.
+
+Output printed by the modes is captured per request and returned to the
+client, which prints it as if the mode had run locally.
+"""
+
+import io
+import json
+import os
+import signal
+import socket
+import sys
+import threading
+import time
+from contextlib import redirect_stderr, redirect_stdout
+from typing import Callable, List, Optional, Tuple
+
+from ..utils import arm_socket
+from .arm_service import ArmService
+
+Batch = List[Tuple[str, dict]]
+
+
+class ArmDaemon:
+    def __init__(self, service: ArmService, path: str = arm_socket.DEFAULT_SOCKET,
+                 resolve_argv: Optional[Callable[[List[str]], Batch]] = None):
+        self.service = service
+        self.path = path
+        self.resolve_argv = resolve_argv
+        self.requests = 0
+        self._sock: Optional[socket.socket] = None
+
+    # ---------- Lifecycle ----------
+    def bind(self) -> None:
+        if os.path.exists(self.path):
+            probe = arm_socket.connect(self.path)
+            if probe is not None:
+                probe.close()
+                raise RuntimeError(f"An arm daemon is already listening on {self.path}")
+            os.unlink(self.path)  # stale socket of a daemon that did not shut down cleanly
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.bind(self.path)
+        sock.listen(8)
+        self._sock = sock
+
+    def close(self) -> None:
+        if self._sock is not None:
+            self._sock.close()
+            self._sock = None
+            try:
+                os.unlink(self.path)
+            except OSError:
+                pass
+        self.service.close()
+
+    def serve_forever(self) -> None:
+        """Open the arm, bind the socket and serve until SIGINT/SIGTERM."""
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+        self.service.ensure_ready()
+        self.bind()
+        print(f"[INFO] Arm daemon listening on {self.path}")
+        try:
+            while True:
+                conn, _ = self._sock.accept()
+                with conn:
+                    self._serve(conn)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            self.close()
+            print(f"[INFO] Arm daemon stopped after {self.requests} request(s)")
+
+    # ---------- Requests ----------
+    def _serve(self, conn: socket.socket) -> None:
+        try:
+            req = arm_socket.recv_line(conn)
+        except (OSError, ValueError) as exc:
+            print(f"[WARN] Arm daemon: bad request ({exc})")
+            return
+        if req is None:
+            return
+        reply = self.handle(req)
+        try:
+            arm_socket.send_line(conn, reply)
+        except OSError as exc:
+            print(f"[WARN] Arm daemon: client went away ({exc})")
+
+    def handle(self, req: dict) -> dict:
+        if req.get("op") == "ping":
+            return {"ok": True, "requests": self.requests, "tasks_run": self.service.tasks_run}
+        if req.get("op") == "telemetry":
+            return {"ok": True, "telemetry": self.service.telemetry_snapshot()}
+        self.requests += 1
+        out = io.StringIO()
+        t0 = time.monotonic()
+        results = []
+        try:
+            with redirect_stdout(out), redirect_stderr(out):
+                for module, kwargs in self._batch(req):
+                    results.append(self.service.run_module(module, **kwargs))
+        except SystemExit as exc:
+            # argparse errors and die() end a CLI run; here they only end the request
+            return {"ok": False, "error": "command rejected", "code": exc.code if isinstance(exc.code, int) else 1,
+                    "output": out.getvalue()}
+        except ValueError as exc:
+            return {"ok": False, "error": str(exc), "output": out.getvalue()}
+        except Exception as exc:
+            return {"ok": False, "error": f"{type(exc).__name__}: {exc}", "output": out.getvalue()}
+        return {"ok": True, "output": out.getvalue(), "results": [_jsonable(r) for r in results],
+                "elapsed_s": round(time.monotonic() - t0, 3)}
+
+    def _batch(self, req: dict) -> Batch:
+        if "argv" in req:
+            if self.resolve_argv is None:
+                raise ValueError("this daemon does not accept command lines")
+            return self.resolve_argv([str(a) for a in req["argv"]])
+        if "batch" in req:
+            return [(str(item["module"]), dict(item.get("kwargs") or {})) for item in req["batch"]]
+        raise ValueError("request needs 'argv', 'batch' or 'op'")
+
+
+def _jsonable(value):
+    try:
+        json.dumps(value)
+        return value
+    except (TypeError, ValueError):
+        return repr(value)
+
+
+__all__ = ["ArmDaemon"]
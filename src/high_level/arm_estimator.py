@@ -0,0 +1,115 @@
+#!/usr/bin/env python3
+# arm_estimator.py
+# Predicted servo positions from the commanded moves, corrected by occasional reads.
+# Author: Daniel Würmli
+
+"""
+Position estimator.
+
+The bus servos interpolate linearly from where they are to the commanded
+pulse over the commanded time, so the position of a joint follows from its
+last move alone: start pulse, target, start time and duration. estimate()
+evaluates that model and needs no bus traffic.
+
+Every real read passes through correct(): the error against the prediction
+goes into the drift statistics (split into moving and settled joints) and
+the model is re-anchored at the measurement, so the remaining part of a move
+continues from the measured pulse and a joint that stopped short (gripper on
+an object) is predicted where it actually is.
+"""
+
+import threading
+import time
+from typing import Dict, Iterable, Optional
+
+
+class _Segment:
+    __slots__ = ("start", "target", "t0", "t1")
+
+    def __init__(self, start: Optional[float], target: float, t0: float, t1: float):
+        self.start = start          # None: position before the move is unknown
+        self.target = target
+        self.t0 = t0
+        self.t1 = t1
+
+    def at(self, now: float) -> Optional[float]:
+        if now >= self.t1:
+            return self.target
+        if self.start is None:
+            return None
+        if now <= self.t0:
+            return self.start
+        return self.start + (self.target - self.start) * (now - self.t0) / (self.t1 - self.t0)
+
+
+class PositionEstimator:
+    def __init__(self, clock=time.monotonic):
+        self.clock = clock
+        self._seg: Dict[str, _Segment] = {}
+        self._lock = threading.Lock()
+        self.reset_drift()
+
+    # ---------- Model ----------
+    def command(self, joint: str, target: int, duration_s: float, now: float = None) -> None:
+        """A move was sent: joint runs from its current estimate to target in duration_s."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            seg = self._seg.get(joint)
+            start = seg.at(now) if seg is not None else None
+            self._seg[joint] = _Segment(start, float(target), now, now + max(0.0, float(duration_s)))
+
+    def forget(self, joint: str) -> None:
+        """Drop the model of a joint (e.g. unloaded: it can be moved by hand)."""
+        with self._lock:
+            self._seg.pop(joint, None)
+
+    def estimate(self, joint: str, now: float = None) -> Optional[int]:
+        now = self.clock() if now is None else now
+        with self._lock:
+            seg = self._seg.get(joint)
+            val = seg.at(now) if seg is not None else None
+        return None if val is None else int(round(val))
+
+    def estimates(self, joints: Iterable[str], now: float = None) -> Dict[str, Optional[int]]:
+        now = self.clock() if now is None else now
+        return {j: self.estimate(j, now) for j in joints}
+
+    def moving(self, joint: str, now: float = None) -> bool:
+        now = self.clock() if now is None else now
+        with self._lock:
+            seg = self._seg.get(joint)
+            return seg is not None and now < seg.t1
+
+    # ---------- Correction ----------
+    def correct(self, joint: str, measured: int, now: float = None) -> Optional[int]:
+        """Feed a real read; returns the prediction error in pulses (None when nothing was predicted)."""
+        now = self.clock() if now is None else now
+        with self._lock:
+            seg = self._seg.get(joint)
+            predicted = seg.at(now) if seg is not None else None
+            err = None
+            if predicted is not None:
+                err = int(round(float(measured) - predicted))
+                d = self.drift["moving" if now < seg.t1 else "settled"]
+                d["reads"] += 1
+                d["abs_sum"] += abs(err)
+                d["max"] = max(d["max"], abs(err))
+            if seg is not None and now < seg.t1:
+                self._seg[joint] = _Segment(float(measured), seg.target, now, seg.t1)
+            else:
+                self._seg[joint] = _Segment(float(measured), float(measured), now, now)
+        return err
+
+    def reset_drift(self) -> None:
+        self.drift = {k: {"reads": 0, "abs_sum": 0, "max": 0} for k in ("moving", "settled")}
+
+    def drift_summary(self) -> str:
+        parts = []
+        for k in ("moving", "settled"):
+            d = self.drift[k]
+            if d["reads"]:
+                parts.append(f"{k} {d['abs_sum'] / d['reads']:.1f} mean / {d['max']} max over {d['reads']} reads")
+        return "[ARM] Estimate drift (pulses): " + ("; ".join(parts) if parts else "no reads")
+
+
+__all__ = ["PositionEstimator"]
@@ -0,0 +1,196 @@
+#!/usr/bin/env python3
+# arm_kinematics.py
+# Forward/inverse kinematics of the five-DOF ArmPi Pro arm with a reachability grid.
+# Author: Daniel Würmli
+
+"""
+Arm kinematics.
+
+Frame: origin on the base axis at the base plate, x forward, y left, z up (mm).
+Joint angles are degrees from the pulse-500 position, where the arm points
+straight up:
+
+    base        yaw to the left       = (500 - pulse) * 0.24
+    shoulder    tilt forward          = (500 - pulse) * 0.24
+    elbow       bend forward          = (pulse - 500) * 0.24
+    wrist_pitch bend forward          = (500 - pulse) * 0.24
+
+These signs match the tuned poses in ArmSystem (floor pick: shoulder 7 %,
+elbow 50 %, pitch 2 % points the gripper straight down). The gripper pitch
+of a pose is measured below the horizontal: 0 = pointing forward, 90 = down.
+
+ik() is closed form. IKGrid precomputes, for a grid of (reach, height),
+which pitches are reachable within the joint limits, so move_to_xyz can pick
+a pitch when none is given; the exact joint angles are then solved
+analytically at the requested point.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import Dict, Optional, Tuple
+
+DEG_PER_PULSE = 240.0 / 1000.0
+
+# Joint angle = sign * (pulse - 500) * DEG_PER_PULSE
+_SIGN = {'base': -1.0, 'shoulder': -1.0, 'elbow': 1.0, 'wrist_pitch': -1.0}
+
+
+@dataclass
+class ArmGeometry:
+    """Link lengths in mm (Hiwonder ArmPi Pro)."""
+    base_height: float = 61.0     # base plate -> shoulder axis
+    upper_arm: float = 101.6      # shoulder -> elbow
+    forearm: float = 96.4         # elbow -> wrist pitch axis
+    gripper: float = 166.5        # wrist pitch axis -> gripper tip (between the fingers)
+
+
+@dataclass
+class JointAngles:
+    base: float
+    shoulder: float
+    elbow: float
+    wrist_pitch: float
+
+    def as_dict(self) -> Dict[str, float]:
+        return {'base': self.base, 'shoulder': self.shoulder, 'elbow': self.elbow, 'wrist_pitch': self.wrist_pitch}
+
+
+def angle_to_pulse(joint: str, angle_deg: float) -> int:
+    return int(round(500.0 + _SIGN[joint] * angle_deg / DEG_PER_PULSE))
+
+
+def pulse_to_angle(joint: str, pulse: float) -> float:
+    return _SIGN[joint] * (float(pulse) - 500.0) * DEG_PER_PULSE
+
+
+def angles_to_pulses(angles: JointAngles) -> Dict[str, int]:
+    return {j: angle_to_pulse(j, a) for j, a in angles.as_dict().items()}
+
+
+def pulses_to_angles(pulses: Dict[str, float]) -> JointAngles:
+    return JointAngles(*(pulse_to_angle(j, pulses[j]) for j in ('base', 'shoulder', 'elbow', 'wrist_pitch')))
+
+
+def fk(angles: JointAngles, geo: ArmGeometry = ArmGeometry()) -> Tuple[float, float, float, float]:
+    """Gripper tip (x, y, z) in mm and pitch below horizontal in degrees."""
+    t1 = math.radians(angles.shoulder)
+    t12 = t1 + math.radians(angles.elbow)
+    t123 = t12 + math.radians(angles.wrist_pitch)
+    r = geo.upper_arm * math.sin(t1) + geo.forearm * math.sin(t12) + geo.gripper * math.sin(t123)
+    z = geo.base_height + geo.upper_arm * math.cos(t1) + geo.forearm * math.cos(t12) + geo.gripper * math.cos(t123)
+    yaw = math.radians(angles.base)
+    pitch = math.degrees(t123) - 90.0
+    return r * math.cos(yaw), r * math.sin(yaw), z, pitch
+
+
+def _planar_ik(r: float, z: float, pitch_deg: float, geo: ArmGeometry) -> Optional[Tuple[float, float, float]]:
+    """Shoulder, elbow, wrist angles for a tip at reach r, height z; None when out of reach."""
+    p = math.radians(pitch_deg)
+    rw = r - geo.gripper * math.cos(p)
+    zw = z + geo.gripper * math.sin(p) - geo.base_height
+    l2, l3 = geo.upper_arm, geo.forearm
+    c = (rw * rw + zw * zw - l2 * l2 - l3 * l3) / (2.0 * l2 * l3)
+    if c < -1.0 or c > 1.0:
+        return None
+    # elbow bends forward (positive), like every tuned pose
+    t2 = math.acos(c)
+    t1 = math.atan2(rw, zw) - math.atan2(l3 * math.sin(t2), l2 + l3 * math.cos(t2))
+    t3 = math.radians(90.0 + pitch_deg) - t1 - t2
+    return math.degrees(t1), math.degrees(t2), math.degrees(t3)
+
+
+def within_limits(angles: JointAngles, limits: Dict[str, Tuple[int, int]]) -> bool:
+    for j, p in angles_to_pulses(angles).items():
+        lo, hi = limits[j]
+        if p < lo or p > hi:
+            return False
+    return True
+
+
+def ik(x: float, y: float, z: float, pitch_deg: float, geo: ArmGeometry = ArmGeometry(),
+       limits: Dict[str, Tuple[int, int]] = None) -> Optional[JointAngles]:
+    """Joint angles placing the gripper tip at (x, y, z) with the given pitch; None if unreachable."""
+    r = math.hypot(x, y)
+    yaw = math.degrees(math.atan2(y, x)) if r > 1e-6 else 0.0
+    sol = _planar_ik(r, z, pitch_deg, geo)
+    if sol is None:
+        return None
+    angles = JointAngles(yaw, *sol)
+    if limits is not None and not within_limits(angles, limits):
+        return None
+    return angles
+
+
+class IKGrid:
+    """
+    Reachable pitches on a (reach, height) grid, built once from the analytic
+    IK and the joint limits. best_pitch() answers "which pitch works here"
+    without a search over pitches at query time.
+    """
+
+    def __init__(self, geo: ArmGeometry, limits: Dict[str, Tuple[int, int]],
+                 r_range=(0.0, 400.0), z_range=(-250.0, 400.0), step_mm: float = 10.0,
+                 pitches=tuple(range(-30, 95, 5))):
+        self.geo = geo
+        self.limits = limits
+        self.r0, self.z0 = float(r_range[0]), float(z_range[0])
+        self.step = float(step_mm)
+        self.nr = int((r_range[1] - r_range[0]) / step_mm) + 1
+        self.nz = int((z_range[1] - z_range[0]) / step_mm) + 1
+        self.pitches = tuple(float(p) for p in pitches)
+        # cell -> bitmask over self.pitches
+        self.mask = [[0] * self.nz for _ in range(self.nr)]
+        planar_limits = {j: v for j, v in limits.items() if j != 'base'}
+        for i in range(self.nr):
+            r = self.r0 + i * self.step
+            for k in range(self.nz):
+                z = self.z0 + k * self.step
+                bits = 0
+                for b, pitch in enumerate(self.pitches):
+                    sol = _planar_ik(r, z, pitch, geo)
+                    if sol is not None and within_limits(JointAngles(0.0, *sol), {'base': (0, 1000), **planar_limits}):
+                        bits |= 1 << b
+                self.mask[i][k] = bits
+
+    def _cell(self, r: float, z: float) -> Optional[Tuple[int, int]]:
+        i = int(round((r - self.r0) / self.step))
+        k = int(round((z - self.z0) / self.step))
+        if 0 <= i < self.nr and 0 <= k < self.nz:
+            return i, k
+        return None
+
+    def candidate_pitches(self, r: float, z: float):
+        """Reachable grid pitches at the nearest cell (empty outside the grid)."""
+        cell = self._cell(r, z)
+        if cell is None:
+            return []
+        bits = self.mask[cell[0]][cell[1]]
+        return [p for b, p in enumerate(self.pitches) if bits >> b & 1]
+
+    def best_pitch(self, r: float, z: float, preferred: float = 90.0) -> Optional[float]:
+        cands = self.candidate_pitches(r, z)
+        if not cands:
+            return None
+        return min(cands, key=lambda p: abs(p - preferred))
+
+
+def solve(x: float, y: float, z: float, pitch_deg: Optional[float], grid: IKGrid,
+          preferred_pitch: float = 90.0) -> Optional[Tuple[JointAngles, float]]:
+    """
+    Joint angles for (x, y, z); when pitch_deg is None the reachable pitches of
+    the grid cell are tried from the preferred one outwards and each is solved
+    exactly at the point. Returns (angles, pitch) or None.
+    """
+    if pitch_deg is not None:
+        sol = ik(x, y, z, pitch_deg, grid.geo, grid.limits)
+        return None if sol is None else (sol, pitch_deg)
+    r = math.hypot(x, y)
+    for pitch in sorted(grid.candidate_pitches(r, z), key=lambda p: abs(p - preferred_pitch)):
+        sol = ik(x, y, z, pitch, grid.geo, grid.limits)
+        if sol is not None:
+            return sol, pitch
+    return None
+
+
+__all__ = ["ArmGeometry", "JointAngles", "IKGrid", "fk", "ik", "solve", "angle_to_pulse",
+           "pulse_to_angle", "angles_to_pulses", "pulses_to_angles", "within_limits"]
@@ -0,0 +1,268 @@
+#!/usr/bin/env python3
+# arm_sequence.py
+# Data-driven pick/place recipes with overlapping joint actions.
+# Author: Daniel Würmli
+
+"""
+Arm recipes.
+
+A recipe is a list of steps read from src/utils/arm_recipes.json. Each step
+moves some joints to a target and may name the steps it waits for:
+
+    {"id": "lift",  "home": true, "base": "left"},
+    {"id": "open",  "gripper": "open", "after": []},
+    {"id": "reach", "pose": "top", "after": ["lift", "open"]}
+
+Target keys: "home" (home pose of every joint except the gripper), "base"
+("front" = home base, "left", "right" or a pulse), "gripper" ("open",
+"close", "object" or a pulse), "pose" (a named entry of "poses" or a
+{joint: percent} mapping), "xyz" ([x, y, z] or [x, y, z, pitch], see
+ArmSystem.move_to_xyz). "path" is a list of such targets run as one blended
+trajectory ending at the last one.
+
+"after" defaults to the previous step; [] starts with the recipe. Steps
+whose dependencies are done start together in one bus transaction, so
+opening the gripper overlaps the base rotation. Two steps never drive the
+same joint at once: a step waits for every earlier step using its joints.
+
+Recipes may instantiate a template: {"template": "pick_place", "pose": "top",
+"pick": "left", "place": "right"} substitutes "$pose", "$pick" and "$place"
+in the template steps.
+"""
+
+import json
+import os
+import time
+from typing import Dict, List, Optional
+
+from ..utils import timeline
+from .arm_kinematics import angles_to_pulses, solve
+from .arm_system import (BASE_SIDE_PULSE, GRIPPER_CLOSE_PULSE, GRIPPER_OBJECT_PULSE, GRIPPER_OPEN_PULSE,
+                         WAIT_MARGIN_S, WAIT_POLL_S, MotionMonitor, percent_to_pulse)
+from .arm_trajectory import Waypoint
+
+RECIPES_FILE = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils", "arm_recipes.json"))
+
+GRIPPER_STATES = {"open": GRIPPER_OPEN_PULSE, "close": GRIPPER_CLOSE_PULSE, "object": GRIPPER_OBJECT_PULSE}
+TARGET_KEYS = ("home", "base", "gripper", "pose", "xyz")
+
+
+class RecipeError(ValueError):
+    """Raised when a recipe is malformed or references unknown poses/steps."""
+
+
+class Step:
+    def __init__(self, sid: str, targets: List[dict], after: List[str], path: bool = False):
+        self.id = sid
+        self.targets = targets          # one target, or the waypoints of a path
+        self.after = after
+        self.path = path
+        self.joints: set = set()
+        self.start: Optional[float] = None
+        self.end: Optional[float] = None
+        self.duration_ms = 0
+        self.monitor: Optional[MotionMonitor] = None
+
+
+# ---------- Loading ----------
+def load_recipes(path: str = RECIPES_FILE) -> dict:
+    with open(path, "r") as f:
+        data = json.load(f)
+    if not isinstance(data.get("recipes"), dict):
+        raise RecipeError(f"{path}: missing 'recipes' mapping")
+    return data
+
+
+def _substitute(value, params: dict, where: str):
+    if isinstance(value, str) and value.startswith("$"):
+        key = value[1:]
+        if key not in params:
+            raise RecipeError(f"{where}: template parameter '{key}' not given")
+        return params[key]
+    if isinstance(value, list):
+        return [_substitute(v, params, where) for v in value]
+    if isinstance(value, dict):
+        return {k: _substitute(v, params, where) for k, v in value.items()}
+    return value
+
+
+def compile_recipe(name: str, data: dict) -> List[Step]:
+    recipes = data.get("recipes", {})
+    if name not in recipes:
+        raise RecipeError(f"Unknown arm recipe '{name}' (known: {', '.join(sorted(recipes))})")
+    spec = recipes[name]
+    raw = spec.get("steps")
+    if "template" in spec:
+        template = (data.get("templates") or {}).get(spec["template"])
+        if template is None:
+            raise RecipeError(f"{name}: unknown template '{spec['template']}'")
+        raw = _substitute(template, spec, f"{name}")
+    if not raw:
+        raise RecipeError(f"{name}: recipe has no steps")
+
+    steps: List[Step] = []
+    ids = set()
+    for i, item in enumerate(raw):
+        sid = str(item.get("id", f"step{i + 1}"))
+        if sid in ids:
+            raise RecipeError(f"{name}: duplicate step id '{sid}'")
+        after = item.get("after", [steps[-1].id] if steps else [])
+        after = [after] if isinstance(after, str) else list(after)
+        for dep in after:
+            if dep not in ids:
+                raise RecipeError(f"{name}.{sid}: 'after' references unknown or later step '{dep}'")
+        targets = item["path"] if "path" in item else [{k: v for k, v in item.items() if k in TARGET_KEYS}]
+        for t in targets:
+            unknown = set(t) - set(TARGET_KEYS)
+            if unknown or not t:
+                raise RecipeError(f"{name}.{sid}: expected one of {', '.join(TARGET_KEYS)}, got {sorted(t)}")
+        ids.add(sid)
+        steps.append(Step(sid, targets, after, path="path" in item))
+    return steps
+
+
+# ---------- Targets ----------
+def resolve_target(arm, target: dict, poses: dict) -> Dict[str, int]:
+    """Joint pulses for one target mapping."""
+    pulses: Dict[str, int] = {}
+    home = arm.home_pulses()
+    if target.get("home"):
+        pulses.update({j: p for j, p in home.items() if j != "gripper"})
+    if "xyz" in target:
+        vals = [float(v) for v in target["xyz"]]
+        sol = solve(*vals[:3], vals[3] if len(vals) > 3 else None, arm.ik_grid())
+        if sol is None:
+            raise RecipeError(f"xyz target {vals} not reachable")
+        pulses.update(angles_to_pulses(sol[0]))
+    if "pose" in target:
+        pose = target["pose"]
+        if isinstance(pose, str):
+            if pose not in poses:
+                raise RecipeError(f"Unknown recipe pose '{pose}'")
+            pose = poses[pose]
+        pulses.update({j: percent_to_pulse(j, p) for j, p in pose.items()})
+    if "base" in target:
+        base = target["base"]
+        if base == "front":
+            pulses["base"] = home["base"]
+        elif isinstance(base, str):
+            if base not in BASE_SIDE_PULSE:
+                raise RecipeError(f"Unknown base side '{base}'")
+            pulses["base"] = BASE_SIDE_PULSE[base]
+        else:
+            pulses["base"] = int(base)
+    if "gripper" in target:
+        g = target["gripper"]
+        if isinstance(g, str) and g not in GRIPPER_STATES:
+            raise RecipeError(f"Unknown gripper state '{g}'")
+        pulses["gripper"] = GRIPPER_STATES[g] if isinstance(g, str) else int(g)
+    return pulses
+
+
+# ---------- Execution ----------
+def _launch(arm, steps: List[Step], poses: dict, t0: float) -> None:
+    """Start steps together: plain targets share one bus write, paths run blended (blocking)."""
+    batch: Dict[str, int] = {}
+    durations: Dict[str, int] = {}
+    for step in steps:
+        step.start = time.monotonic() - t0
+        if not step.path:
+            pulses = resolve_target(arm, step.targets[0], poses)
+            # each step keeps its own synchronized duration inside the shared write
+            duration_ms = arm.move_duration_ms(pulses)
+            batch.update(pulses)
+            durations.update({j: duration_ms for j in pulses})
+    if batch:
+        arm.move_pulses(batch, durations=durations)
+        now = time.monotonic()
+        for step in steps:
+            if not step.path:
+                targets = arm.take_targets(step.joints)
+                step.monitor = MotionMonitor(targets)
+                step.duration_ms = int(max((t_end - now for _, t_end in targets.values()), default=0.0) * 1000)
+    for step in steps:
+        if step.path:
+            waypoints = [Waypoint(resolve_target(arm, t, poses)) for t in step.targets]
+            waypoints[-1].stop = True
+            arm.run_trajectory(waypoints)
+            step.monitor = MotionMonitor({})
+            step.duration_ms = int((time.monotonic() - t0 - step.start) * 1000)
+
+
+def run_steps(arm, steps: List[Step], poses: dict, name: str = "recipe") -> float:
+    """Execute compiled steps with overlap; returns the cycle time in seconds."""
+    for st in steps:
+        st.joints = _step_joints(arm, st, poses)
+    t0 = time.monotonic()
+    pending = list(steps)
+    running: List[Step] = []
+    done = set()
+    while pending or running:
+        # start every step whose dependencies are done and whose joints are free
+        busy = set()
+        for st in running:
+            busy |= st.joints
+        ready = []
+        for i, st in enumerate(pending):
+            if not all(dep in done for dep in st.after):
+                continue
+            if st.joints & busy or any(st.joints & e.joints for e in pending[:i]):
+                continue
+            ready.append(st)
+            busy |= st.joints
+        if ready:
+            for st in ready:
+                pending.remove(st)
+            _launch(arm, ready, poses, t0)
+            running.extend(ready)
+        if not running:
+            if pending:
+                raise RecipeError(f"{name}: steps {[s.id for s in pending]} can never start")
+            break
+
+        now = time.monotonic()
+        watched = sorted({j for st in running for j in st.monitor.remaining})
+        readings = arm.read_joint_pulses(watched, retries=0) if watched else {}
+        for st in list(running):
+            st.monitor.update(readings, now)
+            overdue = now - t0 - st.start > st.duration_ms / 1000.0 + WAIT_MARGIN_S
+            if st.monitor.done or overdue:
+                if overdue and not st.monitor.done:
+                    print(f"[WARN] {name}.{st.id}: joints not in position: {', '.join(sorted(st.monitor.remaining))}")
+                st.end = now - t0
+                running.remove(st)
+                done.add(st.id)
+                timeline.record("arm_step", f"{name}.{st.id}", st.end - st.start)
+        if running:
+            time.sleep(WAIT_POLL_S)
+    return time.monotonic() - t0
+
+
+def _step_joints(arm, step: Step, poses: dict) -> set:
+    joints = set()
+    for t in step.targets:
+        joints |= set(resolve_target(arm, t, poses))
+    return joints
+
+
+def report(name: str, steps: List[Step], cycle_s: float) -> str:
+    serial = sum((s.end or 0.0) - (s.start or 0.0) for s in steps)
+    lines = [f"[ARM] Recipe {name}: {cycle_s:.2f}s cycle ({serial:.2f}s if run one step at a time)"]
+    for s in steps:
+        lines.append(f"  {s.id:<10} {s.start or 0.0:6.2f}s -> {s.end or 0.0:6.2f}s  {','.join(sorted(s.joints))}")
+    return "\n".join(lines)
+
+
+def run_recipe(arm, name: str, path: str = RECIPES_FILE, verbose: bool = True) -> float:
+    """Load, compile and run one recipe; prints the cycle-time report. Returns the cycle time."""
+    data = load_recipes(path)
+    steps = compile_recipe(name, data)
+    with timeline.span("arm", f"recipe:{name}"):
+        cycle = run_steps(arm, steps, data.get("poses") or {}, name)
+    if verbose:
+        print(report(name, steps, cycle))
+    return cycle
+
+
+__all__ = ["RecipeError", "Step", "load_recipes", "compile_recipe", "resolve_target", "run_steps",
+           "run_recipe", "report", "RECIPES_FILE"]
@@ -0,0 +1,121 @@
+#!/usr/bin/env python3
+# arm_service.py
+# Long-lived arm shared by all arm tasks of a run.
+# Author: Daniel Würmli
+
+"""
+ArmService owns one ArmSystem for the lifetime of a run (e.g. a whole route):
+the serial port and GPIO direction pins are set up once, the servos are
+loaded once and stay loaded between tasks, and a readiness check confirms
+that every joint answers before the first task moves anything.
+
+The connection is opened lazily, so a route without arm tasks never touches
+the bus. Tasks are serialized by a lock; arm_task states run them from a
+worker thread. With telemetry=True servo temperature and voltage are polled
+in the background while the service is open.
+"""
+
+import threading
+import time
+from importlib import import_module
+from typing import Optional
+
+from ..utils import timeline
+from .arm_system import ArmSystem
+
+LOAD_SETTLE_S = 0.3
+
+
+class ArmNotReady(RuntimeError):
+    """Raised when the arm cannot be opened or joints do not answer."""
+
+
+class ArmService:
+    def __init__(self, port: str = '/dev/serial0', baud: int = None, use_gpio: bool = True,
+                 require_all_joints: bool = True, modes_package: str = None, telemetry: bool = False):
+        self._kwargs = {"port": port, "use_gpio": use_gpio}
+        if baud is not None:
+            self._kwargs["baud"] = baud
+        self.require_all_joints = require_all_joints
+        self.telemetry = telemetry
+        self.modes_package = modes_package or __package__.rsplit(".", 1)[0] + ".control.modes"
+        self._arm: Optional[ArmSystem] = None
+        self._lock = threading.RLock()
+        self.tasks_run = 0
+
+    # ---------- Lifecycle ----------
+    @property
+    def is_open(self) -> bool:
+        return self._arm is not None
+
+    def ensure_ready(self) -> ArmSystem:
+        """Open the bus (first call only), load the servos and check that the joints answer."""
+        with self._lock:
+            if self._arm is not None:
+                return self._arm
+            t0 = time.monotonic()
+            try:
+                arm = ArmSystem(**self._kwargs)
+            except Exception as exc:
+                raise ArmNotReady(f"Arm bus could not be opened: {exc}") from exc
+            arm.load_all()
+            time.sleep(LOAD_SETTLE_S)
+            pulses = arm.read_joint_pulses()
+            missing = sorted(j for j, p in pulses.items() if p is None)
+            if missing and self.require_all_joints:
+                arm.cleanup()
+                raise ArmNotReady("Arm not ready, no reply from: " + ", ".join(missing))
+            if missing:
+                print("[WARN] Arm joints not answering: " + ", ".join(missing))
+            if self.telemetry:
+                arm.start_telemetry()
+            self._arm = arm
+            print(f"[INFO] Arm ready in {time.monotonic() - t0:.2f}s")
+            return arm
+
+    def close(self) -> None:
+        """Release the bus; servos stay loaded (holding the last pose)."""
+        with self._lock:
+            if self._arm is None:
+                return
+            try:
+                if self._arm.telemetry is not None:
+                    print(self._arm.telemetry.summary())
+                print(self._arm.estimator.drift_summary())
+                self._arm.cleanup()
+            finally:
+                self._arm = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+        return False
+
+    def telemetry_snapshot(self) -> dict:
+        """Latest telemetry per joint ({} while closed or without telemetry); no bus access."""
+        arm = self._arm
+        if arm is None or arm.telemetry is None:
+            return {}
+        return {j: vars(s) for j, s in arm.telemetry.latest().items()}
+
+    # ---------- Tasks ----------
+    def run_module(self, name: str, **kwargs):
+        """Run one arm mode (e.g. arm_getobjecttop_front) on the shared arm."""
+        module = import_module(f"{self.modes_package}.{name}")
+        runner = getattr(module, "run", None)
+        if runner is None:
+            raise ValueError(f"Arm module '{name}' does not define a run() function.")
+        with self._lock:
+            arm = self.ensure_ready()
+            arm.reset_wait_stats()
+            with timeline.span("arm", name):
+                result = runner(arm, **kwargs)
+            if arm.wait_stats["waits"]:
+                print(arm.wait_summary())
+            self.tasks_run += 1
+            return result
+
+
+__all__ = ["ArmService", "ArmNotReady"]
@@ -12,6 +12,11 @@ High-level ArmSystem built on top of low_level.servo_controller
 from typing import Dict, Tuple, Union, List
 import os, json, time
 from ..low_level.servo_controller import ServoController, DEFAULT_BAUD
+from ..utils import timeline
+from .arm_trajectory import ArmTrajectory, Waypoint, split_at_stops, stream, DEFAULT_RATE_HZ
+from . import arm_kinematics as kin
+from .arm_telemetry import ArmTelemetry
+from .arm_estimator import PositionEstimator
 
 # ---------- Joint IDs and limits ----------
 JOINTS: Dict[str, int] = {
@@ -54,6 +59,12 @@ BASE_RIGHT_90_PULSE  = 122
 BASE_LEFT_90_PULSE   = 868
 BASE_ZERO_PULSE      = 500
 
+# Base pulse per side as used by base_left_90()/base_right_90(); 'front' is the home base
+BASE_SIDE_PULSE: Dict[str, int] = {
+    'left' : BASE_RIGHT_90_PULSE,
+    'right': BASE_LEFT_90_PULSE,
+}
+
 # Lookup tables
 PULSE_RANGE: Dict[str, Tuple[int, int]] = {j: (0, 1000) for j in JOINTS}
 DEG_RANGE:   Dict[str, Tuple[float, float]] = {j: (0.0, 240.0) for j in JOINTS}
@@ -73,6 +84,23 @@ def pulse_to_deg(joint: str, pulse: int) -> float:
     pulse = clamp(pulse, p0, p1)
     return (pulse - p0) * (d1 - d0) / (p1 - p0) + d0
 
+# Percent scales used by the *_percent helpers: 0 % -> first pulse, 100 % -> second
+PERCENT_RANGE: Dict[str, Tuple[int, int]] = {
+    'gripper'    : (GRIPPER_OPEN_PULSE, GRIPPER_CLOSE_PULSE),
+    'wrist_roll' : (WRIST_ROLL_RIGHT_MAX_PULSE, WRIST_ROLL_LEFT_MAX_PULSE),
+    'wrist_pitch': (WRIST_PITCH_DOWN_MAX_PULSE, WRIST_PITCH_UP_MAX_PULSE),
+    'elbow'      : (ELBOW_UP_MAX_PULSE, ELBOW_DOWN_MAX_PULSE),
+    'base'       : (BASE_RIGHT_MAX_PULSE, BASE_LEFT_MAX_PULSE),
+}
+
+def percent_to_pulse(joint: str, percent: float) -> int:
+    percent = clamp(percent, 0, 100)
+    if joint == 'shoulder':
+        deg = SHOULDER_FRONT_DEG + (SHOULDER_BACK_DEG - SHOULDER_FRONT_DEG) * (percent / 100.0)
+        return deg_to_pulse(joint, clamp(deg, *SOFT_LIMITS[joint]))
+    pmin, pmax = PERCENT_RANGE[joint]
+    return int(pmin + (pmax - pmin) * (percent / 100.0))
+
 # Pose definitions
 POSTURE_FRONT_DOWN = {'wrist_pitch': 192, 'elbow': 707, 'shoulder': 268, 'wrist_roll': 500}
 def _mk_pose(base_pulse, gripper_pulse): return {'base': base_pulse, **POSTURE_FRONT_DOWN, 'gripper': gripper_pulse}
@@ -106,11 +134,82 @@ DEFAULT_DURATION_MS = 1200
 BASE_DURATION_MS = 1200
 GRIP_DURATION_MS = 700
 
+# Per-joint motion limits (pulses/s, pulses/s^2) for automatic move durations.
+# A move takes the trapezoid time of its slowest joint; all joints share it.
+JOINT_LIMITS: Dict[str, Tuple[float, float]] = {
+    'gripper'    : (900.0, 3000.0),
+    'wrist_roll' : (600.0, 1500.0),
+    'wrist_pitch': (600.0, 1500.0),
+    'elbow'      : (450.0, 900.0),
+    'shoulder'   : (350.0, 700.0),
+    'base'       : (450.0, 900.0),
+}
+MIN_MOVE_MS = 40
+
+# Pulse limits used by move_to_xyz (the shoulder stays inside its measured range)
+IK_PULSE_LIMITS: Dict[str, Tuple[int, int]] = {
+    'base'       : PULSE_RANGE['base'],
+    'shoulder'   : (deg_to_pulse('shoulder', SHOULDER_FRONT_DEG), deg_to_pulse('shoulder', SHOULDER_BACK_DEG)),
+    'elbow'      : (ELBOW_UP_MAX_PULSE, min(ELBOW_DOWN_MAX_PULSE, PULSE_RANGE['elbow'][1])),
+    'wrist_pitch': (WRIST_PITCH_DOWN_MAX_PULSE, WRIST_PITCH_UP_MAX_PULSE),
+}
+
+# Motion completion (wait_until_reached)
+WAIT_TOLERANCE_PULSE = 12   # ~2.9 deg
+WAIT_MARGIN_S = 0.4         # default timeout beyond the commanded duration
+WAIT_POLL_S = 0.005
+STALL_PULSE = 2             # a joint that stops moving after its duration is blocked (e.g. gripper on an object)
+STALL_POLLS = 3
+
+class MotionMonitor:
+    """
+    Completion check for commanded moves: a joint is done once its reading is
+    within tolerance of the target, or once it stopped moving after its
+    commanded end time (blocked, e.g. a gripper closed on an object).
+    """
+
+    def __init__(self, targets: Dict[str, Tuple[int, float]], tolerance: int = WAIT_TOLERANCE_PULSE):
+        self.remaining = dict(targets)
+        self.tolerance = tolerance
+        self._last: Dict[str, int] = {}
+        self._still: Dict[str, int] = {}
+
+    @property
+    def done(self) -> bool:
+        return not self.remaining
+
+    def update(self, readings: Dict[str, Union[int, None]], now: float) -> None:
+        for j, raw in readings.items():
+            if raw is None or j not in self.remaining:
+                continue
+            target, t_end = self.remaining[j]
+            if abs(raw - target) <= self.tolerance:
+                del self.remaining[j]
+                continue
+            last = self._last.get(j)
+            self._still[j] = self._still.get(j, 0) + 1 if last is not None and abs(raw - last) <= STALL_PULSE else 0
+            self._last[j] = raw
+            if now >= t_end and self._still[j] >= STALL_POLLS:
+                del self.remaining[j]
+
+
 class ArmSystem:
-    def __init__(self, port: str = '/dev/serial0', baud: int = DEFAULT_BAUD, ids: Dict[str,int]=None, use_gpio: bool=True):
+    def __init__(self, port: str = '/dev/serial0', baud: int = DEFAULT_BAUD, ids: Dict[str,int]=None, use_gpio: bool=True,
+                 limits: Dict[str, Tuple[float, float]] = None):
         self.bus = ServoController(port, baud, use_gpio=use_gpio)
         self.joints = ids if ids else JOINTS.copy()
+        self.limits = {**JOINT_LIMITS, **(limits or {})}
+        self.geometry = kin.ArmGeometry()
+        self._ik_grid = None
         self.home_pose = self._load_home_file()
+        # joint name -> (target pulse, monotonic time the move ends) for moves not yet waited on
+        self._pending: Dict[str, Tuple[int, float]] = {}
+        # joint name -> last commanded pulse (start point for trajectories)
+        self._last_cmd: Dict[str, int] = {}
+        self.telemetry: ArmTelemetry = None
+        # predicted joint positions from the commanded moves (no bus traffic)
+        self.estimator = PositionEstimator()
+        self.reset_wait_stats()
 
     # --- Basic ---
     def _sid(self, joint: Union[str,int]) -> int:
@@ -123,146 +222,360 @@ class ArmSystem:
             if v == joint: return k
         return str(joint)
 
-    def move_joint_deg(self, joint: Union[str,int], angle_deg: float, duration_ms: int = DEFAULT_DURATION_MS):
+    def move_joint_deg(self, joint: Union[str,int], angle_deg: float, duration_ms: int = None):
         jname = self._name(joint)
         angle_deg = clamp(angle_deg, *SOFT_LIMITS[jname])
         pulse = deg_to_pulse(jname, angle_deg)
         self.move_joint_pulse(joint, pulse, duration_ms)
 
-    def move_joint_pulse(self, joint: Union[str,int], pulse: int, duration_ms: int = DEFAULT_DURATION_MS):
+    def move_joint_pulse(self, joint: Union[str,int], pulse: int, duration_ms: int = None):
+        if duration_ms is None:
+            duration_ms = self.move_duration_ms({joint: pulse})
         self.bus.move_time_write(self._sid(joint), int(pulse), int(duration_ms))
-
-    def move_pose_deg(self, angles, duration_ms: int = DEFAULT_DURATION_MS):
-        if isinstance(angles, dict):
-            for j, a in angles.items():
-                self.move_joint_deg(j, a, duration_ms)
-        else:
-            base, shoulder, elbow, wrist_pitch, wrist_roll, gripper = angles
-            for j, a in zip(['base','shoulder','elbow','wrist_pitch','wrist_roll','gripper'],
-                            [base, shoulder, elbow, wrist_pitch, wrist_roll, gripper]):
-                self.move_joint_deg(j, a, duration_ms)
+        self._track(joint, pulse, duration_ms)
+        # Commanded move: the servo runs for duration_ms after this write
+        timeline.record("servo", f"{self._name(joint)}->{int(pulse)}", int(duration_ms) / 1000.0)
+
+    def move_pulses(self, pulses: Dict[Union[str,int], int], duration_ms: int = None,
+                    durations: Dict[Union[str,int], int] = None):
+        """
+        Move several joints in one bus transaction; durations overrides duration_ms
+        per joint. Without duration_ms the joints share the shortest safe duration.
+        """
+        durations = {j: d for j, d in (durations or {}).items() if d is not None}
+        if duration_ms is None:
+            duration_ms = self.move_duration_ms({j: p for j, p in pulses.items() if j not in durations})
+        moves = [(self._sid(j), int(p), int(durations.get(j, duration_ms))) for j, p in pulses.items()]
+        if not moves:
+            return
+        self.bus.move_many(moves)
+        for j, p in pulses.items():
+            self._track(j, p, durations.get(j, duration_ms))
+        longest = max(t for _, _, t in moves)
+        timeline.record("servo", ",".join(f"{self._name(j)}->{int(p)}" for j, p in pulses.items()), longest / 1000.0)
+
+    def move_pose_deg(self, angles, duration_ms: int = None):
+        if not isinstance(angles, dict):
+            angles = dict(zip(['base','shoulder','elbow','wrist_pitch','wrist_roll','gripper'], angles))
+        pulses = {}
+        for j, a in angles.items():
+            jname = self._name(j)
+            pulses[j] = deg_to_pulse(jname, clamp(a, *SOFT_LIMITS[jname]))
+        self.move_pulses(pulses, duration_ms)
+
+    def move_pose_percent(self, percents: Dict[str, float], duration_ms: int = None):
+        """Batched counterpart of the *_percent helpers, e.g. {'shoulder': 48, 'elbow': 86}."""
+        self.move_pulses({j: percent_to_pulse(j, p) for j, p in percents.items()}, duration_ms)
+
+    # --- Move durations ---
+    def joint_move_ms(self, joint: str, distance: float) -> float:
+        """Trapezoidal move time for distance pulses under the joint's speed and acceleration limit."""
+        v, a = self.limits[joint]
+        d = abs(distance)
+        if d * a >= v * v:
+            return 1000.0 * (d / v + v / a)
+        return 1000.0 * 2.0 * (d / a) ** 0.5
+
+    def current_pulses(self, joints) -> Dict[str, Union[int, None]]:
+        """Estimated pulse per joint, read from the servos where nothing is known yet."""
+        names = [self._name(j) for j in joints]
+        out = self.estimator.estimates(names)
+        unknown = [j for j, p in out.items() if p is None]
+        if unknown:
+            out.update(self.read_joint_pulses(unknown, retries=0))
+        return out
+
+    def move_duration_ms(self, targets: Dict[Union[str,int], int], start: Dict[str, int] = None) -> int:
+        """
+        Shortest safe duration to reach targets from start (default: current
+        pulses), synchronized to the slowest joint. A joint with unknown
+        position is assumed to travel its full range.
+        """
+        names = {self._name(j): p for j, p in targets.items()}
+        if start is None:
+            start = self.current_pulses(list(names))
+        worst = 0.0
+        for j, target in names.items():
+            cur = start.get(j)
+            dist = abs(int(target) - cur) if cur is not None else PULSE_RANGE[j][1] - PULSE_RANGE[j][0]
+            worst = max(worst, self.joint_move_ms(j, dist))
+        return max(MIN_MOVE_MS, int(round(worst)))
+
+    # --- Motion completion ---
+    def _track(self, joint, pulse: int, duration_ms: int):
+        name = self._name(joint)
+        now = time.monotonic()
+        self._pending[name] = (int(pulse), now + int(duration_ms) / 1000.0)
+        self._last_cmd[name] = int(pulse)
+        self.estimator.command(name, int(pulse), int(duration_ms) / 1000.0, now)
+
+    def take_targets(self, joints) -> Dict[str, Tuple[int, float]]:
+        """Remove and return (target, end time) of pending moves, for callers that track completion themselves."""
+        return {j: self._pending.pop(j) for j in [self._name(j) for j in joints] if j in self._pending}
+
+    def reset_wait_stats(self):
+        self.wait_stats = {"waits": 0, "waited_s": 0.0, "budget_s": 0.0, "timeouts": 0}
+
+    def wait_until_reached(self, joints=None, tolerance: int = WAIT_TOLERANCE_PULSE, timeout: float = None) -> bool:
+        """
+        Poll servo positions until every joint is within tolerance of its last
+        commanded pulse (or has stalled after its commanded duration, e.g. a
+        gripper closed on an object). joints defaults to all joints moved since
+        the last wait; timeout defaults to the remaining commanded time plus
+        WAIT_MARGIN_S, which is also the fixed sleep this wait replaces when
+        computing the time saved. Returns False on timeout.
+        """
+        names = [self._name(j) for j in (joints if joints is not None else list(self._pending))]
+        targets = {j: self._pending[j] for j in names if j in self._pending}
+        t0 = time.monotonic()
+        if timeout is None:
+            end = max((t_end for _, t_end in targets.values()), default=t0)
+            timeout = max(0.0, end - t0) + WAIT_MARGIN_S
+        deadline = t0 + timeout
+
+        monitor = MotionMonitor(targets, tolerance)
+        reached = True
+        while not monitor.done:
+            now = time.monotonic()
+            if now >= deadline:
+                reached = False
+                break
+            monitor.update(self.read_joint_pulses(list(monitor.remaining), retries=0), now)
+            if not monitor.done:
+                time.sleep(WAIT_POLL_S)
+
+        for j in targets:
+            self._pending.pop(j, None)
+        waited = time.monotonic() - t0
+        st = self.wait_stats
+        st["waits"] += 1
+        st["waited_s"] += waited
+        st["budget_s"] += timeout
+        if not reached:
+            st["timeouts"] += 1
+            print(f"[WARN] Arm joints not in position after {timeout:.2f}s: {', '.join(sorted(monitor.remaining))}")
+        timeline.record("arm_wait", ",".join(sorted(targets)) or "-", waited,
+                        outcome="reached" if reached else "timeout")
+        return reached
+
+    def wait_summary(self) -> str:
+        """One line comparing the feedback waits with the fixed sleeps they replaced."""
+        st = self.wait_stats
+        saved = st["budget_s"] - st["waited_s"]
+        return (f"[ARM] {st['waits']} waits: {st['waited_s']:.2f}s instead of {st['budget_s']:.2f}s fixed sleeps"
+                f" (saved {saved:.2f}s, {st['timeouts']} timeouts)")
+
+    # --- Trajectories ---
+    def run_trajectory(self, waypoints: List[Waypoint], rate_hz: float = DEFAULT_RATE_HZ) -> float:
+        """
+        Execute waypoints as blended motion (see arm_trajectory): via points are
+        passed without stopping, stop points wait for position feedback.
+        Returns the elapsed time in seconds.
+        """
+        t0 = time.monotonic()
+        start = dict(self._last_cmd)
+        used = {j for wp in waypoints for j in wp.pulses}
+        unknown = [j for j in used if j not in start]
+        if unknown:
+            for j, raw in self.read_joint_pulses(unknown).items():
+                if raw is not None:
+                    start[j] = raw
+        unknown = [j for j in used if j not in start]
+        if unknown:
+            # no position for these joints: move them to their first target the plain way
+            first = {j: next(w for w in waypoints if j in w.pulses).pulses[j] for j in unknown}
+            self.move_pulses(first)
+            self.wait_until_reached(unknown)
+            start.update(first)
+
+        # segments without a duration get the shortest safe one from the previous waypoint
+        pose = dict(start)
+        timed = []
+        for wp in waypoints:
+            duration_ms = wp.duration_ms
+            if duration_ms is None:
+                duration_ms = self.move_duration_ms(wp.pulses, start=pose)
+            timed.append(Waypoint(wp.pulses, duration_ms, wp.stop, wp.meta))
+            pose.update(wp.pulses)
+        waypoints = timed
+
+        sids = {j: self._sid(j) for j in self.joints}
+        for part in split_at_stops(waypoints):
+            traj = ArmTrajectory(start, part)
+            with timeline.span("arm_traj", f"{len(part)} waypoints", duration_s=round(traj.duration, 3)):
+                sent = stream(self.bus, sids, traj, rate_hz, last=start, on_send=self._on_stream)
+            for j, p in traj.end.items():
+                self._track(j, p, 0)
+            start = dict(sent)
+            start.update(traj.end)
+            if part[-1].stop:
+                self.wait_until_reached(list(traj.end))
+        self._pending.clear()
+        return time.monotonic() - t0
+
+    def _on_stream(self, pulses: Dict[str, int], step_ms: int):
+        now = time.monotonic()
+        for j, p in pulses.items():
+            self.estimator.command(j, p, step_ms / 1000.0, now)
+
+    # --- Cartesian moves ---
+    def ik_grid(self) -> kin.IKGrid:
+        """Reachability grid, built on first use (~0.1 s)."""
+        if self._ik_grid is None:
+            self._ik_grid = kin.IKGrid(self.geometry, IK_PULSE_LIMITS)
+        return self._ik_grid
+
+    def move_to_xyz(self, x: float, y: float, z: float, pitch: float = None, duration_ms: int = None) -> float:
+        """
+        Put the gripper tip at (x, y, z) mm (x forward, y left, z up from the base
+        plate) with pitch degrees below horizontal; without pitch the reachable
+        one closest to pointing down is used. Raises ValueError when the point is
+        out of reach. Returns the pitch used.
+        """
+        sol = kin.solve(x, y, z, pitch, self.ik_grid())
+        if sol is None:
+            raise ValueError(f"Point ({x:.0f}, {y:.0f}, {z:.0f}) mm not reachable" +
+                             ("" if pitch is None else f" with pitch {pitch:.0f} deg"))
+        angles, used_pitch = sol
+        self.move_pulses(kin.angles_to_pulses(angles), duration_ms)
+        return used_pitch
+
+    def current_xyz(self):
+        """Gripper tip (x, y, z, pitch) from the current joint pulses; None if a joint did not answer."""
+        pulses = self.current_pulses(['base', 'shoulder', 'elbow', 'wrist_pitch'])
+        if any(p is None for p in pulses.values()):
+            return None
+        return kin.fk(kin.pulses_to_angles(pulses), self.geometry)
 
     # --- Gripper ---
-    def set_gripper_percent(self, percent: float, duration_ms: int = GRIP_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        pmin, pmax = GRIPPER_OPEN_PULSE, GRIPPER_CLOSE_PULSE
-        pulse = int(pmin + (pmax - pmin) * (percent/100.0))
-        self.move_joint_pulse('gripper', pulse, duration_ms)
+    def set_gripper_percent(self, percent: float, duration_ms: int = None):
+        self.move_joint_pulse('gripper', percent_to_pulse('gripper', percent), duration_ms)
 
-    def open_gripper(self, duration_ms: int = GRIP_DURATION_MS):  self.move_joint_pulse('gripper', GRIPPER_OPEN_PULSE, duration_ms)
-    def close_gripper(self, duration_ms: int = GRIP_DURATION_MS): self.move_joint_pulse('gripper', GRIPPER_CLOSE_PULSE, duration_ms)
-    def gripper_object(self, duration_ms: int = GRIP_DURATION_MS): self.move_joint_pulse('gripper', GRIPPER_OBJECT_PULSE, duration_ms)
+    def open_gripper(self, duration_ms: int = None):  self.move_joint_pulse('gripper', GRIPPER_OPEN_PULSE, duration_ms)
+    def close_gripper(self, duration_ms: int = None): self.move_joint_pulse('gripper', GRIPPER_CLOSE_PULSE, duration_ms)
+    def gripper_object(self, duration_ms: int = None): self.move_joint_pulse('gripper', GRIPPER_OBJECT_PULSE, duration_ms)
 
     # --- Wrist Roll / Pitch ---
-    def roll_zero(self, duration_ms=DEFAULT_DURATION_MS):       self.move_joint_pulse('wrist_roll',  WRIST_ROLL_ZERO_PULSE, duration_ms)
-    def roll_left_max(self, duration_ms=DEFAULT_DURATION_MS):   self.move_joint_pulse('wrist_roll',  WRIST_ROLL_LEFT_MAX_PULSE, duration_ms)
-    def roll_right_max(self, duration_ms=DEFAULT_DURATION_MS):  self.move_joint_pulse('wrist_roll',  WRIST_ROLL_RIGHT_MAX_PULSE, duration_ms)
-    def roll_percent(self, percent: float, duration_ms=DEFAULT_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        pmin, pmax = WRIST_ROLL_RIGHT_MAX_PULSE, WRIST_ROLL_LEFT_MAX_PULSE
-        self.move_joint_pulse('wrist_roll', int(pmin + (pmax-pmin)*(percent/100.0)), duration_ms)
-
-    def pitch_zero(self, duration_ms=DEFAULT_DURATION_MS):      self.move_joint_pulse('wrist_pitch', WRIST_PITCH_ZERO_PULSE, duration_ms)
-    def pitch_percent(self, percent: float, duration_ms=DEFAULT_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        pmin, pmax = WRIST_PITCH_DOWN_MAX_PULSE, WRIST_PITCH_UP_MAX_PULSE
-        self.move_joint_pulse('wrist_pitch', int(pmin + (pmax-pmin)*(percent/100.0)), duration_ms)
+    def roll_zero(self, duration_ms=None):       self.move_joint_pulse('wrist_roll',  WRIST_ROLL_ZERO_PULSE, duration_ms)
+    def roll_left_max(self, duration_ms=None):   self.move_joint_pulse('wrist_roll',  WRIST_ROLL_LEFT_MAX_PULSE, duration_ms)
+    def roll_right_max(self, duration_ms=None):  self.move_joint_pulse('wrist_roll',  WRIST_ROLL_RIGHT_MAX_PULSE, duration_ms)
+    def roll_percent(self, percent: float, duration_ms=None):
+        self.move_joint_pulse('wrist_roll', percent_to_pulse('wrist_roll', percent), duration_ms)
+
+    def pitch_zero(self, duration_ms=None):      self.move_joint_pulse('wrist_pitch', WRIST_PITCH_ZERO_PULSE, duration_ms)
+    def pitch_percent(self, percent: float, duration_ms=None):
+        self.move_joint_pulse('wrist_pitch', percent_to_pulse('wrist_pitch', percent), duration_ms)
 
     # --- Elbow / Shoulder relative helpers ---
     def read_joint_pulse(self, joint): return self.bus.read_pos(self._sid(joint))
+    def read_joint_pulses(self, joints=None, retries: int = 1) -> Dict[str, Union[int, None]]:
+        """Pulse of every joint (or the given ones) in one bus pass; None where a joint did not answer."""
+        names = [self._name(j) for j in (joints if joints is not None else self.joints)]
+        raw = self.bus.read_positions([self._sid(j) for j in names], retries=retries)
+        out = {j: raw[self._sid(j)] for j in names}
+        now = time.monotonic()
+        for j, p in out.items():
+            if p is None:
+                continue
+            self.estimator.correct(j, p, now)
+            if self.telemetry is not None:
+                self.telemetry.record(j, pulse=p)
+        return out
+
+    def estimated_pulses(self, joints=None) -> Dict[str, Union[int, None]]:
+        """Predicted pulse of every joint (or the given ones) without bus traffic; None where unknown."""
+        names = [self._name(j) for j in (joints if joints is not None else self.joints)]
+        return self.estimator.estimates(names)
     def read_joint_deg(self, joint):
         raw = self.read_joint_pulse(joint)
         return None if raw is None else pulse_to_deg(self._name(joint), raw)
 
-    def _rel_move_joint_deg(self, joint: str, ddeg: float, duration_ms: int = DEFAULT_DURATION_MS):
-        cur = self.read_joint_deg(joint)
+    def _rel_move_joint_deg(self, joint: str, ddeg: float, duration_ms: int = None):
+        raw = self.current_pulses([joint])[self._name(joint)]
+        cur = None if raw is None else pulse_to_deg(self._name(joint), raw)
         if cur is None:
             lo, hi = SOFT_LIMITS[joint]
             cur = (lo + hi) / 2.0
         self.move_joint_deg(joint, cur + ddeg, duration_ms)
 
-    def elbow_zero(self, duration_ms=DEFAULT_DURATION_MS):      self.move_joint_pulse('elbow', ELBOW_ZERO_PULSE, duration_ms)
-    def elbow_percent(self, percent: float, duration_ms=DEFAULT_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        pmin, pmax = ELBOW_UP_MAX_PULSE, ELBOW_DOWN_MAX_PULSE
-        self.move_joint_pulse('elbow', int(pmin + (pmax-pmin)*(percent/100.0)), duration_ms)
+    def elbow_zero(self, duration_ms=None):      self.move_joint_pulse('elbow', ELBOW_ZERO_PULSE, duration_ms)
+    def elbow_percent(self, percent: float, duration_ms=None):
+        self.move_joint_pulse('elbow', percent_to_pulse('elbow', percent), duration_ms)
 
-    def shoulder_zero(self, duration_ms=DEFAULT_DURATION_MS):   self.move_joint_pulse('shoulder', SHOULDER_ZERO_PULSE, duration_ms)
-    def shoulder_percent(self, percent: float, duration_ms=DEFAULT_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        deg = SHOULDER_FRONT_DEG + (SHOULDER_BACK_DEG - SHOULDER_FRONT_DEG) * (percent / 100.0)
-        self.move_joint_deg('shoulder', deg, duration_ms)
+    def shoulder_zero(self, duration_ms=None):   self.move_joint_pulse('shoulder', SHOULDER_ZERO_PULSE, duration_ms)
+    def shoulder_percent(self, percent: float, duration_ms=None):
+        self.move_joint_pulse('shoulder', percent_to_pulse('shoulder', percent), duration_ms)
 
     # --- Base absolute helpers ---
-    def base_zero(self, duration_ms=BASE_DURATION_MS):
+    def base_zero(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_ZERO_PULSE, duration_ms)
 
-    def base_left_45(self, duration_ms=BASE_DURATION_MS):
+    def base_left_45(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_RIGHT_45_PULSE, duration_ms)
 
-    def base_right_45(self, duration_ms=BASE_DURATION_MS):
+    def base_right_45(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_LEFT_45_PULSE, duration_ms)
 
-    def base_left_90(self, duration_ms=BASE_DURATION_MS):
+    def base_left_90(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_RIGHT_90_PULSE, duration_ms)
 
-    def base_right_90(self, duration_ms=BASE_DURATION_MS):
+    def base_right_90(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_LEFT_90_PULSE, duration_ms)
 
-    def base_left_max(self, duration_ms=BASE_DURATION_MS):
+    def base_left_max(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_RIGHT_MAX_PULSE, duration_ms)
 
-    def base_right_max(self, duration_ms=BASE_DURATION_MS):
+    def base_right_max(self, duration_ms=None):
         self.move_joint_pulse('base', BASE_LEFT_MAX_PULSE, duration_ms)
 
-    def base_percent(self, percent: float, duration_ms=BASE_DURATION_MS):
-        percent = clamp(percent, 0, 100)
-        pmin, pmax = BASE_RIGHT_MAX_PULSE, BASE_LEFT_MAX_PULSE
-        self.move_joint_pulse('base', int(pmin + (pmax - pmin) * (percent / 100.0)), duration_ms)
+    def base_percent(self, percent: float, duration_ms=None):
+        self.move_joint_pulse('base', percent_to_pulse('base', percent), duration_ms)
 
     # --- Ready posture helpers ---
-    def _apply_ready_pose(self, base_fn, base_duration_ms=BASE_DURATION_MS, joint_duration_ms=DEFAULT_DURATION_MS):
-        """Move the arm into a ready posture with predefined joint percentages."""
-        if base_fn is not None:
-            base_fn(duration_ms=base_duration_ms)
-        self.shoulder_percent(100.0, duration_ms=joint_duration_ms)
-        self.elbow_percent(85.0, duration_ms=joint_duration_ms)
-        self.pitch_percent(5.0, duration_ms=joint_duration_ms)
-
-    def ready(self, duration_ms=DEFAULT_DURATION_MS, base_duration_ms=BASE_DURATION_MS):
+    def _apply_ready_pose(self, base_pulse, base_duration_ms=None, joint_duration_ms=None):
+        """Move the arm into a ready posture with predefined joint percentages (one bus transaction)."""
+        pulses = {
+            'shoulder'   : percent_to_pulse('shoulder', 100.0),
+            'elbow'      : percent_to_pulse('elbow', 85.0),
+            'wrist_pitch': percent_to_pulse('wrist_pitch', 5.0),
+        }
+        if base_pulse is not None:
+            pulses = {'base': base_pulse, **pulses}
+        self.move_pulses(pulses, joint_duration_ms, durations={'base': base_duration_ms})
+
+    def ready(self, duration_ms=None, base_duration_ms=None):
         """Alias for ready_front to keep CLI flag intuitive."""
         self.ready_front(duration_ms=duration_ms, base_duration_ms=base_duration_ms)
 
-    def ready_front(self, duration_ms=DEFAULT_DURATION_MS, base_duration_ms=BASE_DURATION_MS):
+    def ready_front(self, duration_ms=None, base_duration_ms=None):
         """Ready posture facing forward (base centered)."""
-        self._apply_ready_pose(self.base_zero, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
+        self._apply_ready_pose(BASE_ZERO_PULSE, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
 
-    def ready_left(self, duration_ms=DEFAULT_DURATION_MS, base_duration_ms=BASE_DURATION_MS):
+    def ready_left(self, duration_ms=None, base_duration_ms=None):
         """Ready posture with the base rotated 90° to the left."""
-        self._apply_ready_pose(self.base_left_90, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
+        self._apply_ready_pose(BASE_RIGHT_90_PULSE, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
 
-    def ready_right(self, duration_ms=DEFAULT_DURATION_MS, base_duration_ms=BASE_DURATION_MS):
+    def ready_right(self, duration_ms=None, base_duration_ms=None):
         """Ready posture with the base rotated 90° to the right."""
-        self._apply_ready_pose(self.base_right_90, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
+        self._apply_ready_pose(BASE_LEFT_90_PULSE, base_duration_ms=base_duration_ms, joint_duration_ms=duration_ms)
 
     # --- Top-pick helpers ---
-    def move_top_pick_pose(self, shoulder_percent=48.0, elbow_percent=86.0, pitch_percent=52.0, duration_ms=DEFAULT_DURATION_MS):
+    def move_top_pick_pose(self, shoulder_percent=48.0, elbow_percent=86.0, pitch_percent=52.0, duration_ms=None):
         """Move joints to the empirically tuned top pick pose."""
-        self.shoulder_percent(shoulder_percent, duration_ms=duration_ms)
-        self.elbow_percent(elbow_percent, duration_ms=duration_ms)
-        self.pitch_percent(pitch_percent, duration_ms=duration_ms)
+        self.move_pose_percent({'shoulder': shoulder_percent, 'elbow': elbow_percent,
+                                'wrist_pitch': pitch_percent}, duration_ms)
 
     # >>> fehlten bei dir: jetzt vorhanden
-    def elbow_up(self, deg, duration_ms=DEFAULT_DURATION_MS):      self._rel_move_joint_deg('elbow',     +abs(deg), duration_ms)
-    def elbow_down(self, deg, duration_ms=DEFAULT_DURATION_MS):    self._rel_move_joint_deg('elbow',     -abs(deg), duration_ms)
-    def wrist_pitch_up(self, deg, duration_ms=DEFAULT_DURATION_MS):   self._rel_move_joint_deg('wrist_pitch', +abs(deg), duration_ms)
-    def wrist_pitch_down(self, deg, duration_ms=DEFAULT_DURATION_MS): self._rel_move_joint_deg('wrist_pitch', -abs(deg), duration_ms)
-    def wrist_roll_left(self, deg, duration_ms=DEFAULT_DURATION_MS):  self._rel_move_joint_deg('wrist_roll',  +abs(deg), duration_ms)
-    def wrist_roll_right(self, deg, duration_ms=DEFAULT_DURATION_MS): self._rel_move_joint_deg('wrist_roll',  -abs(deg), duration_ms)
-    def turn_left(self, deg, duration_ms=BASE_DURATION_MS):     self._rel_move_joint_deg('base',      +abs(deg), duration_ms)
-    def turn_right(self, deg, duration_ms=BASE_DURATION_MS):    self._rel_move_joint_deg('base',      -abs(deg), duration_ms)
-    def shoulder_up(self, deg, duration_ms=DEFAULT_DURATION_MS):   self._rel_move_joint_deg('shoulder',  +abs(deg), duration_ms)
-    def shoulder_down(self, deg, duration_ms=DEFAULT_DURATION_MS): self._rel_move_joint_deg('shoulder',  -abs(deg), duration_ms)
+    def elbow_up(self, deg, duration_ms=None):      self._rel_move_joint_deg('elbow',     +abs(deg), duration_ms)
+    def elbow_down(self, deg, duration_ms=None):    self._rel_move_joint_deg('elbow',     -abs(deg), duration_ms)
+    def wrist_pitch_up(self, deg, duration_ms=None):   self._rel_move_joint_deg('wrist_pitch', +abs(deg), duration_ms)
+    def wrist_pitch_down(self, deg, duration_ms=None): self._rel_move_joint_deg('wrist_pitch', -abs(deg), duration_ms)
+    def wrist_roll_left(self, deg, duration_ms=None):  self._rel_move_joint_deg('wrist_roll',  +abs(deg), duration_ms)
+    def wrist_roll_right(self, deg, duration_ms=None): self._rel_move_joint_deg('wrist_roll',  -abs(deg), duration_ms)
+    def turn_left(self, deg, duration_ms=None):     self._rel_move_joint_deg('base',      +abs(deg), duration_ms)
+    def turn_right(self, deg, duration_ms=None):    self._rel_move_joint_deg('base',      -abs(deg), duration_ms)
+    def shoulder_up(self, deg, duration_ms=None):   self._rel_move_joint_deg('shoulder',  +abs(deg), duration_ms)
+    def shoulder_down(self, deg, duration_ms=None): self._rel_move_joint_deg('shoulder',  -abs(deg), duration_ms)
 
     # --- Home ---
     def _load_home_file(self, path: str = HOME_FILE):
@@ -277,14 +590,8 @@ class ArmSystem:
     def set_home_from_current(self, save: bool = True, path: str = HOME_FILE):
         pose = {}
         missing = []
-        for j in self.joints:
-            raw = self.read_joint_pulse(j)
+        for j, raw in self.read_joint_pulses().items():
             if raw is None:
-                # try degree reading as fallback
-                deg = self.read_joint_deg(j)
-                if deg is not None:
-                    pose[j] = float(deg)
-                    continue
                 missing.append(j)
                 continue
             pose[j] = float(pulse_to_deg(j, raw))
@@ -298,11 +605,17 @@ class ArmSystem:
     def clear_home_file(self, path: str = HOME_FILE):
         if os.path.exists(path): os.remove(path)
 
-    def home(self, duration_ms=1800):
+    def home_pulses(self) -> Dict[str, int]:
+        """Home pose as pulses (stored home file or factory mid positions)."""
+        if self.home_pose is not None:
+            return {j: deg_to_pulse(j, clamp(d, *SOFT_LIMITS[j])) for j, d in self.home_pose.items()}
+        return {j: GRIPPER_OPEN_PULSE if j == 'gripper' else 500 for j in self.joints}
+
+    def home(self, duration_ms=None):
         if self.home_pose is None: self.factory_home(duration_ms)
         else: self.move_pose_deg(self.home_pose, duration_ms)
 
-    def factory_home(self, duration_ms=1800):
+    def factory_home(self, duration_ms=None):
         mids = {}
         for j in self.joints:
             pulse = GRIPPER_OPEN_PULSE if j == 'gripper' else 500
@@ -318,7 +631,7 @@ class ArmSystem:
             self.wrist_roll_left(amp, duration_ms); time.sleep(duration_ms / 1000)
             self.wrist_roll_right(amp, duration_ms); time.sleep(duration_ms / 1000)
 
-    def grip_object(self, duration_ms=GRIP_DURATION_MS): self.move_joint_pulse('gripper', GRIPPER_OBJECT_PULSE, duration_ms)
+    def grip_object(self, duration_ms=None): self.move_joint_pulse('gripper', GRIPPER_OBJECT_PULSE, duration_ms)
 
     def pickup(self, sh_down=18.0, el_down=35.0, lift=35.0, grip_percent_open=10.0, grip_percent_pick=55.0, final_close_percent=85.0, dur_small=DEFAULT_DURATION_MS, grip_time=GRIP_DURATION_MS):
         self.apply_posture('pose_base_zero', duration_ms=dur_small); time.sleep(dur_small / 1000)
@@ -344,16 +657,17 @@ class ArmSystem:
 
     def list_poses(self) -> List[str]: return list(POSTURES.keys())
 
-    def apply_posture(self, name: str, duration_ms=800):
+    def apply_posture(self, name: str, duration_ms=None):
         if name not in POSTURES: raise ValueError(f"Pose '{name}' not found.")
         pose = POSTURES[name]
         if name.endswith('_closed'): self.close_gripper(400); time.sleep(0.4)
         else:                        self.open_gripper(300);  time.sleep(0.3)
-        for j, p in pose.items():
-            self.move_joint_pulse(j, int(p), duration_ms)
+        self.move_pulses({j: int(p) for j, p in pose.items()}, duration_ms)
 
     # --- Power ---
-    def unload_joint(self, joint): self.bus.unload(self._sid(joint))
+    def unload_joint(self, joint):
+        self.bus.unload(self._sid(joint))
+        self.estimator.forget(self._name(joint))  # free to be moved by hand
     def load_joint(self, joint):   self.bus.load(self._sid(joint))
 
     def unload_all(self):
@@ -366,4 +680,15 @@ class ArmSystem:
             try: self.load_joint(name)
             except Exception: pass
 
-    def cleanup(self): self.bus.cleanup()
+    # --- Telemetry ---
+    def start_telemetry(self, **kwargs) -> ArmTelemetry:
+        """Poll temperature, voltage and position in the background (see arm_telemetry)."""
+        if self.telemetry is None:
+            kwargs.setdefault("on_pulse", self.estimator.correct)
+            self.telemetry = ArmTelemetry(self.bus, self.joints, **kwargs)
+        return self.telemetry.start()
+
+    def cleanup(self):
+        if self.telemetry is not None:
+            self.telemetry.stop()
+        self.bus.cleanup()
@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# arm_telemetry.py
+# Low-priority background poller for servo temperature, input voltage and position.
+# Author: Daniel Würmli
+
+"""
+Servo telemetry.
+
+A daemon thread reads one register of one servo per tick, and only when the
+bus has been idle for min_idle_s: commands and waits (which poll every few
+ms) always win, trajectory streaming at 50 Hz is never interrupted. Positions
+are read every cycle; temperature and voltage change slowly and are read
+every slow_every cycles.
+
+Samples go into a fixed-size ring per joint. latest() and history() answer
+from memory; position reads made by ArmSystem itself are recorded too.
+"""
+
+import threading
+import time
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
+POLL_PERIOD_S = 0.05        # one register read per tick at most
+MIN_IDLE_S = 0.03           # bus must have been quiet this long (longer than a 50 Hz stream period)
+POLL_TIMEOUT_S = 0.01
+SLOW_EVERY = 10             # temperature/voltage every N position cycles
+HISTORY = 256               # samples kept per joint
+TEMP_WARN_C = 65
+VIN_WARN_MV = 6500
+
+
+@dataclass
+class Sample:
+    t: float
+    temp_c: Optional[int] = None
+    vin_mv: Optional[int] = None
+    pulse: Optional[int] = None
+
+
+class ArmTelemetry:
+    def __init__(self, bus, joints: Dict[str, int], period_s: float = POLL_PERIOD_S, min_idle_s: float = MIN_IDLE_S,
+                 slow_every: int = SLOW_EVERY, history: int = HISTORY,
+                 temp_warn_c: int = TEMP_WARN_C, vin_warn_mv: int = VIN_WARN_MV, on_pulse=None):
+        self.bus = bus
+        self.joints = dict(joints)
+        self.period_s = float(period_s)
+        self.min_idle_s = float(min_idle_s)
+        self.slow_every = max(1, int(slow_every))
+        self.temp_warn_c = temp_warn_c
+        self.vin_warn_mv = vin_warn_mv
+        self.on_pulse = on_pulse        # on_pulse(joint, pulse) for every polled position
+        self._rings: Dict[str, deque] = {j: deque(maxlen=int(history)) for j in self.joints}
+        self._latest: Dict[str, Sample] = {j: Sample(0.0) for j in self.joints}
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._warned = set()
+        self.stats = {"reads": 0, "timeouts": 0, "skipped_busy": 0}
+
+    # ---------- Lifecycle ----------
+    def start(self) -> "ArmTelemetry":
+        if self._thread is None or not self._thread.is_alive():
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="arm-telemetry", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ---------- Data ----------
+    def record(self, joint: str, **values) -> None:
+        """Store new values for a joint (fields not given keep their last value)."""
+        if joint not in self._rings:
+            return
+        with self._lock:
+            last = self._latest[joint]
+            sample = Sample(time.monotonic(),
+                            values.get("temp_c", last.temp_c),
+                            values.get("vin_mv", last.vin_mv),
+                            values.get("pulse", last.pulse))
+            self._latest[joint] = sample
+            self._rings[joint].append(sample)
+        self._check(joint, sample)
+
+    def latest(self, joint: str = None):
+        """Newest sample of a joint, or {joint: sample} for all; no bus access."""
+        with self._lock:
+            if joint is not None:
+                return self._latest[joint]
+            return dict(self._latest)
+
+    def history(self, joint: str) -> List[Sample]:
+        with self._lock:
+            return list(self._rings[joint])
+
+    def summary(self) -> str:
+        parts = []
+        for j, s in self.latest().items():
+            temp = "-" if s.temp_c is None else f"{s.temp_c}C"
+            vin = "-" if s.vin_mv is None else f"{s.vin_mv / 1000.0:.2f}V"
+            parts.append(f"{j}={temp}/{vin}")
+        return "[ARM] Telemetry " + " ".join(parts)
+
+    def _check(self, joint: str, s: Sample) -> None:
+        if s.temp_c is not None and s.temp_c >= self.temp_warn_c and (joint, "temp") not in self._warned:
+            self._warned.add((joint, "temp"))
+            print(f"[WARN] Servo {joint} at {s.temp_c} C")
+        if s.vin_mv is not None and s.vin_mv < self.vin_warn_mv and (joint, "vin") not in self._warned:
+            self._warned.add((joint, "vin"))
+            print(f"[WARN] Servo {joint} supply at {s.vin_mv / 1000.0:.2f} V")
+
+    # ---------- Polling ----------
+    def _schedule(self):
+        """Endless (joint, field) sequence: positions every cycle, temp/voltage every slow_every cycles."""
+        cycle = 0
+        while True:
+            for j in self.joints:
+                yield j, "pulse"
+            if cycle % self.slow_every == 0:
+                for j in self.joints:
+                    yield j, "temp_c"
+                    yield j, "vin_mv"
+            cycle += 1
+
+    def _read(self, sid: int, field: str):
+        if field == "pulse":
+            return self.bus.read_pos(sid, POLL_TIMEOUT_S)
+        if field == "temp_c":
+            return self.bus.read_temp(sid, POLL_TIMEOUT_S)
+        return self.bus.read_vin(sid, POLL_TIMEOUT_S)
+
+    def poll_once(self, joint: str, field: str) -> bool:
+        """Read one register if the bus is free and idle; False when skipped."""
+        if not self.bus.lock.acquire(blocking=False):
+            self.stats["skipped_busy"] += 1
+            return False
+        try:
+            if self.bus.idle_for() < self.min_idle_s:
+                self.stats["skipped_busy"] += 1
+                return False
+            value = self._read(self.joints[joint], field)
+        finally:
+            self.bus.lock.release()
+        self.stats["reads"] += 1
+        if value is None:
+            self.stats["timeouts"] += 1
+            return True
+        self.record(joint, **{field: value})
+        if field == "pulse" and self.on_pulse is not None:
+            self.on_pulse(joint, value)
+        return True
+
+    def _run(self) -> None:
+        schedule = self._schedule()
+        joint, field = next(schedule)
+        while not self._stop.wait(self.period_s):
+            try:
+                if self.poll_once(joint, field):
+                    joint, field = next(schedule)
+            except Exception as exc:
+                print(f"[WARN] Arm telemetry read failed: {exc}")
+                joint, field = next(schedule)
+
+
+__all__ = ["ArmTelemetry", "Sample"]
@@ -0,0 +1,150 @@
+#!/usr/bin/env python3
+# arm_trajectory.py
+# Blended joint-space trajectories streamed to the bus servos at a fixed rate.
+# Author: Daniel Würmli
+
+"""
+Arm trajectories.
+
+A trajectory is a list of Waypoints (joint -> pulse, time to reach it; None
+lets ArmSystem.run_trajectory derive it from the joint limits). Via
+waypoints are passed through without stopping: each joint follows a cubic
+Hermite segment per waypoint, with the velocity at a via point taken as the
+mean of the neighbouring segment slopes (zero when the joint reverses or
+holds). Stop waypoints end with zero velocity and wait for servo feedback
+before the next part starts, e.g. to close the gripper on an object.
+
+The executor samples the curve at rate_hz and sends each setpoint with a move
+time of one period, so the servos interpolate between setpoints themselves.
+"""
+
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+DEFAULT_RATE_HZ = 50.0
+MIN_STEP_PULSE = 1      # setpoints closer than this to the last one are not resent
+
+
+@dataclass
+class Waypoint:
+    pulses: Dict[str, int]
+    duration_ms: Optional[int] = None
+    stop: bool = False
+    meta: dict = field(default_factory=dict)
+
+
+class JointSpline:
+    """Piecewise cubic Hermite curve for one joint through (t, pulse) knots."""
+
+    def __init__(self, times: List[float], values: List[float], stops: List[bool]):
+        self.times = times
+        self.values = values
+        n = len(values)
+        slopes = []
+        for i in range(n - 1):
+            dt = times[i + 1] - times[i]
+            slopes.append((values[i + 1] - values[i]) / dt if dt > 0 else 0.0)
+        vel = [0.0] * n
+        for i in range(1, n - 1):
+            a, b = slopes[i - 1], slopes[i]
+            if not stops[i] and a * b > 0.0:
+                # limited to 3x the smaller slope so the curve stays monotone between knots
+                m = min(abs(0.5 * (a + b)), 3.0 * min(abs(a), abs(b)))
+                vel[i] = m if a > 0.0 else -m
+        self.vel = vel
+
+    def at(self, t: float) -> float:
+        times, values, vel = self.times, self.values, self.vel
+        if t <= times[0]:
+            return values[0]
+        if t >= times[-1]:
+            return values[-1]
+        i = 0
+        while times[i + 1] < t:
+            i += 1
+        t0, t1 = times[i], times[i + 1]
+        h = t1 - t0
+        if h <= 0.0:
+            return values[i + 1]
+        s = (t - t0) / h
+        s2, s3 = s * s, s * s * s
+        return ((2 * s3 - 3 * s2 + 1) * values[i] + (s3 - 2 * s2 + s) * h * vel[i]
+                + (-2 * s3 + 3 * s2) * values[i + 1] + (s3 - s2) * h * vel[i + 1])
+
+
+class ArmTrajectory:
+    """One blended part of a trajectory: start pose, then waypoints up to (and including) a stop."""
+
+    def __init__(self, start: Dict[str, int], waypoints: List[Waypoint]):
+        self.joints = sorted(set(start) | {j for wp in waypoints for j in wp.pulses})
+        times = [0.0]
+        for wp in waypoints:
+            times.append(times[-1] + max(0, int(wp.duration_ms)) / 1000.0)
+        self.duration = times[-1]
+        stops = [True] + [wp.stop for wp in waypoints]
+        stops[-1] = True
+        self.splines: Dict[str, JointSpline] = {}
+        for j in self.joints:
+            cur = start.get(j)
+            values = []
+            for wp in waypoints:
+                cur = wp.pulses.get(j, cur)
+                values.append(cur)
+            first = next((v for v in values if v is not None), None)
+            if first is None:
+                continue
+            # joints without a known start begin at their first target (see ArmSystem.run_trajectory)
+            values = [first if v is None else v for v in [start.get(j)] + values]
+            self.splines[j] = JointSpline(times, [float(v) for v in values], stops)
+        self.end = {j: int(round(sp.values[-1])) for j, sp in self.splines.items()}
+
+    def sample(self, t: float) -> Dict[str, int]:
+        return {j: int(round(sp.at(t))) for j, sp in self.splines.items()}
+
+
+def split_at_stops(waypoints: List[Waypoint]) -> List[List[Waypoint]]:
+    """Cut a waypoint list into blended parts that each end at a stop (or at the last waypoint)."""
+    parts, cur = [], []
+    for wp in waypoints:
+        cur.append(wp)
+        if wp.stop:
+            parts.append(cur)
+            cur = []
+    if cur:
+        parts.append(cur)
+    return parts
+
+
+def stream(bus, sids: Dict[str, int], traj: ArmTrajectory, rate_hz: float = DEFAULT_RATE_HZ,
+           last: Optional[Dict[str, int]] = None, on_send=None) -> Dict[str, int]:
+    """
+    Send traj to the servos at rate_hz; returns the last commanded pulse per joint.
+    Each tick is one batched bus write containing only the joints that moved;
+    on_send({joint: pulse}, step_ms) is called after each write.
+    """
+    period = 1.0 / max(1.0, float(rate_hz))
+    step_ms = max(1, int(round(period * 1000.0)))
+    sent = dict(last or {})
+    t0 = time.monotonic()
+    k = 0
+    while True:
+        t = min(k * period, traj.duration)
+        moves = {}
+        for j, p in traj.sample(t).items():
+            if j not in sent or abs(p - sent[j]) >= MIN_STEP_PULSE:
+                moves[j] = p
+                sent[j] = p
+        if moves:
+            bus.move_many((sids[j], p, step_ms) for j, p in moves.items())
+            if on_send is not None:
+                on_send(moves, step_ms)
+        if t >= traj.duration:
+            return sent
+        k += 1
+        delay = t0 + k * period - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+
+
+__all__ = ["Waypoint", "JointSpline", "ArmTrajectory", "split_at_stops", "stream", "DEFAULT_RATE_HZ"]
@@ -8,7 +8,8 @@
 import threading
 from typing import Optional
 
-from ..low_level.camera_bridge import create_app, run_stream_server
+from ..low_level.camera_bridge import OVERLAY_MAX_AGE_S, create_app, run_stream_server
+from .detection_system import DetectionResult, DetectionSystem
 
 
 class CameraSystem:
@@ -22,6 +23,8 @@ class CameraSystem:
         outw: int = 960,
         maxfps: int = 30,
         host: str = "0.0.0.0",
+        mjpeg: bool = False,
+        detection: Optional[dict] = None,
     ):
         self.source = source
         self.port = int(port)
@@ -29,11 +32,14 @@ class CameraSystem:
         self.outw = int(outw)
         self.maxfps = int(maxfps)
         self.host = host
+        self.mjpeg = bool(mjpeg)
+        self.detection_cfg = detection if isinstance(detection, dict) else None
 
         self._app = None
         self._camera = None
         self._store = None
         self._thread: Optional[threading.Thread] = None
+        self.detections: Optional[DetectionSystem] = None
 
     def _init_app(self) -> None:
         if self._app is None:
@@ -43,7 +49,13 @@ class CameraSystem:
                 quality=self.quality,
                 outw=self.outw,
                 maxfps=self.maxfps,
+                mjpeg=self.mjpeg,
             )
+            if self.detection_cfg is not None:
+                try:
+                    self.detections = DetectionSystem.from_cfg(self._camera, self.detection_cfg).start()
+                except Exception as exc:
+                    print(f"[WARN] On-robot detection disabled: {exc}")
 
     def _run_blocking(self) -> None:
         if self._app is None:
@@ -70,8 +82,30 @@ class CameraSystem:
         self._thread.start()
         return self._thread
 
+    @property
+    def camera(self):
+        """The camera reader (frame ring), created on first use."""
+        self._init_app()
+        return self._camera
+
+    def latest_detections(self, max_age: float = OVERLAY_MAX_AGE_S) -> Optional[DetectionResult]:
+        """
+        Newest boxes from the on-robot detector or pushed by the overlay client
+        (result.source tells which), None when both are older than max_age.
+        """
+        results = [self._store.latest_detections(max_age)] if self._store is not None else []
+        if self.detections is not None:
+            res = self.detections.latest()
+            results.append(res if res is not None and res.age_s <= max_age else None)
+        results = [r for r in results if r is not None]
+        return max(results, key=lambda r: r.t_frame) if results else None
+
     def stop(self) -> None:
         """Close the camera resource only; Flask must be stopped externally."""
+        if self.detections is not None:
+            self.detections.stop()
+            print(self.detections.summary())
+            self.detections = None
         if self._camera is not None:
             self._camera.close()
 
@@ -84,6 +118,7 @@ class CameraSystem:
             outw=self.outw,
             maxfps=self.maxfps,
             host=self.host,
+            mjpeg=self.mjpeg,
         )
 
 
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+# detection_system.py
+# On-robot detection stage: newest camera frame -> ONNX detector -> published boxes.
+# Author: Daniel Würmli
+
+"""
+DetectionSystem runs the OnnxDetector in its own thread on the newest frame
+of the camera ring (frames that arrive while the network runs are skipped,
+never queued). Each result carries the camera sequence number and capture
+time of its frame, so consumers know how old the boxes are.
+
+Robot logic reads latest() or blocks in wait_newer(); no laptop is involved.
+
+With track_every=N the detector runs on every N-th frame (earlier when the
+tracker starts losing boxes) and BoxTracker moves the boxes along on the
+frames in between, so results arrive at camera rate for a fraction of the
+inference cost. Such results are marked tracked=True.
+"""
+
+import threading
+import time
+from typing import Optional
+
+from ..low_level.box_tracker import BoxTracker
+from ..low_level.detector import DetectionResult, OnnxDetector
+
+
+class DetectionSystem:
+    def __init__(self, camera, detector: OnnxDetector, maxfps: float = 0.0, track_every: int = 0):
+        self.camera = camera
+        self.detector = detector
+        self.min_dt = 1.0 / maxfps if maxfps and maxfps > 0 else 0.0    # detector runs only
+        self.track_every = int(track_every)
+        self.tracker = BoxTracker() if self.track_every > 1 else None
+        self.cond = threading.Condition()
+        self.result: Optional[DetectionResult] = None
+        self.stats = {"frames": 0, "infer_s": 0.0, "latency_s": 0.0, "tracked": 0, "track_s": 0.0}
+        self._run = False
+        self._thread: Optional[threading.Thread] = None
+
+    @classmethod
+    def from_cfg(cls, camera, cfg: dict) -> "DetectionSystem":
+        det = OnnxDetector(
+            cfg["model"],
+            imgsz=int(cfg.get("imgsz", 640)),
+            conf=float(cfg.get("conf", 0.25)),
+            iou=float(cfg.get("iou", 0.45)),
+            backend=str(cfg.get("backend", "auto")),
+            threads=int(cfg.get("threads", 2)),
+        )
+        return cls(camera, det, maxfps=float(cfg.get("maxfps", 0.0)), track_every=int(cfg.get("track_every", 0)))
+
+    # ---------- Lifecycle ----------
+    def start(self) -> "DetectionSystem":
+        if self._thread is None or not self._thread.is_alive():
+            self._run = True
+            self._thread = threading.Thread(target=self._loop, name="detection", daemon=True)
+            self._thread.start()
+            mode = f", tracking between every {self.track_every} frames" if self.tracker is not None else ""
+            print(f"[INFO] Detection running ({self.detector.backend}, imgsz {self.detector.imgsz}{mode})")
+        return self
+
+    def stop(self) -> None:
+        self._run = False
+        with self.cond:
+            self.cond.notify_all()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+            self._thread = None
+
+    # ---------- Results ----------
+    def latest(self) -> Optional[DetectionResult]:
+        with self.cond:
+            return self.result
+
+    def wait_newer(self, seq: int = -1, timeout: float = 1.0) -> Optional[DetectionResult]:
+        """Block until a result for a frame newer than seq exists (or timeout)."""
+        with self.cond:
+            self.cond.wait_for(lambda: (self.result is not None and self.result.seq > seq) or not self._run, timeout)
+            return self.result
+
+    def publish(self, result: DetectionResult) -> None:
+        with self.cond:
+            self.result = result
+            self.cond.notify_all()
+
+    def summary(self) -> str:
+        n = self.stats["frames"]
+        if not n:
+            return "[INFO] Detection: no frames"
+        text = (f"[INFO] Detection: {n} frames, {1000.0 * self.stats['infer_s'] / n:.0f} ms inference, "
+                f"{1000.0 * self.stats['latency_s'] / n:.0f} ms capture-to-boxes")
+        k = self.stats["tracked"]
+        if k:
+            text += f"; {k} tracked frames, {1000.0 * self.stats['track_s'] / k:.1f} ms each"
+        return text
+
+    # ---------- Worker ----------
+    def _loop(self) -> None:
+        seq = -1
+        last = 0.0
+        tracker = self.tracker
+        gray = None
+        while self._run:
+            if tracker is None:
+                delay = last + self.min_dt - time.time()
+                if delay > 0:
+                    time.sleep(delay)
+            ref = self.camera.get(after=seq)
+            if ref is None or ref.seq == seq:
+                if ref is not None:
+                    ref.release()
+                continue
+            seq, t_frame = ref.seq, ref.t
+            detect = tracker is None or (tracker.due(self.track_every) and time.time() >= last + self.min_dt)
+            try:
+                img = ref.pixels()
+                if img is None:
+                    continue
+                # copy what the detector/tracker needs into their own buffers, then give the camera slot back
+                if tracker is not None:
+                    gray = tracker.prepare(img)
+                if detect:
+                    self.detector.prepare(img)
+                h, w = img.shape[:2]
+            finally:
+                ref.release()
+            t0 = time.time()
+            if not detect:
+                dets = tracker.update(gray)
+                now = time.time()
+                self.stats["tracked"] += 1
+                self.stats["track_s"] += now - t0
+                self.publish(DetectionResult(seq, t_frame, now, w, h, dets, tracked=True))
+                continue
+            last = t0
+            try:
+                dets = self.detector.infer()
+            except Exception as exc:
+                print(f"[WARN] Detection failed: {exc}")
+                continue
+            now = time.time()
+            if tracker is not None:
+                tracker.reset(gray, dets)
+            self.stats["frames"] += 1
+            self.stats["infer_s"] += now - t0
+            self.stats["latency_s"] += now - t_frame
+            self.publish(DetectionResult(seq, t_frame, now, w, h, dets))
+
+
+__all__ = ["DetectionSystem", "DetectionResult"]
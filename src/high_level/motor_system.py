@@ -4,55 +4,116 @@
 # Author: Daniel Würmli
 
 from ..low_level.motor_controller import MotorController
+from ..low_level.wheel_calibration import WheelSpeedTable
+from .velocity_profile import BaseVelocityProfile
 import time
 
+# Per-call register ramp used when the velocity profile shapes the motion instead
+UNRAMPED_STEP = 255
+
 
 class MotorSystem:
-    def __init__(self, ramp_step=3, g_vy=0.25):
-        self._ll = MotorController(ramp_step=ramp_step, g_vy=g_vy)
+    def __init__(self, ramp_step=3, g_vy=0.25, speed_table_file=None, profile_cfg=None, controller=None, clock=None):
+        """
+        controller is a factory with MotorController's signature that replaces the
+        I2C controller (the simulator passes its own);
+        clock provides sleep() for the short settle waits (defaults to the time module).
+        """
+        self._clock = clock if clock is not None else time
+        table = WheelSpeedTable.load(speed_table_file) if speed_table_file else None
+        if table is not None:
+            print(f"[INFO] Wheel speed calibration loaded: {speed_table_file}")
+
+        profile_cfg = profile_cfg if isinstance(profile_cfg, dict) else {}
+        use_profile = bool(profile_cfg.get("enabled", False))
+        self._stop_timeout_s = float(profile_cfg.get("stop_timeout_s", 1.0))
+        ll_cls = controller if controller is not None else MotorController
+        self._ll = ll_cls(ramp_step=UNRAMPED_STEP if use_profile else ramp_step,
+                          g_vy=g_vy, speed_table=table)
+        self._profile = None
+        if use_profile:
+            self._profile = BaseVelocityProfile.from_cfg(self._ll, profile_cfg)
+            self._profile.start()
+
+    @property
+    def speed_calibrated(self) -> bool:
+        return self._ll.speed_table is not None
+
+    @property
+    def profiled(self) -> bool:
+        return self._profile is not None
+
+    def _command(self, forward_mm_s=0.0, strafe_pulses=0, yaw_pulses=0, immediate=False):
+        if self._profile is not None:
+            self._profile.set_target(float(forward_mm_s), int(strafe_pulses), int(yaw_pulses), immediate=immediate)
+            return
+        base = self._ll.base_mag_from_speed(forward_mm_s)
+        self._ll.command(base_fwd=base, strafe=int(strafe_pulses), yaw=int(yaw_pulses))
 
     # --------- Driving APIs ----------
     def drive(self, forward_mm_s: float = 0.0, yaw_pulses: int = 0):
         """Drive forward while applying yaw (no strafe)."""
-        base = self._ll.base_mag_from_speed(forward_mm_s)
-        self._ll.command(base_fwd=base, strafe=0, yaw=int(yaw_pulses))
+        self._command(forward_mm_s, 0, yaw_pulses)
 
     def drive_full(self, forward_mm_s: float = 0.0, strafe_pulses: int = 0, yaw_pulses: int = 0):
         """Full control over forward, strafe, and yaw simultaneously."""
-        base = self._ll.base_mag_from_speed(forward_mm_s)
-        self._ll.command(base_fwd=base, strafe=int(strafe_pulses), yaw=int(yaw_pulses))
+        self._command(forward_mm_s, strafe_pulses, yaw_pulses)
 
     def drive_forward(self, speed_mm_s: float):
         self.drive(forward_mm_s=speed_mm_s, yaw_pulses=0)
 
     def rotate_left(self, yaw_pulses=12):
-        self._ll.command(base_fwd=0, strafe=0, yaw=+abs(int(yaw_pulses)))
+        self._command(0.0, 0, +abs(int(yaw_pulses)))
 
     def rotate_right(self, yaw_pulses=12):
-        self._ll.command(base_fwd=0, strafe=0, yaw=-abs(int(yaw_pulses)))
+        self._command(0.0, 0, -abs(int(yaw_pulses)))
 
     def strafe_left(self, mag: int):
         """Strafe to the left. Swap the sign here if the direction is inverted."""
-        self._ll.command(base_fwd=0, strafe=+abs(int(mag)), yaw=0)
+        self._command(0.0, +abs(int(mag)), 0)
 
     def strafe_right(self, mag: int):
         """Strafe to the right."""
-        self._ll.command(base_fwd=0, strafe=-abs(int(mag)), yaw=0)
+        self._command(0.0, -abs(int(mag)), 0)
+
+    def drive_wheels(self, registers):
+        """Raw per-wheel registers [M1..M4]; used by the wheel calibration sweep."""
+        if self._profile is not None:
+            self._profile.reset()
+        self._ll.write_raw(registers)
 
     # --- Calibrated rotation / braking helpers ---
     def yaw_spin(self, yaw_pulses: int):
         """Pure yaw rotation (no forward motion). Positive = left, negative = right."""
-        self._ll.command(base_fwd=0, strafe=0, yaw=int(yaw_pulses))
+        self._command(0.0, 0, yaw_pulses)
 
     def brake_yaw(self, opposite_pulses=8, duration=0.06):
         """Apply a short counter impulse to reduce inertia."""
+        # The impulse is only useful if it lands at once, so it bypasses the profile.
         if opposite_pulses > 0:
-            self.rotate_right(opposite_pulses)
+            self._command(0.0, 0, -abs(int(opposite_pulses)), immediate=True)
         elif opposite_pulses < 0:
-            self.rotate_left(abs(opposite_pulses))
-        time.sleep(max(0.0, float(duration)))
+            self._command(0.0, 0, +abs(int(opposite_pulses)), immediate=True)
+        self._clock.sleep(max(0.0, float(duration)))
         self.stop()
 
     def stop(self):
+        """Bring the base to rest; with a profile the stop follows the decel limits."""
+        if self._profile is not None:
+            self._profile.set_target(0.0, 0.0, 0.0)
+            if not self._profile.wait_idle(self._stop_timeout_s):
+                print("[WARN] Velocity profile did not settle before stop timeout")
+            self._profile.reset()
         self._ll.stop_all()
-        time.sleep(0.02)
+        self._clock.sleep(0.02)
+
+    def halt(self):
+        """Immediate stop without deceleration (emergency / shutdown)."""
+        if self._profile is not None:
+            self._profile.reset()
+        self._ll.stop_all()
+
+    def close(self):
+        if self._profile is not None:
+            self._profile.close()
+            self._profile = None
@@ -5,6 +5,8 @@
 
 import time, json, os, math
 
+from ..utils import timeline
+
 GREEN  = "\033[92m"
 RED    = "\033[91m"
 YELLOW = "\033[93m"
@@ -15,13 +17,16 @@ def _clamp(x, lo, hi):
     return lo if x < lo else (hi if x > hi else x)
 
 class NavigationSystem:
-    def __init__(self, motor_sys, lidar_sys, cfg: dict):
+    def __init__(self, motor_sys, lidar_sys, cfg: dict, clock=None):
         """
         All values are sourced from cfg; missing required keys raise ValueError.
+        clock provides time()/sleep() (defaults to the time module; the
+        simulator passes its virtual clock).
         """
         self.motors = motor_sys
         self.lidar  = lidar_sys
         self.cfg    = cfg or {}
+        self._clock = clock if clock is not None else time
 
         def need(key):
             if key not in self.cfg:
@@ -96,8 +101,70 @@ class NavigationSystem:
         self.channel_strafe_stall_limit   = int(self.cfg.get("channel_strafe_stall_limit", 4))
         self.channel_strafe_improve_tol_mm = float(self.cfg.get("channel_strafe_improve_tol_mm", 3.0))
 
+    # ---------- Step execution ----------
+    # Every primitive exists twice: `<name>_steps()` is a generator that yields
+    # the delay (seconds) it wants before being resumed and returns its outcome;
+    # `<name>()` drives that generator to completion with blocking sleeps.
+    # Route machines (run_route) drive the generators from a single loop.
+    def _drive_steps(self, steps, deadline=None):
+        """Run a step generator; returns (outcome, timed_out)."""
+        while True:
+            try:
+                delay = next(steps)
+            except StopIteration as done:
+                return done.value, False
+            now = self._clock.time()
+            if deadline is not None:
+                if now >= deadline:
+                    steps.close()
+                    return None, True
+                delay = min(delay or 0.0, deadline - now)
+            if delay and delay > 0:
+                self._clock.sleep(delay)
+
+    def _run_steps(self, steps):
+        name = getattr(steps, "__name__", "steps").lstrip("_")
+        if name.endswith("_steps"):
+            name = name[:-len("_steps")]
+        with timeline.span("nav", name) as span:
+            outcome = self._drive_steps(steps)[0]
+            span.outcome = outcome
+        return outcome
+
+    def wait_steps(self, seconds):
+        t_end = self._clock.time() + float(seconds)
+        while True:
+            remaining = t_end - self._clock.time()
+            if remaining <= 0:
+                return "done"
+            yield remaining
+
+    def run_route(self, machine, context=None):
+        """
+        Execute a compiled RouteMachine in one loop. Each state's step generator
+        is resumed until it returns an outcome; the outcome selects the next
+        state immediately, so no fixed gaps are inserted between steps.
+        """
+        name = machine.start
+        outcome = None
+        print(YELLOW + f"[ROUTE] {machine.name} start @ {name}" + RESET)
+        while name is not None:
+            state = machine.states[name]
+            print(BLUE + f"[ROUTE] -> {name} ({state.action})" + RESET)
+            deadline = (self._clock.time() + state.timeout_s) if state.timeout_s else None
+            with timeline.span("route", name, action=state.action) as span:
+                outcome, timed_out = self._drive_steps(state.build(self, context), deadline)
+                if timed_out:
+                    print(RED + f"[ROUTE] {name} timed out after {state.timeout_s:.1f}s" + RESET)
+                    self.hard_zero()
+                    outcome = "timeout"
+                span.outcome = outcome
+            name = machine.next_state(name, outcome)
+        print(GREEN + f"[ROUTE] {machine.name} finished ({outcome})" + RESET)
+        return outcome
+
     # ---------- Utility ----------
-    def hard_zero(self, repeats=5, sleep_s=0.05):
+    def hard_zero_steps(self, repeats=5, sleep_s=0.05):
         for _ in range(int(repeats)):
             try:
                 if hasattr(self.motors, "drive_full"):
@@ -106,13 +173,23 @@ class NavigationSystem:
                     self.motors.drive(forward_mm_s=0.0, yaw_pulses=0)
             except Exception:
                 pass
-            time.sleep(sleep_s)
+            yield sleep_s
         try:
             self.motors.stop()
         except Exception:
             pass
+        return "done"
+
+    def hard_zero(self, repeats=5, sleep_s=0.05):
+        self._run_steps(self.hard_zero_steps(repeats, sleep_s))
 
     def shutdown(self):
+        # Emergency/exit path: drop the velocity profile at once instead of decelerating
+        if hasattr(self.motors, "halt"):
+            try:
+                self.motors.halt()
+            except Exception:
+                pass
         self.hard_zero()
 
     @staticmethod
@@ -201,18 +278,21 @@ class NavigationSystem:
 
     # ---------- FOLLOW LEFT until front stop ----------
     def follow_left_until_stop(self):
+        self._run_steps(self.follow_left_until_stop_steps())
+
+    def follow_left_until_stop_steps(self):
         print(YELLOW + "[MODE] follow LEFT wall then STOP at front" + RESET)
         while True:
             df = self.read_front_mm()
             dl = self.read_left_mm()
             if df is None or dl is None:
                 print(RED + "[WARN] LiDAR returned no values" + RESET)
-                time.sleep(0.05); continue
+                yield 0.05; continue
 
             if df <= self.front_stop:
                 print(RED + f"[STOP] front {df:.0f}mm <= {self.front_stop:.0f}mm" + RESET)
-                self.motors.stop(); self.hard_zero()
-                return
+                self.motors.stop(); yield from self.hard_zero_steps()
+                return "front_stop"
 
             err = dl - self.left_target
             yaw = _clamp(self._yaw_from_error_left(err) + self._yaw_from_orientation_left(),
@@ -227,22 +307,25 @@ class NavigationSystem:
                 self.motors.drive(forward_mm_s=fwd, yaw_pulses=yaw)
             else:
                 self.motors.drive_full(forward_mm_s=fwd, strafe_pulses=0, yaw_pulses=yaw)
-            time.sleep(0.05)
+            yield 0.05
 
     # ---------- FOLLOW RIGHT until front stop ----------
     def follow_right_until_stop(self):
+        self._run_steps(self.follow_right_until_stop_steps())
+
+    def follow_right_until_stop_steps(self):
         print(YELLOW + "[MODE] follow RIGHT wall then STOP at front" + RESET)
         while True:
             df = self.read_front_mm()
             dr = self.read_right_mm()
             if df is None or dr is None:
                 print(RED + "[WARN] LiDAR returned no values" + RESET)
-                time.sleep(0.05); continue
+                yield 0.05; continue
 
             if df <= self.front_stop:
                 print(RED + f"[STOP] front {df:.0f}mm <= {self.front_stop:.0f}mm" + RESET)
-                self.motors.stop(); self.hard_zero()
-                return
+                self.motors.stop(); yield from self.hard_zero_steps()
+                return "front_stop"
 
             err = dr - self.left_target
             yaw = _clamp(self._yaw_from_error_right(err) + self._yaw_from_orientation_right(),
@@ -257,11 +340,16 @@ class NavigationSystem:
                 self.motors.drive(forward_mm_s=fwd, yaw_pulses=yaw)
             else:
                 self.motors.drive_full(forward_mm_s=fwd, strafe_pulses=0, yaw_pulses=yaw)
-            time.sleep(0.05)
+            yield 0.05
 
     # ---------- LEFT until right-open OR front-stop (with optional re-arm) ----------
     def follow_left_until_right_open_or_front(self, right_open_mm=None,
                                               require_rearm=None, rearm_below_mm=None):
+        return self._run_steps(self.follow_left_until_right_open_or_front_steps(
+            right_open_mm=right_open_mm, require_rearm=require_rearm, rearm_below_mm=rearm_below_mm))
+
+    def follow_left_until_right_open_or_front_steps(self, right_open_mm=None,
+                                                    require_rearm=None, rearm_below_mm=None):
         right_open_mm = float(right_open_mm if right_open_mm is not None else self.right_open_mm)
         if require_rearm is None:
             require_rearm = bool(self.right_open_require_rearm)
@@ -278,11 +366,11 @@ class NavigationSystem:
             dr = self.read_right_mm()
             if df is None or dl is None or dr is None:
                 print(RED + "[WARN] LiDAR returned no values" + RESET)
-                time.sleep(0.05); continue
+                yield 0.05; continue
 
             if df <= self.front_stop:
                 print(RED + f"[EVENT] FRONT STOP @ {df:.0f}mm" + RESET)
-                self.motors.stop(); self.hard_zero()
+                self.motors.stop(); yield from self.hard_zero_steps()
                 return "front_stop"
 
             if not armed and dr < rearm_below_mm:
@@ -304,10 +392,13 @@ class NavigationSystem:
                 self.motors.drive(forward_mm_s=fwd, yaw_pulses=yaw)
             else:
                 self.motors.drive_full(forward_mm_s=fwd, strafe_pulses=0, yaw_pulses=yaw)
-            time.sleep(0.05)
+            yield 0.05
 
     # ---------- CENTERED forward until front-threshold ----------
     def centered_forward_until_front(self, front_thresh_mm=540.0):
+        self._run_steps(self.centered_forward_until_front_steps(front_thresh_mm))
+
+    def centered_forward_until_front_steps(self, front_thresh_mm=540.0):
         print(YELLOW + f"[MODE] CENTERED driving (front stop @ {front_thresh_mm:.0f}mm)" + RESET)
         Kp_center = self.Kp_center
         while True:
@@ -316,12 +407,12 @@ class NavigationSystem:
             dr = self.read_right_mm()
             if df is None or dl is None or dr is None:
                 print(RED + "[WARN] LiDAR returned no values" + RESET)
-                time.sleep(0.05); continue
+                yield 0.05; continue
 
             if df <= front_thresh_mm:
                 print(RED + f"[STOP] front {df:.0f}mm <= {front_thresh_mm:.0f}mm" + RESET)
-                self.motors.stop(); self.hard_zero()
-                return
+                self.motors.stop(); yield from self.hard_zero_steps()
+                return "front_stop"
 
             diff = dl - dr
             yaw  = int(_clamp(diff * Kp_center, -self.MAX_YAW, self.MAX_YAW))
@@ -333,7 +424,7 @@ class NavigationSystem:
                 self.motors.drive(forward_mm_s=fwd, yaw_pulses=yaw)
             else:
                 self.motors.drive_full(forward_mm_s=fwd, strafe_pulses=0, yaw_pulses=yaw)
-            time.sleep(0.05)
+            yield 0.05
 
     def _collect_channel_stats(self, expect_front_wall=True):
         pts = self.lidar.get_points()
@@ -414,7 +505,7 @@ class NavigationSystem:
             "right_points": len(right_pts),
         }
 
-    def _strafe_adjust(self, error_mm):
+    def _strafe_adjust_steps(self, error_mm):
         if error_mm is None:
             return False
         sign = 1 if error_mm > 0 else -1
@@ -440,11 +531,11 @@ class NavigationSystem:
                 self.motors.strafe_right(pulse)
             else:
                 self.motors.drive_full(0.0, strafe_pulses=-pulse, yaw_pulses=0)
-        time.sleep(duration)
-        self.hard_zero()
+        yield duration
+        yield from self.hard_zero_steps()
         return True
 
-    def _rotate_adjust(self, error_deg):
+    def _rotate_adjust_steps(self, error_deg):
         if error_deg is None:
             return False
         sign = 1 if error_deg > 0 else -1
@@ -458,14 +549,14 @@ class NavigationSystem:
             step = magnitude
         if step < self.channel_rotation_min_deg:
             return False
-        if sign > 0:
-            self.rotate_left_deg(step)
-        else:
-            self.rotate_right_deg(step)
-        time.sleep(0.1)
+        yield from self._rotate_signed_steps(target_deg=step, left_positive=sign > 0)
+        yield 0.1
         return True
 
     def align_storage_channel(self, expect_front_wall=True):
+        return self._run_steps(self.align_storage_channel_steps(expect_front_wall=expect_front_wall))
+
+    def align_storage_channel_steps(self, expect_front_wall=True):
         print(YELLOW + "[ALIGN] Storage channel centering" + RESET)
         success = False
         orientation_valid_streak = 0
@@ -513,7 +604,7 @@ class NavigationSystem:
                         orientation_stall = self.channel_orientation_stall_limit
                     elif (orientation_attempts < self.channel_orientation_max_steps and
                           orientation_stall < self.channel_orientation_stall_limit):
-                        if self._rotate_adjust(orientation_error):
+                        if (yield from self._rotate_adjust_steps(orientation_error)):
                             orientation_attempts += 1
                             orientation_sign_last = rotate_sign
                             acted = True
@@ -562,7 +653,7 @@ class NavigationSystem:
                             strafe_flip_attempted = True
                         else:
                             strafe_flip_attempted = False
-                        if self._strafe_adjust(target_value):
+                        if (yield from self._strafe_adjust_steps(target_value)):
                             strafe_attempts += 1
                             strafe_last_sign = sign
                             acted = True
@@ -602,27 +693,30 @@ class NavigationSystem:
             print(GREEN + "[ALIGN] Channel alignment complete" + RESET)
         else:
             print(RED + "[WARN] Channel alignment incomplete" + RESET)
-        self.hard_zero()
+        yield from self.hard_zero_steps()
         return success
 
     def straight_forward_until_front(self, front_thresh_mm=540.0):
+        self._run_steps(self.straight_forward_until_front_steps(front_thresh_mm))
+
+    def straight_forward_until_front_steps(self, front_thresh_mm=540.0):
         print(YELLOW + f"[MODE] STRAIGHT driving (front stop @ {front_thresh_mm:.0f}mm)" + RESET)
         while True:
             df = self.read_front_mm()
             if df is None:
                 print(RED + "[WARN] LiDAR returned no front distance" + RESET)
-                time.sleep(0.05)
+                yield 0.05
                 continue
             if df <= front_thresh_mm:
                 print(RED + f"[STOP] front {df:.0f}mm <= {front_thresh_mm:.0f}mm" + RESET)
                 self.motors.stop()
-                self.hard_zero()
-                return
+                yield from self.hard_zero_steps()
+                return "front_stop"
             if hasattr(self.motors, "drive"):
                 self.motors.drive(forward_mm_s=self.forward, yaw_pulses=0)
             else:
                 self.motors.drive_full(forward_mm_s=self.forward, strafe_pulses=0, yaw_pulses=0)
-            time.sleep(0.05)
+            yield 0.05
 
     def channel_align_and_forward(self, front_thresh_mm=540.0, expect_front_wall=True):
         self.align_storage_channel(expect_front_wall=expect_front_wall)
@@ -630,19 +724,25 @@ class NavigationSystem:
 
     def move_to_front_distance(self, target_mm, tolerance_mm=15.0, max_iters=80, speed_mm_s=None,
                                maintain_center=False, expect_front_wall=True):
+        return self._run_steps(self.move_to_front_distance_steps(
+            target_mm, tolerance_mm=tolerance_mm, max_iters=max_iters, speed_mm_s=speed_mm_s,
+            maintain_center=maintain_center, expect_front_wall=expect_front_wall))
+
+    def move_to_front_distance_steps(self, target_mm, tolerance_mm=15.0, max_iters=80, speed_mm_s=None,
+                                     maintain_center=False, expect_front_wall=True):
         target_mm = float(target_mm)
         tolerance_mm = max(1.0, float(tolerance_mm))
         base_speed = abs(float(speed_mm_s)) if speed_mm_s is not None else abs(self.forward)
         print(YELLOW + f"[ALIGN] Adjusting front distance to {target_mm:.0f}±{tolerance_mm:.0f}mm" + RESET)
         if maintain_center:
-            self.align_storage_channel(expect_front_wall=expect_front_wall)
+            yield from self.align_storage_channel_steps(expect_front_wall=expect_front_wall)
         val = None
         error = None
         for _ in range(int(max_iters)):
             val = self.read_front_mm()
             if val is None:
                 print(RED + "[WARN] LiDAR returned no front distance during adjustment" + RESET)
-                time.sleep(0.1)
+                yield 0.1
                 continue
             error = val - target_mm
             if abs(error) <= tolerance_mm:
@@ -660,16 +760,16 @@ class NavigationSystem:
                     self.motors.drive(forward_mm_s=-move_speed, yaw_pulses=0)
                 else:
                     self.motors.drive_full(forward_mm_s=-move_speed, strafe_pulses=0, yaw_pulses=0)
-            time.sleep(duration)
-            self.hard_zero()
+            yield duration
+            yield from self.hard_zero_steps()
             if maintain_center:
-                self.align_storage_channel(expect_front_wall=expect_front_wall)
+                yield from self.align_storage_channel_steps(expect_front_wall=expect_front_wall)
         else:
             print(RED + "[WARN] Front distance coarse adjustment did not converge" + RESET)
             return False
 
-        self.hard_zero()
-        time.sleep(0.08)
+        yield from self.hard_zero_steps()
+        yield 0.08
         val = self.read_front_mm()
         if val is not None and abs(val - target_mm) <= tolerance_mm:
             print(GREEN + f"[ALIGN] Front distance reached ({val:.0f}mm)" + RESET)
@@ -679,11 +779,11 @@ class NavigationSystem:
         for _ in range(16):
             val = self.read_front_mm()
             if val is None:
-                time.sleep(0.1)
+                yield 0.1
                 continue
             error = val - target_mm
             if abs(error) <= tolerance_mm:
-                self.hard_zero()
+                yield from self.hard_zero_steps()
                 print(GREEN + f"[ALIGN] Front distance reached ({val:.0f}mm)" + RESET)
                 return True
             move_speed = base_speed
@@ -698,19 +798,22 @@ class NavigationSystem:
                     self.motors.drive(forward_mm_s=-move_speed, yaw_pulses=0)
                 else:
                     self.motors.drive_full(forward_mm_s=-move_speed, strafe_pulses=0, yaw_pulses=0)
-            time.sleep(duration)
-            self.hard_zero()
-            time.sleep(0.05)
+            yield duration
+            yield from self.hard_zero_steps()
+            yield 0.05
             if maintain_center:
-                self.align_storage_channel(expect_front_wall=expect_front_wall)
+                yield from self.align_storage_channel_steps(expect_front_wall=expect_front_wall)
 
         print(RED + f"[WARN] Front distance adjustment incomplete (last error={error:.0f}mm)" + RESET)
         return False
 
     def wait_for_valid_scan(self, axes=("front",), timeout_s=1.0) -> bool:
         """Block until requested LiDAR axes report values or the timeout elapses."""
-        deadline = time.time() + float(timeout_s)
-        while time.time() < deadline:
+        return self._run_steps(self.wait_for_valid_scan_steps(axes, timeout_s))
+
+    def wait_for_valid_scan_steps(self, axes=("front",), timeout_s=1.0):
+        deadline = self._clock.time() + float(timeout_s)
+        while self._clock.time() < deadline:
             ok = True
             for axis in axes:
                 if axis == "front":
@@ -725,20 +828,24 @@ class NavigationSystem:
                     break
             if ok:
                 return True
-            time.sleep(0.05)
+            yield 0.05
         return False
 
     # ---------- Timed forward ----------
     def timed_forward(self, seconds):
+        self._run_steps(self.timed_forward_steps(seconds))
+
+    def timed_forward_steps(self, seconds):
         print(BLUE + f"[FORWARD] timed {seconds:.2f}s" + RESET)
-        t_end = time.time() + float(seconds)
-        while time.time() < t_end:
+        t_end = self._clock.time() + float(seconds)
+        while self._clock.time() < t_end:
             if hasattr(self.motors, "drive"):
                 self.motors.drive(forward_mm_s=self.forward, yaw_pulses=0)
             else:
                 self.motors.drive_full(forward_mm_s=self.forward, strafe_pulses=0, yaw_pulses=0)
-            time.sleep(0.05)
-        self.motors.stop(); self.hard_zero()
+            yield 0.05
+        self.motors.stop(); yield from self.hard_zero_steps()
+        return "done"
 
     # ---------- Turns ----------
     def _load_turn_json(self):
@@ -751,6 +858,12 @@ class NavigationSystem:
             return None
 
     def _rotate_signed(self, target_deg=90.0, left_positive=True):
+        self._run_steps(self._rotate_signed_steps(target_deg=target_deg, left_positive=left_positive))
+
+    def rotate_steps(self, deg, left=True):
+        return self._rotate_signed_steps(target_deg=deg, left_positive=left)
+
+    def _rotate_signed_steps(self, target_deg=90.0, left_positive=True):
         # Rotation speed may come from calibration JSON; otherwise fall back to pulse/time heuristics.
         data = self._load_turn_json()
         dps_fast = dps_slow = None
@@ -818,22 +931,22 @@ class NavigationSystem:
         print(YELLOW + f"[TURN] {'LEFT' if left_positive else 'RIGHT'} {target_deg:.1f}° (eff={target_eff:.1f}°)" + RESET)
 
         # FAST
-        t_end = time.time() + t_fast
-        while time.time() < t_end:
+        t_end = self._clock.time() + t_fast
+        while self._clock.time() < t_end:
             if hasattr(self.motors, "yaw_spin"):
                 self.motors.yaw_spin(yaw_fast)
             else:
                 self.motors.drive_full(0.0, 0, yaw_fast)
-            time.sleep(0.01)
+            yield 0.01
 
         # SLOW
-        t_end = time.time() + t_slow
-        while time.time() < t_end:
+        t_end = self._clock.time() + t_slow
+        while self._clock.time() < t_end:
             if hasattr(self.motors, "yaw_spin"):
                 self.motors.yaw_spin(yaw_slow)
             else:
                 self.motors.drive_full(0.0, 0, yaw_slow)
-            time.sleep(0.01)
+            yield 0.01
 
         # Counter braking
         if self.brake_opp != 0 and self.brake_time > 0:
@@ -841,9 +954,10 @@ class NavigationSystem:
                 self.motors.brake_yaw(opposite_pulses=brake_opp, duration=self.brake_time)
             else:
                 self.motors.drive_full(0.0, 0, brake_opp)
-                time.sleep(self.brake_time)
+                yield self.brake_time
 
-        self.hard_zero()
+        yield from self.hard_zero_steps()
+        return "done"
 
     def rotate_left_deg(self, deg):  self._rotate_signed(target_deg=deg, left_positive=True)
     def rotate_right_deg(self, deg): self._rotate_signed(target_deg=deg, left_positive=False)
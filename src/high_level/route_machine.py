@@ -0,0 +1,303 @@
+#!/usr/bin/env python3
+# route_machine.py
+# Declarative route files compiled into state machines for NavigationSystem.
+# Author: Daniel Würmli
+
+"""
+Declarative routes.
+
+A route file (JSON, or YAML when PyYAML is installed) names a start state and
+a mapping of states. Each state runs one action and picks its successor from
+the action's outcome:
+
+    {
+      "name": "follow_route",
+      "start": "scan",
+      "states": {
+        "scan": {"action": "follow_left_until",
+                 "args": {"until": "right_open_or_front", "right_open_mm": "$right_open_mm"},
+                 "next": {"front_stop": "go_home", "right_open": "enter_aisle"}},
+        "enter_aisle": {"action": "rotate", "args": {"direction": "right", "deg": 90}, "next": "..."}
+      }
+    }
+
+`next` is either a state name (any outcome) or an outcome→state mapping; a
+state without a successor ends the route. `timeout_s` aborts a state with the
+outcome "timeout". String arguments of the form "$key" or "$key:default" are
+read from the robot configuration at compile time; a default may itself be a
+"$key" reference or a JSON literal.
+"""
+
+import inspect
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional
+
+try:
+    import yaml  # type: ignore
+except Exception:  # pragma: no cover - PyYAML is optional
+    yaml = None
+
+ROUTES_DIR = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "utils", "routes"))
+
+
+class RouteError(ValueError):
+    """Raised when a route file is malformed or references unknown actions/states."""
+
+
+class RouteContext:
+    """
+    Resources a route may use besides the NavigationSystem.
+    arm_runner(module) runs one arm mode to completion (blocking); the
+    arm_task action calls it from a worker thread.
+    """
+
+    def __init__(self, cfg: dict = None, buzzer=None, drv=None, arm_runner: Callable = None):
+        self.cfg = cfg or {}
+        self.buzzer = buzzer
+        self.drv = drv
+        self.arm_runner = arm_runner
+
+
+# ---------- Actions ----------
+# Each action receives (nav, ctx, **args) and returns a step generator whose
+# return value is the outcome string used to select the next state.
+
+def _outcome(steps, mapping):
+    result = yield from steps
+    return mapping.get(result, result)
+
+
+def _follow_left_until(nav, ctx, until="front", right_open_mm=None, require_rearm=None, rearm_below_mm=None):
+    if until == "front":
+        return nav.follow_left_until_stop_steps()
+    if until == "right_open_or_front":
+        return nav.follow_left_until_right_open_or_front_steps(
+            right_open_mm=right_open_mm, require_rearm=require_rearm, rearm_below_mm=rearm_below_mm)
+    raise RouteError(f"follow_left_until: unknown condition '{until}'")
+
+
+def _follow_right_until(nav, ctx, until="front"):
+    if until != "front":
+        raise RouteError(f"follow_right_until: unknown condition '{until}'")
+    return nav.follow_right_until_stop_steps()
+
+
+def _rotate(nav, ctx, deg, direction="left"):
+    if direction not in ("left", "right"):
+        raise RouteError(f"rotate: direction must be 'left' or 'right', got '{direction}'")
+    return nav.rotate_steps(float(deg), left=(direction == "left"))
+
+
+def _centered_forward(nav, ctx, front_mm):
+    return nav.centered_forward_until_front_steps(front_thresh_mm=float(front_mm))
+
+
+def _straight_forward(nav, ctx, front_mm):
+    return nav.straight_forward_until_front_steps(front_thresh_mm=float(front_mm))
+
+
+def _timed_forward(nav, ctx, seconds):
+    return nav.timed_forward_steps(float(seconds))
+
+
+def _align_channel(nav, ctx, expect_front_wall=True):
+    steps = nav.align_storage_channel_steps(expect_front_wall=bool(expect_front_wall))
+    return _outcome(steps, {True: "aligned", False: "incomplete"})
+
+
+def _move_to_front(nav, ctx, target_mm, tolerance_mm=15.0, maintain_center=False, expect_front_wall=True):
+    steps = nav.move_to_front_distance_steps(
+        float(target_mm), tolerance_mm=float(tolerance_mm),
+        maintain_center=bool(maintain_center), expect_front_wall=bool(expect_front_wall))
+    return _outcome(steps, {True: "reached", False: "failed"})
+
+
+def _wait_scan(nav, ctx, axes=("front",), timeout_s=0.5, warn=None):
+    def _steps():
+        ok = yield from nav.wait_for_valid_scan_steps(tuple(axes), timeout_s=float(timeout_s))
+        if not ok and warn:
+            print(f"[WARN] {warn}")
+        return "valid" if ok else "timeout"
+    return _steps()
+
+
+def _hard_zero(nav, ctx):
+    return nav.hard_zero_steps()
+
+
+def _stop_lidar(nav, ctx):
+    def _steps():
+        try:
+            if ctx is not None and ctx.drv is not None:
+                ctx.drv.stop()
+        except Exception:
+            pass
+        return "done"
+        yield  # pragma: no cover - makes this a generator
+    return _steps()
+
+
+def _buzzer(nav, ctx, seconds=0.2):
+    def _steps():
+        buzzer = ctx.buzzer if ctx is not None else None
+        if buzzer is None:
+            return "skipped"
+        buzzer.on()
+        try:
+            yield from nav.wait_steps(float(seconds))
+        finally:
+            buzzer.off()
+        return "done"
+    return _steps()
+
+
+def _arm_task(nav, ctx, module, poll_s=0.05):
+    """Run an arm mode in a worker thread while the route loop keeps polling."""
+    def _steps():
+        if ctx is None or ctx.arm_runner is None:
+            print(f"[WARN] arm_task '{module}' skipped: no arm available")
+            return "skipped"
+        result = {}
+
+        def _work():
+            try:
+                ctx.arm_runner(module)
+            except Exception as exc:  # surfaced to the route loop below
+                result["error"] = exc
+
+        worker = threading.Thread(target=_work, name=f"arm_task:{module}", daemon=True)
+        worker.start()
+        while worker.is_alive():
+            yield poll_s
+        if "error" in result:
+            print(f"[WARN] arm_task '{module}' failed: {result['error']}")
+            return "failed"
+        return "done"
+    return _steps()
+
+
+ACTIONS: Dict[str, Callable] = {
+    "follow_left_until": _follow_left_until,
+    "follow_right_until": _follow_right_until,
+    "rotate": _rotate,
+    "centered_forward": _centered_forward,
+    "straight_forward": _straight_forward,
+    "timed_forward": _timed_forward,
+    "align_channel": _align_channel,
+    "move_to_front": _move_to_front,
+    "wait_scan": _wait_scan,
+    "hard_zero": _hard_zero,
+    "stop_lidar": _stop_lidar,
+    "buzzer": _buzzer,
+    "arm_task": _arm_task,
+}
+
+
+# ---------- Compilation ----------
+def _resolve_value(value, cfg: dict, where: str):
+    if isinstance(value, list):
+        return [_resolve_value(v, cfg, where) for v in value]
+    if isinstance(value, dict):
+        return {k: _resolve_value(v, cfg, where) for k, v in value.items()}
+    if not (isinstance(value, str) and value.startswith("$")):
+        return value
+    key, sep, default = value[1:].partition(":")
+    if key in cfg:
+        return cfg[key]
+    if not sep:
+        raise RouteError(f"{where}: configuration key '{key}' is required but missing")
+    if default.startswith("$"):
+        return _resolve_value(default, cfg, where)
+    try:
+        return json.loads(default)
+    except ValueError:
+        return default
+
+
+class RouteState:
+    def __init__(self, name: str, action: str, args: dict, transitions, timeout_s: Optional[float]):
+        self.name = name
+        self.action = action
+        self.args = args
+        self.transitions = transitions
+        self.timeout_s = float(timeout_s) if timeout_s else None
+
+    def build(self, nav, ctx):
+        """Fresh step generator for one visit of this state."""
+        return ACTIONS[self.action](nav, ctx, **self.args)
+
+
+class RouteMachine:
+    def __init__(self, name: str, start: str, states: Dict[str, RouteState]):
+        self.name = name
+        self.start = start
+        self.states = states
+
+    @classmethod
+    def compile(cls, spec: dict, cfg: dict = None) -> "RouteMachine":
+        cfg = cfg or {}
+        if not isinstance(spec, dict) or not isinstance(spec.get("states"), dict) or not spec["states"]:
+            raise RouteError("Route needs a non-empty 'states' mapping")
+        name = str(spec.get("name", "route"))
+        start = spec.get("start") or next(iter(spec["states"]))
+
+        states: Dict[str, RouteState] = {}
+        for sname, body in spec["states"].items():
+            where = f"{name}.{sname}"
+            if not isinstance(body, dict):
+                raise RouteError(f"{where}: state must be a mapping")
+            action = body.get("action")
+            if action not in ACTIONS:
+                raise RouteError(f"{where}: unknown action '{action}'")
+            args = _resolve_value(body.get("args") or {}, cfg, where)
+            try:
+                inspect.signature(ACTIONS[action]).bind(None, None, **args)
+            except TypeError as exc:
+                raise RouteError(f"{where}: invalid arguments for '{action}': {exc}") from None
+            transitions = body.get("next")
+            if transitions is not None and not isinstance(transitions, (str, dict)):
+                raise RouteError(f"{where}: 'next' must be a state name or an outcome mapping")
+            states[sname] = RouteState(sname, action, args, transitions, body.get("timeout_s"))
+
+        targets = [start]
+        for state in states.values():
+            if isinstance(state.transitions, str):
+                targets.append(state.transitions)
+            elif isinstance(state.transitions, dict):
+                targets.extend(state.transitions.values())
+        unknown = sorted({t for t in targets if t is not None and t not in states})
+        if unknown:
+            raise RouteError(f"{name}: transitions to unknown states: {', '.join(unknown)}")
+        return cls(name, start, states)
+
+    def next_state(self, current: str, outcome) -> Optional[str]:
+        transitions = self.states[current].transitions
+        if transitions is None or isinstance(transitions, str):
+            return transitions
+        if outcome in transitions:
+            return transitions[outcome]
+        return transitions.get("*")
+
+
+def route_path(name: str) -> str:
+    """Path of a bundled route file (src/utils/routes/<name>.json)."""
+    return os.path.join(ROUTES_DIR, f"{name}.json")
+
+
+def load_route(path: str, cfg: dict = None) -> RouteMachine:
+    """Read and compile a route file."""
+    if not os.path.exists(path):
+        raise RouteError(f"Route file not found: {path}")
+    with open(path, "r") as f:
+        if path.endswith((".yaml", ".yml")):
+            if yaml is None:
+                raise RouteError("YAML route files require PyYAML (pip install pyyaml)")
+            spec = yaml.safe_load(f)
+        else:
+            spec = json.load(f)
+    return RouteMachine.compile(spec, cfg)
+
+
+__all__ = ["RouteMachine", "RouteContext", "RouteError", "ACTIONS", "load_route", "route_path"]
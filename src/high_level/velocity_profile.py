@@ -0,0 +1,188 @@
+#!/usr/bin/env python3
+# velocity_profile.py
+# Jerk- and acceleration-limited setpoint generator for the mecanum base.
+# Author: Daniel Würmli
+
+"""
+Time-based velocity profiles for the drive base.
+
+Callers set target velocities per axis (vx in mm/s, vy and ω in register
+pulses, matching MotorSystem.drive_full). A background thread advances every
+axis at a fixed rate with bounded acceleration and jerk and writes the
+resulting setpoint to the MotorController. Acceleration therefore no longer
+depends on how often the navigation loops call `command()`.
+"""
+
+import math
+import threading
+import time
+from typing import Dict, Optional
+
+AXES = ("vx", "vy", "wz")
+DEFAULT_RATE_HZ = 50.0
+EPS = 1e-3
+
+
+class AxisLimits:
+    """Per-axis bounds; a non-positive max_acc disables shaping for that axis."""
+
+    def __init__(self, max_acc: float = 0.0, max_jerk: float = 0.0):
+        self.max_acc = float(max_acc or 0.0)
+        self.max_jerk = float(max_jerk or 0.0)
+
+    @classmethod
+    def from_cfg(cls, data) -> "AxisLimits":
+        if not isinstance(data, dict):
+            return cls()
+        return cls(data.get("max_acc", 0.0), data.get("max_jerk", 0.0))
+
+    @property
+    def shaped(self) -> bool:
+        return self.max_acc > 0.0
+
+
+class JerkLimitedAxis:
+    """Online S-curve velocity tracker for a single axis."""
+
+    def __init__(self, limits: AxisLimits):
+        self.limits = limits
+        self.target = 0.0
+        self.vel = 0.0
+        self.acc = 0.0
+
+    def reset(self, value: float = 0.0) -> None:
+        self.target = self.vel = float(value)
+        self.acc = 0.0
+
+    def at_target(self) -> bool:
+        return abs(self.target - self.vel) <= EPS and abs(self.acc) <= EPS
+
+    def step(self, dt: float) -> float:
+        if not self.limits.shaped:
+            self.vel, self.acc = self.target, 0.0
+            return self.vel
+        err = self.target - self.vel
+        if abs(err) <= EPS and abs(self.acc) <= self.limits.max_jerk * dt + EPS:
+            self.vel, self.acc = self.target, 0.0
+            return self.vel
+
+        a_max = self.limits.max_acc
+        j_max = self.limits.max_jerk
+        sign = 1.0 if err > 0 else -1.0
+        if j_max > 0.0:
+            # Largest acceleration that can still be wound down to zero by the
+            # time the error closes: |e| = a^2 / (2 j)
+            a_des = sign * min(a_max, math.sqrt(2.0 * j_max * abs(err)))
+            da = a_des - self.acc
+            step = j_max * dt
+            self.acc += step if da > step else (-step if da < -step else da)
+        else:
+            self.acc = sign * a_max
+
+        self.vel += self.acc * dt
+        if (self.target - self.vel) * err <= 0.0:
+            # Crossed the target within this tick. Snapping is only jerk-safe
+            # when the remaining acceleration can be removed in one step;
+            # otherwise the next ticks wind it down and pull back the overshoot.
+            if j_max <= 0.0 or abs(self.acc) <= j_max * dt + EPS:
+                self.vel, self.acc = self.target, 0.0
+        return self.vel
+
+
+class BaseVelocityProfile:
+    """Fixed-rate setpoint generator feeding a MotorController."""
+
+    def __init__(self, controller, limits: Dict[str, AxisLimits], rate_hz: float = DEFAULT_RATE_HZ):
+        self._ll = controller
+        self._axes = {name: JerkLimitedAxis(limits.get(name, AxisLimits())) for name in AXES}
+        self._dt = 1.0 / max(1.0, float(rate_hz))
+        self._lock = threading.Lock()
+        self._idle = threading.Event()
+        self._idle.set()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._last_out = (0, 0, 0)
+
+    @classmethod
+    def from_cfg(cls, controller, cfg: dict) -> "BaseVelocityProfile":
+        limits = {name: AxisLimits.from_cfg(cfg.get(name)) for name in AXES}
+        return cls(controller, limits, rate_hz=float(cfg.get("rate_hz", DEFAULT_RATE_HZ)))
+
+    # ---------- Lifecycle ----------
+    def start(self) -> None:
+        if self._thread and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def close(self) -> None:
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=1.0)
+            self._thread = None
+
+    # ---------- Setpoints ----------
+    def set_target(self, vx: float = 0.0, vy: float = 0.0, wz: float = 0.0, immediate: bool = False) -> None:
+        """Request new axis velocities. immediate=True skips shaping (e.g. brake impulses)."""
+        with self._lock:
+            for name, value in zip(AXES, (vx, vy, wz)):
+                axis = self._axes[name]
+                if immediate:
+                    axis.reset(value)
+                else:
+                    axis.target = float(value)
+            if not self._all_idle():
+                self._idle.clear()
+            if immediate:
+                self._write()
+
+    def reset(self) -> None:
+        """Drop all velocities to zero immediately (no ramp)."""
+        with self._lock:
+            for axis in self._axes.values():
+                axis.reset(0.0)
+            self._last_out = (0, 0, 0)
+            self._idle.set()
+
+    def wait_idle(self, timeout_s: float) -> bool:
+        """Block until every axis has reached a zero target, or the timeout."""
+        return self._idle.wait(max(0.0, float(timeout_s)))
+
+    def velocities(self) -> Dict[str, float]:
+        with self._lock:
+            return {name: axis.vel for name, axis in self._axes.items()}
+
+    # ---------- Internals ----------
+    def _all_idle(self) -> bool:
+        return all(a.at_target() and a.target == 0.0 for a in self._axes.values())
+
+    def _write(self) -> None:
+        vx, vy, wz = (self._axes[n].vel for n in AXES)
+        out = (self._ll.base_mag_from_speed(vx), int(round(vy)), int(round(wz)))
+        if out == (0, 0, 0) and self._last_out == (0, 0, 0):
+            return
+        self._ll.command(base_fwd=out[0], strafe=out[1], yaw=out[2])
+        self._last_out = out
+
+    def _run(self) -> None:
+        next_t = time.monotonic()
+        while not self._stop.is_set():
+            with self._lock:
+                for axis in self._axes.values():
+                    axis.step(self._dt)
+                try:
+                    self._write()
+                except Exception as exc:
+                    print(f"[WARN] Velocity profile write failed: {exc}")
+                if self._all_idle():
+                    self._idle.set()
+            next_t += self._dt
+            delay = next_t - time.monotonic()
+            if delay < 0.0:
+                next_t = time.monotonic()
+                delay = 0.0
+            self._stop.wait(delay)
+
+
+__all__ = ["AxisLimits", "JerkLimitedAxis", "BaseVelocityProfile"]
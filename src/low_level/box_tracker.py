@@ -0,0 +1,171 @@
+#!/usr/bin/env python3
+# box_tracker.py
+# Propagates detection boxes between detector runs with sparse optical flow.
+# Author: Daniel Würmli
+
+"""
+Detect-then-track.
+
+The detector runs every N frames; in between, BoxTracker moves its boxes
+along with the image. Corner features are picked inside every box on the
+detection frame and followed frame to frame with pyramidal Lucas-Kanade
+flow (plain OpenCV, no contrib trackers needed). A point only counts when
+tracking it back lands where it started (forward-backward check). Each box
+moves by the median point shift and scales by the median change of point
+distances.
+
+A track's quality is the fraction of its points still alive. due() asks for
+a detector run after N frames, or earlier as soon as the mean quality drops
+below min_quality (objects left the view, occlusion, fast motion).
+Propagated boxes keep their class and carry conf * quality; a box with too
+little texture to track is held in place until the next detection.
+
+Tracking runs on a grayscale copy scaled down to track_width, so a frame
+costs a few milliseconds on the robot CPU.
+"""
+
+from typing import List, Optional
+
+import cv2
+import numpy as np
+
+from .detector import Detection
+
+TRACK_WIDTH = 320           # tracking resolution (px)
+MAX_POINTS = 24             # features per box
+MIN_POINTS = 4              # a track with fewer live points is dropped
+MIN_QUALITY = 0.6           # mean fraction of live points below which the detector runs early
+FB_MAX_ERR = 1.0            # forward-backward error (px at tracking resolution)
+
+
+class _Track:
+    __slots__ = ("det", "box", "pts", "n0")
+
+    def __init__(self, det: Detection, box: np.ndarray, pts: Optional[np.ndarray]):
+        self.det = det
+        self.box = box              # float x1, y1, x2, y2 at tracking resolution
+        self.pts = pts              # N x 1 x 2 float32; None: too little texture, box is held in place
+        self.n0 = 0 if pts is None else len(pts)
+
+    @property
+    def quality(self) -> float:
+        return len(self.pts) / float(self.n0) if self.n0 else 1.0
+
+
+class BoxTracker:
+    def __init__(self, track_width: int = TRACK_WIDTH, max_points: int = MAX_POINTS, min_points: int = MIN_POINTS,
+                 min_quality: float = MIN_QUALITY):
+        self.track_width = int(track_width)
+        self.max_points = int(max_points)
+        self.min_points = int(min_points)
+        self.min_quality = float(min_quality)
+        self.tracks: List[_Track] = []
+        self.seeded = 0             # boxes of the last detection that could be tracked
+        self.age = 0                # frames tracked since the last detection
+        self._gray: Optional[np.ndarray] = None
+        self._scale = 1.0
+        self._size = (0, 0)         # frame width, height
+        self._lk = dict(winSize=(15, 15), maxLevel=2,
+                        criteria=(cv2.TERM_CRITERIA_EPS | cv2.TERM_CRITERIA_COUNT, 20, 0.03))
+
+    def prepare(self, frame: np.ndarray) -> np.ndarray:
+        """Grayscale copy of a BGR frame at tracking resolution (the frame itself can be released)."""
+        h, w = frame.shape[:2]
+        self._size = (w, h)
+        self._scale = min(1.0, self.track_width / float(w))
+        if self._scale < 1.0:
+            frame = cv2.resize(frame, (self.track_width, int(round(h * self._scale))), interpolation=cv2.INTER_AREA)
+        return cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY) if frame.ndim == 3 else frame
+
+    # ---------- Detector frames ----------
+    def reset(self, gray: np.ndarray, detections: List[Detection]) -> None:
+        """Start tracking the detections (frame pixels) found on the frame gray was prepared from."""
+        s = self._scale
+        h, w = gray.shape
+        self.tracks = []
+        for d in detections:
+            box = np.array(d.box, dtype=np.float32) * s
+            x1, y1 = max(0, int(box[0])), max(0, int(box[1]))
+            x2, y2 = min(w, int(np.ceil(box[2]))), min(h, int(np.ceil(box[3])))
+            pts = None
+            if x2 - x1 >= 4 and y2 - y1 >= 4:
+                mask = np.zeros_like(gray)
+                mask[y1:y2, x1:x2] = 255
+                pts = cv2.goodFeaturesToTrack(gray, self.max_points, 0.01, 3, mask=mask)
+            if pts is None or len(pts) < self.min_points:
+                pts = None
+            self.tracks.append(_Track(d, box, None if pts is None else pts.astype(np.float32)))
+        self.seeded = sum(1 for t in self.tracks if t.n0)
+        self.age = 0
+        self._gray = gray
+
+    # ---------- Frames in between ----------
+    def update(self, gray: np.ndarray) -> List[Detection]:
+        """Move the boxes to the next prepared frame; returns them in frame pixels."""
+        if self._gray is None or gray.shape != self._gray.shape:
+            self.tracks = []
+        elif any(t.n0 for t in self.tracks):
+            self._flow(self._gray, gray)
+        self._gray = gray
+        self.age += 1
+        return self.detections()
+
+    def _flow(self, prev: np.ndarray, cur: np.ndarray) -> None:
+        # all tracks in one LK call: forward, then backward for the consistency check
+        moving = [t for t in self.tracks if t.n0]
+        p0 = np.concatenate([t.pts for t in moving])
+        p1, st1, _ = cv2.calcOpticalFlowPyrLK(prev, cur, p0, None, **self._lk)
+        pb, st2, _ = cv2.calcOpticalFlowPyrLK(cur, prev, p1, None, **self._lk)
+        good = (st1.reshape(-1) == 1) & (st2.reshape(-1) == 1) & \
+               (np.linalg.norm((p0 - pb).reshape(-1, 2), axis=1) < FB_MAX_ERR)
+        h, w = cur.shape
+        live, i = [t for t in self.tracks if not t.n0], 0
+        for t in moving:
+            n = len(t.pts)
+            g = good[i:i + n]
+            a, b = t.pts[g].reshape(-1, 2), p1[i:i + n][g].reshape(-1, 2)
+            i += n
+            if len(a) < self.min_points:
+                continue
+            shift = np.median(b - a, axis=0)
+            scale = 1.0
+            if len(a) >= 2:
+                da = np.linalg.norm(a[:, None] - a[None], axis=2)
+                db = np.linalg.norm(b[:, None] - b[None], axis=2)
+                sel = da > 1.0
+                if sel.any():
+                    scale = float(np.median(db[sel] / da[sel]))
+            cx, cy = (t.box[0] + t.box[2]) / 2 + shift[0], (t.box[1] + t.box[3]) / 2 + shift[1]
+            hw, hh = (t.box[2] - t.box[0]) * scale / 2, (t.box[3] - t.box[1]) * scale / 2
+            t.box = np.array([cx - hw, cy - hh, cx + hw, cy + hh], dtype=np.float32)
+            if t.box[2] <= 0 or t.box[3] <= 0 or t.box[0] >= w or t.box[1] >= h:
+                continue        # left the view
+            t.pts = b.reshape(-1, 1, 2).astype(np.float32)
+            live.append(t)
+        self.tracks = live
+
+    # ---------- State ----------
+    def detections(self) -> List[Detection]:
+        s, (w, h) = self._scale, self._size
+        out = []
+        for t in self.tracks:
+            x1, y1, x2, y2 = (t.box / s).tolist()
+            out.append(Detection(t.det.cls, t.det.name, t.det.conf * t.quality,
+                                 (int(max(0, x1)), int(max(0, y1)), int(min(w, x2)), int(min(h, y2)))))
+        return out
+
+    @property
+    def confidence(self) -> float:
+        """Mean quality over the tracked boxes of the last detection (lost ones count 0); 1.0 when there were none."""
+        if not self.seeded:
+            return 1.0
+        return sum(t.quality for t in self.tracks if t.n0) / float(self.seeded)
+
+    def due(self, every: int) -> bool:
+        """True when the detector should run: every `every` frames, or early when tracks are being lost."""
+        if self._gray is None or self.age + 1 >= every:
+            return True
+        return self.confidence < self.min_quality
+
+
+__all__ = ["BoxTracker"]
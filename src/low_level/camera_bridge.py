@@ -3,54 +3,252 @@
 # Camera streaming bridge with overlay support.
 # Author: Daniel Würmli
 
-"""Camera streaming bridge with overlay support."""
+"""
+Camera streaming bridge with overlay support.
+
+Each captured frame is JPEG-encoded at most once per output profile: a
+JpegBroadcaster per profile (full-size /raw, resized /video) encodes the
+newest frame while it has subscribers and publishes the bytes tagged with
+the camera frame sequence number. Client generators only forward those bytes.
+
+Frames are published through condition variables: the camera reader wakes
+the encoders, each encoder wakes its clients, and every client remembers the
+last sequence number it sent, so nothing polls while no new frame exists.
+
+The reader captures into a small ring of preallocated buffers
+(cap.read(image=buf)); consumers get reference-counted read-only views and
+a slot is only overwritten after every view of it was released.
+
+With mjpeg=True the camera is asked for its compressed frames
+(FOURCC MJPG, CAP_PROP_CONVERT_RGB off): /raw forwards them untouched, /video
+too when no resize is needed, and a frame is decoded only when a consumer
+asks for pixels (once per frame, shared by all consumers).
+
+Parts of the /raw stream carry X-Frame-Seq / X-Frame-Time headers. The
+overlay client can send back either an annotated JPEG (/push) or just the
+boxes it found, tagged with that sequence number (/push_detections, format
+in src/utils/detection_wire.py). Boxes are drawn by the Pi onto its own
+encode of the matching frame (kept in the /raw broadcaster's short history)
+and stay available to the robot logic through Store.latest_detections().
+"""
 
 import argparse
 import os
 import signal
 import threading
 import time
-from typing import Optional, Tuple
+from collections import deque
+from typing import Dict, Optional, Tuple
 
 import cv2
 import numpy as np
 from flask import Flask, Response, render_template_string, request
 
+from ..utils import detection_wire
+from .detector import Detection, DetectionResult
+
 cv2.setNumThreads(1)
 
+OVERLAY_MAX_AGE_S = 0.7
+
 HTML = """<!doctype html><html><head><meta charset="utf-8"><title>Pi Stream Bridge</title>
 <style>body{background:#111;color:#eee;font-family:system-ui;margin:0}.wrap{display:flex;flex-direction:column;align-items:center;gap:12px;padding:16px}img{max-width:98vw;border-radius:8px}</style>
 </head><body><div class="wrap"><h2>Pi Stream Bridge</h2>
 <img src="/video"/></div></body></html>"""
 
 
+class FrameRef:
+    """
+    Reference to one ring slot: image is a read-only view of the capture
+    buffer. The slot is not reused until release() (or the end of a with block).
+    """
+
+    __slots__ = ("seq", "t", "image", "encoded", "_ring", "_slot")
+
+    def __init__(self, seq: int, image: np.ndarray, ring: "FrameRing", slot: int, encoded: bool = False,
+                 t: float = 0.0):
+        self.seq = seq
+        self.t = t                  # capture time (time.time())
+        self.image = image          # BGR pixels, or the JPEG bytes of an MJPEG frame when encoded
+        self.encoded = encoded
+        self._ring = ring
+        self._slot = slot
+
+    @property
+    def jpeg(self) -> Optional[bytes]:
+        """The camera's own JPEG (MJPEG passthrough), None for decoded frames."""
+        return self.image.tobytes() if self.encoded else None
+
+    def pixels(self) -> Optional[np.ndarray]:
+        """BGR pixels (read-only); MJPEG frames are decoded on first use."""
+        if not self.encoded:
+            return self.image
+        return self._ring._pixels(self._slot, self.seq) if self._ring is not None else None
+
+    def release(self):
+        if self._ring is not None:
+            self._ring._release(self._slot)
+            self._ring = None
+
+    def __enter__(self) -> np.ndarray:
+        return self.pixels()
+
+    def __exit__(self, *_):
+        self.release()
+        return False
+
+    def __del__(self):
+        self.release()
+
+
+class FrameRing:
+    """
+    Small ring of capture buffers. The reader claims a slot that is neither
+    the newest frame nor referenced by a consumer, captures into it and
+    publishes it; consumers take reference-counted read-only views.
+    """
+
+    def __init__(self, slots: int = 4):
+        self.bufs = [None] * max(2, int(slots))
+        self.refs = [0] * len(self.bufs)
+        self.views = [None] * len(self.bufs)
+        self.encoded = [False] * len(self.bufs)
+        self.decoded = [None] * len(self.bufs)    # (seq, pixels) cache of MJPEG slots
+        self.slot_seq = [0] * len(self.bufs)
+        self.slot_t = [0.0] * len(self.bufs)
+        self.newest: Optional[int] = None
+        self.writing: Optional[int] = None
+        self.seq = 0
+        self.closed = False
+        self.cond = threading.Condition()
+
+    def _free_slot(self) -> Optional[int]:
+        for i in range(len(self.bufs)):
+            if i != self.newest and self.refs[i] == 0:
+                return i
+        return None
+
+    def claim(self, timeout: float = 0.5):
+        """(slot, buffer) to capture into, buffer None until the slot was first filled; (None, None) on timeout."""
+        with self.cond:
+            self.cond.wait_for(lambda: self._free_slot() is not None or self.closed, timeout)
+            slot = self._free_slot()
+            if slot is None or self.closed:
+                return None, None
+            self.writing = slot
+            self.refs[slot] = -1  # being written
+            return slot, self.bufs[slot]
+
+    def publish(self, slot: int, frame: np.ndarray, encoded: bool = False) -> None:
+        view = frame.reshape(-1).view() if encoded else frame.view()
+        view.flags.writeable = False
+        with self.cond:
+            self.bufs[slot] = frame  # the backend may hand back a new array (first frame, size change)
+            self.views[slot] = view
+            self.encoded[slot] = encoded
+            self.decoded[slot] = None
+            self.refs[slot] = 0
+            self.writing = None
+            self.newest = slot
+            self.seq += 1
+            self.slot_seq[slot] = self.seq
+            self.slot_t[slot] = time.time()
+            self.cond.notify_all()
+
+    def _pixels(self, slot: int, seq: int) -> Optional[np.ndarray]:
+        # the caller holds a reference, so the slot cannot be rewritten meanwhile
+        cached = self.decoded[slot]
+        if cached is not None and cached[0] == seq:
+            return cached[1]
+        img = cv2.imdecode(self.views[slot], cv2.IMREAD_COLOR)
+        if img is None:
+            return None
+        img.flags.writeable = False
+        with self.cond:
+            if self.slot_seq[slot] == seq:
+                self.decoded[slot] = (seq, img)
+        return img
+
+    def abort(self, slot: int) -> None:
+        with self.cond:
+            self.refs[slot] = 0
+            self.writing = None
+
+    def acquire(self, after: Optional[int] = None, timeout: float = 1.0) -> Optional[FrameRef]:
+        """Newest frame (waiting for one newer than seq after, when given); None if there is none."""
+        with self.cond:
+            if after is not None:
+                self.cond.wait_for(lambda: self.seq != after or self.closed, timeout)
+            slot = self.newest
+            if slot is None:
+                return None
+            self.refs[slot] += 1
+            return FrameRef(self.seq, self.views[slot], self, slot, self.encoded[slot], self.slot_t[slot])
+
+    def _release(self, slot: int) -> None:
+        with self.cond:
+            self.refs[slot] -= 1
+            if self.refs[slot] == 0:
+                self.cond.notify_all()
+
+    def close(self) -> None:
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+
+
 class Camera:
-    """Threaded camera reader."""
+    """Threaded camera reader capturing into a preallocated FrameRing."""
 
-    def __init__(self, source=0):
-        self.cap = cv2.VideoCapture(source)  # Do not tweak CAP_PROP settings; leave defaults
+    def __init__(self, source=0, slots: int = 4, mjpeg: bool = False):
+        self.cap = cv2.VideoCapture(source)  # Only MJPEG passthrough touches CAP_PROP settings
         if not self.cap.isOpened():
             raise RuntimeError(f"Camera could not be opened: {source}")
-        self.lock = threading.Lock()
-        self.frame: Optional[np.ndarray] = None
+        self.mjpeg = bool(mjpeg)
+        if self.mjpeg:
+            self.cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*"MJPG"))
+            self.cap.set(cv2.CAP_PROP_CONVERT_RGB, 0)
+        self.ring = FrameRing(slots)
+        self.dropped = 0
         self.run = True
         threading.Thread(target=self._reader, daemon=True).start()
 
+    @property
+    def seq(self) -> int:
+        return self.ring.seq
+
     def _reader(self):
+        ring = self.ring
         while self.run:
-            ok, frm = self.cap.read()
+            slot, buf = ring.claim()
+            if slot is None:
+                # every slot is held by a consumer: drop a frame so the camera queue does not lag
+                if self.run:
+                    self.cap.grab()
+                    self.dropped += 1
+                continue
+            ok, frm = self.cap.read() if buf is None else self.cap.read(image=buf)
             if ok and frm is not None:
-                with self.lock:
-                    self.frame = frm
+                encoded = self.mjpeg and frm.ndim < 3
+                if self.mjpeg and not encoded:
+                    # backend ignored CONVERT_RGB=0: it delivers decoded frames, keep using them
+                    print("[WARN] Camera does not deliver raw MJPEG; falling back to decoded frames")
+                    self.mjpeg = False
+                ring.publish(slot, frm, encoded)
             else:
+                ring.abort(slot)
                 time.sleep(0.01)
 
-    def get(self):
-        with self.lock:
-            return None if self.frame is None else self.frame.copy()
+    def get(self, after: Optional[int] = None, timeout: float = 1.0) -> Optional[FrameRef]:
+        """
+        Newest frame as a FrameRef (read-only view, no copy); use it as
+        `with ref as img:` or call release(). after=seq waits for a newer frame.
+        """
+        return self.ring.acquire(after, timeout)
 
     def close(self):
         self.run = False
+        self.ring.close()
         try:
             self.cap.release()
         except Exception:
@@ -58,23 +256,101 @@ class Camera:
 
 
 class Store:
-    """Overlay store that accepts JPEG payloads."""
+    """
+    Overlay store: annotated JPEGs (/push) or detection boxes (/push_detections).
+    Boxes are drawn by render(result) on first request, once per push.
+    """
 
-    def __init__(self):
+    def __init__(self, render=None):
         self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
         self.overlay_jpg: Optional[bytes] = None
         self.overlay_ts: float = 0.0
+        self.seq = 0
+        self.detections: Optional[DetectionResult] = None
+        self.detections_ts: float = 0.0
+        self.names: Dict[int, str] = {}
+        self.render = render
+        self._render_lock = threading.Lock()
+        self._pending = False       # newest push is boxes that were not drawn yet
+
+    def push(self, jpg_bytes: Optional[bytes] = None, detections: Optional[DetectionResult] = None):
+        with self.cond:
+            now = time.time()
+            if detections is not None:
+                self.detections = detections
+                self.detections_ts = now
+            self.overlay_jpg = jpg_bytes
+            self.overlay_ts = now
+            self._pending = jpg_bytes is None and detections is not None
+            self.seq += 1
+            self.cond.notify_all()
 
-    def push(self, jpg_bytes: bytes):
+    def latest_detections(self, max_age=OVERLAY_MAX_AGE_S) -> Optional[DetectionResult]:
+        """Newest pushed boxes, None when there are none younger than max_age (None = any age)."""
         with self.lock:
-            self.overlay_jpg = jpg_bytes
-            self.overlay_ts = time.time()
+            if self.detections is None or (max_age is not None and time.time() - self.detections_ts > max_age):
+                return None
+            return self.detections
 
-    def get_overlay(self, max_age=0.7) -> Optional[bytes]:
+    def wait_newer(self, seq: int, timeout: float) -> bool:
+        """Block until an overlay newer than seq was pushed; False on timeout."""
+        with self.cond:
+            return self.cond.wait_for(lambda: self.seq != seq, timeout)
+
+    def get_overlay(self, max_age=OVERLAY_MAX_AGE_S) -> Optional[bytes]:
+        return self.overlay(max_age)[1]
+
+    def overlay(self, max_age=OVERLAY_MAX_AGE_S) -> Tuple[int, Optional[bytes]]:
+        """(seq, jpeg) of the newest overlay, jpeg None when there is none younger than max_age."""
         with self.lock:
-            if self.overlay_jpg and (time.time() - self.overlay_ts) <= max_age:
-                return self.overlay_jpg
+            seq, jpg, pending = self.seq, self.overlay_jpg, self._pending
+            if (time.time() - self.overlay_ts) > max_age:
+                return seq, None
+        if pending:
+            jpg = self._render(seq)
+        return seq, jpg or None
+
+    def _render(self, seq: int) -> Optional[bytes]:
+        with self._render_lock:     # shared by all viewers: the first one draws
+            with self.lock:
+                if self.seq != seq or not self._pending:
+                    return self.overlay_jpg if self.seq == seq else None
+                result = self.detections
+            jpg = None
+            if self.render is not None:
+                try:
+                    jpg = self.render(result)
+                except Exception as exc:
+                    print(f"[WARN] Drawing pushed detections failed: {exc}")
+            with self.lock:
+                if self.seq == seq:
+                    self.overlay_jpg = jpg
+                    self._pending = False
+            return jpg
+
+
+def jpeg_size(buf) -> Optional[Tuple[int, int]]:
+    """(width, height) from the SOF header of a JPEG, without decoding; None if not found."""
+    b = memoryview(buf).cast("B") if not isinstance(buf, (bytes, bytearray)) else buf
+    n = len(b)
+    if n < 4 or b[0] != 0xFF or b[1] != 0xD8:
+        return None
+    i = 2
+    while i + 8 < n:
+        if b[i] != 0xFF:
             return None
+        marker = b[i + 1]
+        if marker == 0xFF:
+            i += 1
+            continue
+        if marker in (0xC0, 0xC1, 0xC2):
+            return (b[i + 7] << 8) | b[i + 8], (b[i + 5] << 8) | b[i + 6]
+        if marker == 0x01 or 0xD0 <= marker <= 0xD7:
+            i += 2
+            continue
+        i += 2 + ((b[i + 2] << 8) | b[i + 3])
+    return None
 
 
 def encode_jpeg(img, quality=70):
@@ -82,57 +358,274 @@ def encode_jpeg(img, quality=70):
     return jpg.tobytes() if ok else None
 
 
-def gen_raw(cam: Camera, quality=70, maxfps=30):
-    min_dt = 1.0 / max(1, int(maxfps))
-    last = 0
-    while True:
-        now = time.time()
-        if now - last < min_dt:
-            time.sleep(0.001)
-            continue
-        last = now
-        frm = cam.get()
-        if frm is None:
-            time.sleep(0.01)
-            continue
-        b = encode_jpeg(frm, quality)
-        if not b:
-            continue
-        yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + b + b"\r\n"
+class JpegBroadcaster:
+    """
+    Encoder stage for one output profile. While at least one client is
+    subscribed, every new camera frame is resized (outw) and encoded once;
+    latest() returns (seq, jpeg bytes) for all clients to forward. The last
+    `history` JPEGs stay available by sequence number (lookup()).
+    """
+
+    def __init__(self, cam: Camera, name: str, quality=70, outw=None, maxfps=30, history: int = 1):
+        self.cam = cam
+        self.name = name
+        self.quality = int(quality)
+        self.outw = int(outw) if outw else None
+        self.min_dt = 1.0 / max(1, int(maxfps))
+        self.lock = threading.Lock()
+        self.cond = threading.Condition(self.lock)
+        self.jpg: Optional[bytes] = None
+        self.seq = 0
+        self.t = 0.0
+        self.frames = deque(maxlen=max(1, int(history)))  # (seq, capture time, jpeg)
+        self.clients = 0
+        self.encoded = 0
+        self.passthrough = 0
+        self.run = True
+        threading.Thread(target=self._encoder, name=f"jpeg-{name}", daemon=True).start()
 
+    def subscribe(self):
+        with self.cond:
+            self.clients += 1
+            self.cond.notify_all()
 
-def gen_video(cam: Camera, store: Store, quality=70, outw=960, maxfps=30):
-    min_dt = 1.0 / max(1, int(maxfps))
-    last = 0
-    while True:
+    def unsubscribe(self):
+        with self.lock:
+            self.clients = max(0, self.clients - 1)
+
+    def latest(self) -> Tuple[int, Optional[bytes]]:
+        with self.lock:
+            return self.seq, self.jpg
+
+    def latest_frame(self) -> Tuple[int, float, Optional[bytes]]:
+        """(seq, capture time, jpeg) of the newest encode."""
+        with self.lock:
+            return self.seq, self.t, self.jpg
+
+    def lookup(self, seq: int) -> Optional[Tuple[float, bytes]]:
+        """(capture time, jpeg) of an earlier encode that is still in the history."""
+        with self.lock:
+            for s, t, jpg in reversed(self.frames):
+                if s == seq:
+                    return t, jpg
+        return None
+
+    def wait_newer(self, seq: int, timeout: float = 1.0) -> Tuple[int, Optional[bytes]]:
+        """Block until a JPEG newer than seq is published (or timeout); returns latest()."""
+        with self.cond:
+            # no JPEG yet: keep waiting even though seq differs from the caller's sentinel
+            self.cond.wait_for(lambda: (self.jpg is not None and self.seq != seq) or not self.run, timeout)
+            return self.seq, self.jpg
+
+    def _encoder(self):
+        last = 0.0
+        while self.run:
+            with self.cond:
+                # idle without clients
+                if not self.cond.wait_for(lambda: self.clients > 0 or not self.run, 1.0):
+                    continue
+            ref = self.cam.get(after=self.seq)
+            if ref is None or ref.seq == self.seq:
+                if ref is not None:
+                    ref.release()
+                continue
+            delay = last + self.min_dt - time.time()
+            if delay > 0:
+                # rate cap: encode the newest frame once the interval has passed
+                ref.release()
+                time.sleep(delay)
+                ref = self.cam.get()
+                if ref is None:
+                    continue
+            last = time.time()
+            seq, t = ref.seq, ref.t
+            try:
+                b = self._jpeg(ref)
+            finally:
+                ref.release()
+            if not b:
+                continue
+            with self.cond:
+                self.jpg = b
+                self.seq = seq
+                self.t = t
+                self.frames.append((seq, t, b))
+                self.cond.notify_all()
+
+    def _jpeg(self, ref: FrameRef) -> Optional[bytes]:
+        if ref.encoded:
+            size = jpeg_size(ref.image)
+            if size is not None and not (self.outw and size[0] > self.outw):
+                self.passthrough += 1
+                return ref.jpeg
+        frm = ref.pixels()
+        if frm is None:
+            return None
+        if self.outw and frm.shape[1] > self.outw:
+            h, w = frm.shape[:2]
+            nh = int(h * (self.outw / w))
+            frm = cv2.resize(frm, (self.outw, nh), interpolation=cv2.INTER_AREA)
+        self.encoded += 1
+        return encode_jpeg(frm, self.quality)
+
+    def close(self):
+        self.run = False
+        with self.cond:
+            self.cond.notify_all()
+
+
+COLORS = [(56, 56, 255), (151, 157, 255), (31, 112, 255), (29, 178, 255), (49, 210, 207), (10, 249, 72)]
+
+
+def draw_boxes(img: np.ndarray, dets, sx: float = 1.0, sy: float = 1.0) -> None:
+    """Draw detections in place; boxes are scaled by (sx, sy) into img."""
+    for d in dets:
+        x1, y1, x2, y2 = d.box
+        p1, p2 = (int(x1 * sx), int(y1 * sy)), (int(x2 * sx), int(y2 * sy))
+        color = COLORS[d.cls % len(COLORS)]
+        cv2.rectangle(img, p1, p2, color, 2)
+        cv2.putText(img, f"{d.name} {d.conf:.2f}", (p1[0], max(12, p1[1] - 4)),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 1, cv2.LINE_AA)
+
+
+class BoxRenderer:
+    """
+    Draws pushed boxes onto the Pi's own encode of the frame they were found
+    on (looked up by sequence number in the /raw broadcaster's history), or
+    onto the newest camera frame when that one is gone.
+    """
+
+    def __init__(self, cam: Camera, source: JpegBroadcaster, quality=70, outw=None):
+        self.cam = cam
+        self.source = source
+        self.quality = int(quality)
+        self.outw = int(outw) if outw else None
+        self.matched = 0
+        self.unmatched = 0
+
+    def result(self, msg: dict, names: Dict[int, str]) -> DetectionResult:
+        """DetectionResult (source "overlay") from a decoded push."""
+        seq = msg["seq"]
+        hit = self.source.lookup(seq) if seq is not None else None
         now = time.time()
-        if now - last < min_dt:
-            time.sleep(0.001)
-            continue
-        last = now
-        ov = store.get_overlay()
-        if ov is not None:
-            b = ov  # direkt durchreichen -> Pi spart CPU
+        dets = [Detection(c, names.get(c, str(c)), conf, (x1, y1, x2, y2)) for x1, y1, x2, y2, c, conf in msg["boxes"]]
+        dets.sort(key=lambda d: -d.conf)
+        return DetectionResult(-1 if seq is None else seq, hit[0] if hit else now, now,
+                               msg["width"], msg["height"], dets, source="overlay")
+
+    def __call__(self, res: DetectionResult) -> Optional[bytes]:
+        img = None
+        hit = self.source.lookup(res.seq) if res.seq >= 0 else None
+        if hit is not None:
+            img = cv2.imdecode(np.frombuffer(hit[1], np.uint8), cv2.IMREAD_COLOR)
+        if img is not None:
+            self.matched += 1
         else:
-            frm = cam.get()
-            if frm is None:
-                time.sleep(0.01)
+            self.unmatched += 1
+            ref = self.cam.get()
+            if ref is None:
+                return None
+            try:
+                px = ref.pixels()
+                img = None if px is None else px.copy()   # ring views are read-only
+            finally:
+                ref.release()
+            if img is None:
+                return None
+        if self.outw and img.shape[1] > self.outw:
+            h, w = img.shape[:2]
+            img = cv2.resize(img, (self.outw, int(h * (self.outw / w))), interpolation=cv2.INTER_AREA)
+        h, w = img.shape[:2]
+        draw_boxes(img, res.detections, w / max(1, res.width), h / max(1, res.height))
+        return encode_jpeg(img, self.quality)
+
+
+def _part(b: bytes, seq: Optional[int] = None, t: Optional[float] = None) -> bytes:
+    head = b"--frame\r\nContent-Type: image/jpeg\r\nContent-Length: %d\r\n" % len(b)
+    if seq is not None:
+        head += b"X-Frame-Seq: %d\r\nX-Frame-Time: %.3f\r\n" % (seq, t or 0.0)
+    return head + b"\r\n" + b + b"\r\n"
+
+
+def _pace(last: float, min_dt: float) -> None:
+    """Rate cap: sleep once until min_dt has passed since last."""
+    delay = last + min_dt - time.time()
+    if delay > 0:
+        time.sleep(delay)
+
+
+def gen_raw(bc: JpegBroadcaster, maxfps=30):
+    min_dt = 1.0 / max(1, int(maxfps))
+    last = 0.0
+    sent = -1
+    bc.subscribe()
+    try:
+        while True:
+            seq, b = bc.wait_newer(sent)
+            if b is None or seq == sent:
+                if not bc.run:
+                    return
                 continue
-            if outw and frm.shape[1] > outw:
-                h, w = frm.shape[:2]
-                nh = int(h * (outw / w))
-                frm = cv2.resize(frm, (outw, nh), interpolation=cv2.INTER_AREA)
-            b = encode_jpeg(frm, quality)
-            if not b:
+            _pace(last, min_dt)
+            seq, t, b = bc.latest_frame()
+            last = time.time()
+            sent = seq
+            yield _part(b, seq, t)
+    finally:
+        bc.unsubscribe()
+
+
+def gen_video(bc: JpegBroadcaster, store: Store, maxfps=30):
+    min_dt = 1.0 / max(1, int(maxfps))
+    last = 0.0
+    sent = -1
+    ov_sent = -1
+    subscribed = False
+    try:
+        while True:
+            ov_seq, ov = store.overlay()
+            if ov is not None:
+                if subscribed:
+                    # no local encoding while an overlay is being pushed
+                    bc.unsubscribe()
+                    subscribed = False
+                if ov_seq == ov_sent:
+                    # sleep until the next push; a stale overlay ends the wait and falls back to the camera
+                    store.wait_newer(ov_sent, OVERLAY_MAX_AGE_S)
+                    continue
+                _pace(last, min_dt)
+                last = time.time()
+                ov_sent = ov_seq
+                yield _part(ov)  # direkt durchreichen -> Pi spart CPU
+                continue
+            if not subscribed:
+                bc.subscribe()
+                subscribed = True
+            seq, b = bc.wait_newer(sent)
+            if b is None or seq == sent:
+                if not bc.run:
+                    return
                 continue
-        yield b"--frame\r\nContent-Type: image/jpeg\r\n\r\n" + b + b"\r\n"
+            _pace(last, min_dt)
+            seq, b = bc.latest()
+            last = time.time()
+            sent = seq
+            yield _part(b)
+    finally:
+        if subscribed:
+            bc.unsubscribe()
 
 
-def create_app(source=0, quality=70, outw=960, maxfps=30) -> Tuple[Flask, Camera, Store]:
+def create_app(source=0, quality=70, outw=960, maxfps=30, mjpeg=False) -> Tuple[Flask, Camera, Store]:
     """Create the Flask app along with the camera and overlay store."""
     app = Flask(__name__)
-    cam = Camera(source)
-    store = Store()
+    cam = Camera(source, mjpeg=mjpeg)
+    # one encoder per output profile, shared by all clients of that route;
+    # /raw keeps about a second of frames so pushed boxes find the frame they belong to
+    raw_bc = JpegBroadcaster(cam, "raw", quality=quality, maxfps=maxfps, history=maxfps)
+    video_bc = JpegBroadcaster(cam, "video", quality=quality, outw=outw, maxfps=maxfps)
+    renderer = BoxRenderer(cam, raw_bc, quality=quality, outw=outw)
+    store = Store(render=renderer)
 
     @app.route("/")
     def index():
@@ -141,14 +634,14 @@ def create_app(source=0, quality=70, outw=960, maxfps=30) -> Tuple[Flask, Camera
     @app.route("/raw")
     def raw():
         return Response(
-            gen_raw(cam, quality, maxfps),
+            gen_raw(raw_bc, maxfps),
             mimetype="multipart/x-mixed-replace; boundary=frame",
         )
 
     @app.route("/video")
     def video():
         return Response(
-            gen_video(cam, store, quality, outw, maxfps),
+            gen_video(video_bc, store, maxfps),
             mimetype="multipart/x-mixed-replace; boundary=frame",
         )
 
@@ -160,6 +653,19 @@ def create_app(source=0, quality=70, outw=960, maxfps=30) -> Tuple[Flask, Camera
         store.push(request.data)
         return "ok", 200
 
+    @app.route("/push_detections", methods=["POST"])
+    def push_detections():
+        # boxes + frame seq from the overlay client (JSON or binary, see utils/detection_wire.py)
+        try:
+            msg = detection_wire.decode(request.get_data(), request.content_type)
+        except ValueError as exc:
+            return f"bad detections: {exc}", 400
+        if msg["names"]:
+            store.names.update(msg["names"])
+        if msg["boxes"] is not None:
+            store.push(detections=renderer.result(msg, store.names))
+        return "ok", 200
+
     @app.route("/healthz")
     def health():
         return "ok"
@@ -174,13 +680,14 @@ def run_stream_server(
     outw=960,
     maxfps=30,
     host="0.0.0.0",
+    mjpeg=False,
 ):
     """Start the streaming server (blocking)."""
     os.environ.setdefault("OMP_NUM_THREADS", "2")
     os.environ.setdefault("OPENBLAS_NUM_THREADS", "2")
     src = 0 if str(source) == "0" else source
 
-    app, cam, _ = create_app(src, quality=quality, outw=outw, maxfps=maxfps)
+    app, cam, _ = create_app(src, quality=quality, outw=outw, maxfps=maxfps, mjpeg=mjpeg)
 
     def _sigint(sig, frm):  # pragma: no cover - runtime helper
         cam.close()
@@ -201,6 +708,7 @@ def parse_args():
     p.add_argument("--quality", type=int, default=70)
     p.add_argument("--outw", type=int, default=960)
     p.add_argument("--maxfps", type=int, default=30)
+    p.add_argument("--mjpeg", action="store_true", help="Stream the camera's own MJPEG frames without re-encoding")
     return p.parse_args()
 
 
@@ -212,6 +720,7 @@ def main():
         quality=args.quality,
         outw=args.outw,
         maxfps=args.maxfps,
+        mjpeg=args.mjpeg,
     )
 
 
@@ -0,0 +1,194 @@
+#!/usr/bin/env python3
+# detector.py
+# CPU object detector running an exported YOLO ONNX model (onnxruntime or OpenCV DNN).
+# Author: Daniel Würmli
+
+"""
+ONNX object detector for the robot CPU.
+
+Runs a YOLOv8 model exported with `yolo export format=onnx` (output
+1 x (4 + classes) x anchors). Frames are letterboxed into a preallocated
+square canvas and converted into a preallocated float blob, so a detection
+allocates nothing per frame up to the network itself. onnxruntime is used
+when installed, OpenCV DNN otherwise.
+
+prepare() copies the frame into the canvas and can run while the caller
+still holds a camera buffer; infer() then runs on the private copy.
+"""
+
+import ast
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
+
+import cv2
+import numpy as np
+
+try:
+    import onnxruntime as ort
+except Exception:
+    ort = None
+
+PAD_VALUE = 114
+NMS_OFFSET = 4096.0     # per-class box offset: one NMS call keeps classes apart
+
+
+@dataclass
+class Detection:
+    cls: int
+    name: str
+    conf: float
+    box: Tuple[int, int, int, int]      # x1, y1, x2, y2 in frame pixels
+
+    def as_dict(self) -> dict:
+        return {"cls": self.cls, "name": self.name, "conf": round(self.conf, 4), "box": list(self.box)}
+
+
+@dataclass
+class DetectionResult:
+    seq: int                    # camera frame sequence number
+    t_frame: float              # capture time of the frame (time.time())
+    t_done: float               # time the boxes were published
+    width: int
+    height: int
+    detections: List[Detection] = field(default_factory=list)
+    source: str = "robot"       # "robot" (on-robot detector) or "overlay" (pushed by the overlay client)
+    tracked: bool = False       # boxes propagated by the tracker, not a detector run
+
+    @property
+    def age_s(self) -> float:
+        return time.time() - self.t_frame
+
+    def as_dict(self) -> dict:
+        return {"seq": self.seq, "t_frame": self.t_frame, "t_done": self.t_done, "width": self.width,
+                "height": self.height, "source": self.source, "tracked": self.tracked,
+                "detections": [d.as_dict() for d in self.detections]}
+
+
+def _load_names(model_path: str, session=None) -> Dict[int, str]:
+    """Class names from a <model>.names.json sidecar or the ultralytics ONNX metadata."""
+    sidecar = os.path.splitext(model_path)[0] + ".names.json"
+    if os.path.exists(sidecar):
+        with open(sidecar, "r") as f:
+            data = json.load(f)
+        return {int(k): str(v) for k, v in (data.items() if isinstance(data, dict) else enumerate(data))}
+    if session is not None:
+        raw = session.get_modelmeta().custom_metadata_map.get("names")
+        if raw:
+            try:
+                return {int(k): str(v) for k, v in ast.literal_eval(raw).items()}
+            except (ValueError, SyntaxError):
+                pass
+    return {}
+
+
+class OnnxDetector:
+    def __init__(self, model_path: str, imgsz: int = 640, conf: float = 0.25, iou: float = 0.45,
+                 backend: str = "auto", names: Dict[int, str] = None, threads: int = 2):
+        if not os.path.exists(model_path):
+            raise FileNotFoundError(f"Detection model not found: {model_path}")
+        self.model_path = model_path
+        self.imgsz = int(imgsz)
+        self.conf = float(conf)
+        self.iou = float(iou)
+        if backend == "auto":
+            backend = "onnxruntime" if ort is not None else "opencv"
+        self.backend = backend
+        self._session = None
+        self._net = None
+        if backend == "onnxruntime":
+            if ort is None:
+                raise RuntimeError("onnxruntime is not installed (use backend='opencv')")
+            opts = ort.SessionOptions()
+            opts.intra_op_num_threads = int(threads)
+            self._session = ort.InferenceSession(model_path, opts, providers=["CPUExecutionProvider"])
+            self._input = self._session.get_inputs()[0].name
+        elif backend == "opencv":
+            self._net = cv2.dnn.readNetFromONNX(model_path)
+            self._net.setPreferableBackend(cv2.dnn.DNN_BACKEND_OPENCV)
+            self._net.setPreferableTarget(cv2.dnn.DNN_TARGET_CPU)
+        else:
+            raise ValueError(f"Unknown detector backend '{backend}' (onnxruntime, opencv, auto)")
+        self.names = names or _load_names(model_path, self._session)
+
+        s = self.imgsz
+        self._canvas = np.full((s, s, 3), PAD_VALUE, dtype=np.uint8)
+        self._blob = np.empty((1, 3, s, s), dtype=np.float32)
+        self._geom: Optional[Tuple[int, int, float, int, int]] = None    # frame h, w, scale, pad x, pad y
+
+    # ---------- Preprocessing ----------
+    def prepare(self, frame: np.ndarray) -> None:
+        """Letterbox a BGR frame into the canvas and fill the input blob."""
+        h, w = frame.shape[:2]
+        s = self.imgsz
+        if self._geom is None or self._geom[:2] != (h, w):
+            r = min(s / h, s / w)
+            nw, nh = int(round(w * r)), int(round(h * r))
+            self._geom = (h, w, r, (s - nw) // 2, (s - nh) // 2)
+            self._canvas[:] = PAD_VALUE   # borders only change with the frame size
+        _, _, r, dx, dy = self._geom
+        nw, nh = int(round(w * r)), int(round(h * r))
+        roi = self._canvas[dy:dy + nh, dx:dx + nw]
+        if (nw, nh) == (w, h):
+            roi[:] = frame
+        else:
+            cv2.resize(frame, (nw, nh), dst=roi, interpolation=cv2.INTER_LINEAR)
+        # HWC BGR uint8 -> CHW RGB float32 in [0, 1], written into the preallocated blob
+        np.multiply(self._canvas.transpose(2, 0, 1)[::-1], 1.0 / 255.0, out=self._blob[0], casting="unsafe")
+
+    @property
+    def blob(self) -> np.ndarray:
+        """Network input filled by the last prepare() (1 x 3 x imgsz x imgsz, float32)."""
+        return self._blob
+
+    # ---------- Inference ----------
+    def infer(self) -> List[Detection]:
+        """Run the network on the prepared blob; boxes are in the coordinates of the prepared frame."""
+        if self._geom is None:
+            return []
+        if self._session is not None:
+            out = self._session.run(None, {self._input: self._blob})[0]
+        else:
+            self._net.setInput(self._blob)
+            out = self._net.forward()
+        return self._decode(np.asarray(out))
+
+    def detect(self, frame: np.ndarray) -> List[Detection]:
+        self.prepare(frame)
+        return self.infer()
+
+    def _decode(self, out: np.ndarray) -> List[Detection]:
+        pred = out[0]
+        if pred.shape[0] > pred.shape[1]:
+            pred = pred.T           # anchors x (4 + classes) layout
+        scores = pred[4:]
+        if not scores.size:
+            return []
+        cls = scores.argmax(axis=0)
+        conf = scores[cls, np.arange(scores.shape[1])]
+        keep = conf >= self.conf
+        if not keep.any():
+            return []
+        cx, cy, bw, bh = pred[:4, keep]
+        cls, conf = cls[keep], conf[keep]
+
+        h, w, r, dx, dy = self._geom
+        x1 = np.clip((cx - bw / 2 - dx) / r, 0, w)
+        y1 = np.clip((cy - bh / 2 - dy) / r, 0, h)
+        x2 = np.clip((cx + bw / 2 - dx) / r, 0, w)
+        y2 = np.clip((cy + bh / 2 - dy) / r, 0, h)
+        off = cls * NMS_OFFSET
+        rects = np.stack([x1 + off, y1 + off, x2 - x1, y2 - y1], axis=1)
+        idx = cv2.dnn.NMSBoxes(rects.tolist(), conf.tolist(), self.conf, self.iou)
+        dets = []
+        for i in np.asarray(idx).reshape(-1):
+            c = int(cls[i])
+            dets.append(Detection(c, self.names.get(c, str(c)), float(conf[i]),
+                                  (int(x1[i]), int(y1[i]), int(x2[i]), int(y2[i]))))
+        dets.sort(key=lambda d: -d.conf)
+        return dets
+
+
+__all__ = ["OnnxDetector", "Detection", "DetectionResult"]
@@ -3,7 +3,12 @@
 # Low-level motor controller for mecanum drive.
 # Author: Daniel Würmli
 
-import smbus2
+try:
+    import smbus2
+except Exception:
+    smbus2 = None
+
+from .wheel_calibration import WheelSpeedTable
 
 I2C_PORT=1
 ADDR=0x34
@@ -22,12 +27,16 @@ def _mix3(p1,p2,p3):
     return [_clip(p1[i]+p2[i]+p3[i]) for i in range(4)]
 
 class MotorController:
-    def __init__(self, ramp_step=3, g_vy=0.25):
+    def __init__(self, ramp_step=3, g_vy=0.25, speed_table: WheelSpeedTable = None):
         self._prev=[0,0,0,0]
         self._ramp=ramp_step
         self.G_VY=g_vy
+        # Optional per-wheel lookup table; None keeps the linear G_VY mapping
+        self.speed_table=speed_table
 
     def _write(self, idx:int, val:int):
+        if smbus2 is None:
+            raise RuntimeError("smbus2 is not installed; the motor controller needs I2C access.")
         with smbus2.SMBus(I2C_PORT) as bus:
             bus.write_i2c_block_data(ADDR, REGS[idx], [val & 0xFF])
 
@@ -38,8 +47,27 @@ class MotorController:
     def base_mag_from_speed(self, forward_mm_s: float):
         return int(self.G_VY * forward_mm_s)
 
+    def _forward_part(self, base_fwd):
+        """
+        Per-wheel forward contribution. With a speed table the linear register
+        is mapped onto each wheel's measured speed curve; strafe and yaw stay
+        linear so the time-calibrated turns (rotation_scaling*) keep their tuning.
+        """
+        if not base_fwd:
+            return [0,0,0,0]
+        if self.speed_table is None or not self.G_VY:
+            return [v*base_fwd for v in FWD]
+        return [self.speed_table.register_for_speed(i, v*base_fwd / self.G_VY) for i,v in enumerate(FWD)]
+
+    def write_raw(self, values):
+        """Write per-wheel registers directly (no mixing, ramp or calibration)."""
+        vals=[_clip(int(v)) for v in values]
+        for i,val in enumerate(vals):
+            self._write(i,val)
+        self._prev=vals
+
     def command(self, base_fwd=0, strafe=0, yaw=0):
-        p_base  = [v*base_fwd for v in FWD] if base_fwd else [0,0,0,0]
+        p_base  = self._forward_part(base_fwd)
         p_stra  = (LEFT if strafe>0 else RIGHT) if strafe!=0 else [0,0,0,0]
         p_stra  = [v*abs(strafe) for v in p_stra]
         p_yaw   = (CCW if yaw>0 else CW) if yaw!=0 else [0,0,0,0]
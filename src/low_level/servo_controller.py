@@ -9,8 +9,8 @@ Low-level ServoController providing half-duplex UART access for LOBOT/Bus servos
 - No high-level pose or motion logic included.
 """
 
-from typing import Optional, Tuple
-import time, struct
+from typing import Dict, Iterable, List, Optional, Tuple
+import time, struct, threading
 
 try:
     import RPi.GPIO as GPIO
@@ -22,13 +22,80 @@ import serial
 # LOBOT Commands
 LOBOT_SERVO_MOVE_TIME_WRITE      = 1
 LOBOT_SERVO_MOVE_STOP            = 12
+LOBOT_SERVO_TEMP_READ            = 26
+LOBOT_SERVO_VIN_READ             = 27
 LOBOT_SERVO_POS_READ             = 28
 LOBOT_SERVO_LOAD_OR_UNLOAD_WRITE = 31
 
 DEFAULT_BAUD = 115200
+REPLY_TIMEOUT_S = 0.02   # a servo answers within ~1 ms; a frame takes <1 ms at 115200 baud
+REPLY_POLL_S = 0.0002
 RX_PIN = 4
 TX_PIN = 27
 
+def _decode_params(params: bytes):
+    """Reply payload -> True (no data), signed byte, signed 16-bit value or a pair of them."""
+    n = len(params)
+    if n == 0:
+        return True
+    if n == 1:
+        return struct.unpack('b', params)[0]
+    if n == 2:
+        return struct.unpack('<h', params)[0]
+    if n == 4:
+        return struct.unpack('<hh', params)
+    return None
+
+
+class FrameParser:
+    """
+    Incremental parser for 0x55 0x55 ID LEN CMD PARAMS... CHK frames. Bytes may
+    arrive in any split; complete frames with a valid checksum are returned as
+    (sid, cmd, params), corrupt ones are counted and skipped by resyncing on
+    the next header.
+    """
+
+    def __init__(self):
+        self._buf = bytearray()
+        self.bad_checksum = 0
+
+    def reset(self) -> None:
+        self._buf.clear()
+
+    def feed(self, data: bytes) -> List[Tuple[int, int, bytes]]:
+        buf = self._buf
+        buf += data
+        frames = []
+        while True:
+            idx = buf.find(b"\x55\x55")
+            if idx < 0:
+                # keep a trailing 0x55 that may start the next header
+                del buf[:-1 if buf[-1:] == b"\x55" else len(buf)]
+                return frames
+            if idx:
+                del buf[:idx]
+            # a third 0x55 is a repeated header byte, not the ID
+            if len(buf) >= 3 and buf[2] == 0x55:
+                del buf[0]
+                continue
+            if len(buf) < 5:
+                return frames
+            length = buf[3]
+            if length < 3:
+                del buf[:2]
+                continue
+            total = length + 3
+            if len(buf) < total:
+                return frames
+            frame = bytes(buf[:total])
+            if ServoController._checksum(frame[:-1]) != frame[-1]:
+                self.bad_checksum += 1
+                del buf[:2]
+                continue
+            del buf[:total]
+            frames.append((frame[2], frame[4], frame[5:-1]))
+
+
 class ServoController:
     def __init__(self, port: str = '/dev/serial0', baud: int = DEFAULT_BAUD,
                  timeout: float = 0.1, write_timeout: float = 0.8,
@@ -42,6 +109,11 @@ class ServoController:
             GPIO.setmode(GPIO.BCM)
             GPIO.setup(self.rx_pin, GPIO.OUT, initial=GPIO.LOW)
             GPIO.setup(self.tx_pin, GPIO.OUT, initial=GPIO.LOW)
+        self._parser = FrameParser()
+        self.reply_timeouts = 0
+        # one transaction at a time (background telemetry shares the bus with commands)
+        self.lock = threading.RLock()
+        self.last_activity = 0.0
 
     # --- Half-duplex direction switching ---
     def _port_write(self):
@@ -83,55 +155,74 @@ class ServoController:
     def write_cmd(self, sid: Optional[int], cmd: int, dat1=None, dat2=None) -> None:
         sid = 0xFE if sid is None else int(sid)
         pkt = self._packet(sid, cmd, dat1, dat2)
-        self._port_write()
-        self.ser.write(pkt)
-        time.sleep(0.00034)
+        with self.lock:
+            self._port_write()
+            self.ser.write(pkt)
+            time.sleep(0.00034)
+            self.last_activity = time.monotonic()
+
+    def write_many(self, packets: Iterable[bytes]) -> None:
+        """Send several packets as one transaction: one direction switch, one write, one flush."""
+        buf = b"".join(packets)
+        if not buf:
+            return
+        with self.lock:
+            self._port_write()
+            self.ser.write(buf)
+            self.ser.flush()
+            self.last_activity = time.monotonic()
 
     def read_cmd(self, sid: Optional[int], cmd: int) -> None:
         sid = 0xFE if sid is None else int(sid)
         pkt = self._packet(sid, cmd)
         self._port_write()
         self.ser.write(pkt)
-        time.sleep(0.00034)
+        # Wait until the request has left the UART before releasing the bus
+        self.ser.flush()
 
-    def get_reply(self, expect_cmd: int):
-        """Parse a simple response frame; returns int, (int, int), or None."""
-        self.ser.flushInput()
+    def _discard_pending(self) -> None:
+        """Drop stale bytes (late replies of an earlier request) before a new request."""
+        self._parser.reset()
+        waiting = self.ser.in_waiting
+        if waiting:
+            self.ser.read(waiting)
+
+    def get_reply(self, expect_cmd: int, sid: Optional[int] = None, timeout: float = REPLY_TIMEOUT_S):
+        """
+        Wait up to timeout for a checksum-valid reply frame to expect_cmd (from sid,
+        when given); returns int, (int, int), True or None on timeout. The bus echo
+        of our own request has no parameters and is skipped.
+        """
         self._port_read()
-        time.sleep(0.005)
-        if self.ser.in_waiting == 0:
-            return None
-        data = self.ser.read(self.ser.in_waiting)
-        if len(data) < 7:
-            return None
-        try:
-            idx = data.index(b"\x55\x55")
-        except ValueError:
-            return None
-        frame = data[idx:]
-        if len(frame) < 7:
-            return None
-        if frame[2] == 0x55 and frame[3] == 0x55:
-            frame = frame[1:]
-        if frame[4] < 3:
-            return None
-        length = frame[4]
-        cmd = frame[5 - 1 + 2]  # robust, aber effektiv expect_cmd pruefen reicht
-        if cmd != expect_cmd:
-            return None
-        if length == 3:
-            return True
-        if length == 4:
-            return struct.unpack('b', frame[5:6])[0]
-        if length == 5:
-            val = frame[5] | (frame[6] << 8)
-            return struct.unpack('<h', struct.pack('<H', val))[0]
-        if length == 7:
-            v1 = frame[5] | (frame[6] << 8)
-            v2 = frame[7] | (frame[8] << 8)
-            return (struct.unpack('<h', struct.pack('<H', v1))[0],
-                    struct.unpack('<h', struct.pack('<H', v2))[0])
-        return None
+        deadline = time.monotonic() + timeout
+        while True:
+            waiting = self.ser.in_waiting
+            if waiting:
+                for fsid, cmd, params in self._parser.feed(self.ser.read(waiting)):
+                    if cmd != expect_cmd or not params:
+                        continue
+                    if sid is not None and fsid != sid:
+                        continue
+                    return _decode_params(params)
+            elif time.monotonic() >= deadline:
+                self.reply_timeouts += 1
+                return None
+            else:
+                time.sleep(REPLY_POLL_S)
+
+    def request(self, sid: int, cmd: int, timeout: float = REPLY_TIMEOUT_S):
+        """One read transaction: discard stale input, send the request, wait for the matching reply."""
+        with self.lock:
+            try:
+                self._discard_pending()
+                self.read_cmd(sid, cmd)
+                return self.get_reply(cmd, sid=sid, timeout=timeout)
+            finally:
+                self.last_activity = time.monotonic()
+
+    def idle_for(self) -> float:
+        """Seconds since the last bus transaction ended."""
+        return time.monotonic() - self.last_activity
 
     # --- Public Low-Level API ---
     def move_time_write(self, sid: int, pulse: int, t_ms: int) -> None:
@@ -139,12 +230,56 @@ class ServoController:
         t_ms  = max(0, min(30000, int(t_ms)))
         self.write_cmd(sid, LOBOT_SERVO_MOVE_TIME_WRITE, pulse, t_ms)
 
+    def move_many(self, moves: Iterable[Tuple[int, int, int]]) -> None:
+        """
+        Synchronized multi-joint move: moves is an iterable of (sid, pulse, t_ms).
+        All packets go out back to back in one buffer, so the joints start within
+        a few byte times of each other instead of one Python call apart.
+        """
+        packets = []
+        for sid, pulse, t_ms in moves:
+            pulse = max(0, min(1000, int(pulse)))
+            t_ms  = max(0, min(30000, int(t_ms)))
+            packets.append(self._packet(int(sid), LOBOT_SERVO_MOVE_TIME_WRITE, pulse, t_ms))
+        self.write_many(packets)
+
     def stop(self, sid: Optional[int] = None) -> None:
         self.write_cmd(sid, LOBOT_SERVO_MOVE_STOP)
 
-    def read_pos(self, sid: int):
-        self.read_cmd(sid, LOBOT_SERVO_POS_READ)
-        return self.get_reply(LOBOT_SERVO_POS_READ)
+    def rx_stats(self) -> Dict[str, int]:
+        """Counters for failed reads: replies that never came and frames with a bad checksum."""
+        return {"timeouts": self.reply_timeouts, "bad_checksum": self._parser.bad_checksum}
+
+    def read_pos(self, sid: int, timeout: float = REPLY_TIMEOUT_S):
+        return self.request(sid, LOBOT_SERVO_POS_READ, timeout)
+
+    def read_temp(self, sid: int, timeout: float = REPLY_TIMEOUT_S) -> Optional[int]:
+        """Internal temperature in degrees C."""
+        val = self.request(sid, LOBOT_SERVO_TEMP_READ, timeout)
+        return None if val is None or isinstance(val, (bool, tuple)) else val & 0xFF
+
+    def read_vin(self, sid: int, timeout: float = REPLY_TIMEOUT_S) -> Optional[int]:
+        """Input voltage in mV."""
+        val = self.request(sid, LOBOT_SERVO_VIN_READ, timeout)
+        return None if val is None or isinstance(val, (bool, tuple)) else val & 0xFFFF
+
+    def read_positions(self, sids: Iterable[int], timeout: float = REPLY_TIMEOUT_S,
+                       retries: int = 1) -> Dict[int, Optional[int]]:
+        """
+        Positions of several servos in one pass. Requests go out back to back
+        (the half-duplex bus allows one reply at a time), each waits only until
+        its reply frame is complete; joints that timed out are retried once.
+        """
+        sids = [int(sid) for sid in sids]
+        out: Dict[int, Optional[int]] = {sid: None for sid in sids}
+        pending = sids
+        for _ in range(1 + max(0, int(retries))):
+            for sid in pending:
+                out[sid] = self.read_pos(sid, timeout)
+            pending = [sid for sid in pending if out[sid] is None]
+            if not pending:
+                break
+        return out
 
     def unload(self, sid: int) -> None:
         self.write_cmd(sid, LOBOT_SERVO_LOAD_OR_UNLOAD_WRITE, 0)
@@ -155,7 +290,8 @@ class ServoController:
     def cleanup(self) -> None:
         try:
             if self.use_gpio and GPIO is not None:
-                GPIO.cleanup()
+                # only our direction pins; other subsystems keep their GPIO setup
+                GPIO.cleanup([self.rx_pin, self.tx_pin])
         except Exception:
             pass
         try:
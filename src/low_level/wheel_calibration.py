@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+# wheel_calibration.py
+# Per-wheel speed lookup tables for the mecanum drive.
+# Author: Daniel Würmli
+
+"""
+Per-wheel, per-direction speed lookup tables.
+
+Each wheel stores measured (register, mm/s) pairs separately for positive and
+negative register values. Requested wheel speeds are mapped back to register
+values by linear interpolation, which absorbs the motor dead band and the
+non-linear response that the plain `0.25 × mm/s` gain ignores.
+
+File layout (JSON):
+    {
+      "wheels": {
+        "0": {"pos": [[0, 0.0], [10, 0.0], [20, 61.5], ...],
+              "neg": [[0, 0.0], [10, 0.0], [20, 58.0], ...]},
+        ...
+      }
+    }
+Speeds are stored as magnitudes in the body-forward equivalent (the speed the
+robot would travel if all four wheels turned at that rate).
+"""
+
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+
+WHEEL_COUNT = 4
+DIRECTIONS = ("pos", "neg")
+REGISTER_MAX = 127
+
+Sample = Tuple[int, float]
+
+
+def _clean_samples(samples) -> List[Sample]:
+    """Sort by register, drop invalid rows and force a monotonic speed curve."""
+    rows = []
+    for row in samples or []:
+        try:
+            reg, speed = int(abs(int(row[0]))), abs(float(row[1]))
+        except (TypeError, ValueError, IndexError):
+            continue
+        if reg > REGISTER_MAX:
+            continue
+        rows.append((reg, speed))
+    rows.sort()
+    if not rows or rows[0][0] != 0:
+        rows.insert(0, (0, 0.0))
+    out: List[Sample] = []
+    best = 0.0
+    for reg, speed in rows:
+        if out and out[-1][0] == reg:
+            continue
+        # Measurement noise can produce a dip; keep the curve invertible.
+        best = max(best, speed)
+        out.append((reg, best))
+    return out
+
+
+class WheelSpeedTable:
+    """Lookup table mapping wheel speeds (mm/s) to motor register values."""
+
+    def __init__(self, wheels: Optional[Dict[int, Dict[str, List[Sample]]]] = None):
+        self._tables: Dict[int, Dict[str, List[Sample]]] = {}
+        for idx in range(WHEEL_COUNT):
+            per_dir = (wheels or {}).get(idx, {})
+            self._tables[idx] = {d: _clean_samples(per_dir.get(d)) for d in DIRECTIONS}
+
+    # ---------- Persistence ----------
+    @classmethod
+    def from_dict(cls, data: dict) -> "WheelSpeedTable":
+        wheels = {}
+        for key, per_dir in (data.get("wheels") or {}).items():
+            try:
+                idx = int(key)
+            except (TypeError, ValueError):
+                continue
+            if isinstance(per_dir, dict):
+                wheels[idx] = per_dir
+        return cls(wheels)
+
+    @classmethod
+    def load(cls, path: str) -> Optional["WheelSpeedTable"]:
+        """Return the table stored at path, or None when missing/unreadable."""
+        if not path or not os.path.exists(path):
+            return None
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except Exception as exc:
+            print(f"[WARN] Wheel calibration could not be read ({path}): {exc}")
+            return None
+        if not isinstance(data, dict):
+            return None
+        table = cls.from_dict(data)
+        return table if table.is_calibrated() else None
+
+    def to_dict(self) -> dict:
+        return {
+            "wheels": {
+                str(idx): {d: [list(s) for s in self._tables[idx][d]] for d in DIRECTIONS}
+                for idx in range(WHEEL_COUNT)
+            }
+        }
+
+    def save(self, path: str) -> None:
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    # ---------- Editing ----------
+    def set_samples(self, wheel: int, direction: str, samples) -> None:
+        if direction not in DIRECTIONS:
+            raise ValueError(f"Unknown wheel direction '{direction}'")
+        self._tables[int(wheel)][direction] = _clean_samples(samples)
+
+    def samples(self, wheel: int, direction: str) -> List[Sample]:
+        return list(self._tables[int(wheel)][direction])
+
+    def is_calibrated(self) -> bool:
+        """True when every wheel/direction has at least one moving sample."""
+        for idx in range(WHEEL_COUNT):
+            for d in DIRECTIONS:
+                if not any(speed > 0.0 for _, speed in self._tables[idx][d]):
+                    return False
+        return True
+
+    # ---------- Mapping ----------
+    def register_for_speed(self, wheel: int, speed_mm_s: float) -> int:
+        """
+        Signed register value that drives `wheel` at `speed_mm_s`.
+        Speeds inside the dead band map to the first register that moves the
+        wheel; speeds beyond the table extrapolate the last measured segment
+        up to REGISTER_MAX.
+        """
+        if speed_mm_s == 0:
+            return 0
+        direction = "pos" if speed_mm_s > 0 else "neg"
+        sign = 1 if speed_mm_s > 0 else -1
+        target = abs(float(speed_mm_s))
+        rows = self._tables[int(wheel)][direction]
+        moving = [i for i, (_, v) in enumerate(rows) if v > 0.0]
+        if not moving:
+            return sign * rows[-1][0]
+        first = moving[0]
+        if target <= rows[first][1]:
+            return sign * rows[first][0]
+        for (r0, v0), (r1, v1) in zip(rows[first:], rows[first + 1:]):
+            if target <= v1:
+                if v1 <= v0:
+                    return sign * r1
+                frac = (target - v0) / (v1 - v0)
+                return sign * int(round(r0 + frac * (r1 - r0)))
+        # Above the measured range: continue the slope of the last rising segment
+        r_last, v_last = rows[-1]
+        for r0, v0 in reversed(rows[first:-1]):
+            if v0 < v_last:
+                reg = r_last + (target - v_last) * (r_last - r0) / (v_last - v0)
+                return sign * min(REGISTER_MAX, int(round(reg)))
+        # Single moving sample: scale through the origin
+        return sign * min(REGISTER_MAX, int(round(r_last * target / v_last)))
+
+
+__all__ = ["WheelSpeedTable", "WHEEL_COUNT", "DIRECTIONS"]
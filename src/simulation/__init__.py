@@ -0,0 +1,12 @@
+#!/usr/bin/env python3
+# __init__.py
+# Headless simulation backend (virtual clock, mecanum kinematics, ray-cast LiDAR).
+# Author: Daniel Würmli
+
+"""Headless simulation backend (virtual clock, mecanum kinematics, ray-cast LiDAR)."""
+
+from .clock import VirtualClock
+from .world import SimWorld, WarehouseMap
+from .devices import SimMotorController, SimLidarDriver, SimBuzzer
+
+__all__ = ["VirtualClock", "SimWorld", "WarehouseMap", "SimMotorController", "SimLidarDriver", "SimBuzzer"]
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+# clock.py
+# Virtual clock that advances the simulated world instead of sleeping.
+# Author: Daniel Würmli
+
+"""
+Virtual clock.
+
+Provides the subset of the `time` module the navigation stack uses
+(`time()`, `monotonic()`, `sleep()`). `sleep(s)` steps the attached world in
+fixed physics increments and returns immediately, so missions run as fast as
+the CPU allows. A positive realtime_factor throttles the run (1.0 = wall
+clock speed, 4.0 = four times faster) for watching it on the LiDAR stream.
+"""
+
+import math
+import threading
+import time as _time
+
+
+class VirtualClock:
+    def __init__(self, world=None, step_s: float = 0.005, realtime_factor: float = 0.0):
+        self.world = world
+        self.step_s = float(step_s)
+        self.realtime_factor = float(realtime_factor or 0.0)
+        self._t = 0.0
+        self._lock = threading.RLock()
+
+    def time(self) -> float:
+        return self._t
+
+    monotonic = time
+
+    def sleep(self, seconds: float) -> None:
+        seconds = float(seconds)
+        if seconds <= 0.0:
+            return
+        with self._lock:
+            remaining = seconds
+            while remaining > 0.0:
+                dt = min(self.step_s, remaining)
+                if self.world is not None:
+                    self.world.step(dt)
+                remaining -= dt
+            # Always move forward, even for waits below float resolution, so
+            # `while clock.time() < deadline` loops cannot stall.
+            t = self._t + seconds
+            self._t = t if t > self._t else math.nextafter(self._t, math.inf)
+        if self.realtime_factor > 0.0:
+            _time.sleep(seconds / self.realtime_factor)
+
+
+__all__ = ["VirtualClock"]
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+# devices.py
+# Simulated stand-ins for the motor controller, MS200 LiDAR driver and buzzer.
+# Author: Daniel Würmli
+
+"""
+Simulated devices.
+
+SimMotorController keeps the MotorController mixing, ramp and speed table
+and only replaces the I2C register write, so MotorSystem runs unchanged on
+top of it. SimLidarDriver exposes the MS200Driver interface consumed by
+LiDARSystem and LidarStreamSystem.
+"""
+
+import threading
+
+from ..low_level.motor_controller import MotorController
+
+
+class SimMotorController(MotorController):
+    def __init__(self, world, ramp_step=3, g_vy=0.25, speed_table=None):
+        super().__init__(ramp_step=ramp_step, g_vy=g_vy, speed_table=speed_table)
+        self._world = world
+        self._regs = [0, 0, 0, 0]
+
+    def _write(self, idx: int, val: int):
+        self._regs[idx] = int(val)
+        self._world.set_wheels(self._regs)
+
+
+class SimLidarDriver:
+    """Same surface as MS200Driver: start(), stop(), get_points()."""
+
+    def __init__(self, world, offset_mm: float = 42.0):
+        self._world = world
+        self.offset_mm = float(offset_mm)
+        self._lock = threading.Lock()
+        self._scan = None
+        self._points = []
+        self.running = False
+
+    def start(self):
+        self.running = True
+
+    def stop(self):
+        self.running = False
+
+    def get_points(self):
+        if not self.running:
+            return []
+        with self._lock:
+            # The world caches one scan per tick; only convert it when a new one arrives.
+            scan = self._world.scan()
+            if scan is not self._scan:
+                pts = []
+                for ang, dist, inten in scan:
+                    v = dist - self.offset_mm
+                    if v > 0:
+                        pts.append((ang, v, inten))
+                self._points = pts
+                self._scan = scan
+            return list(self._points)
+
+
+class SimBuzzer:
+    """Buzzer that only logs; timed helpers wait on the virtual clock."""
+
+    def __init__(self, clock):
+        self._clock = clock
+        self.active = False
+
+    def on(self):
+        if not self.active:
+            print(f"[SIM] buzzer on  @ {self._clock.time():.2f}s")
+        self.active = True
+
+    def off(self):
+        if self.active:
+            print(f"[SIM] buzzer off @ {self._clock.time():.2f}s")
+        self.active = False
+
+    def beep(self, seconds=0.2):
+        self.on(); self._clock.sleep(seconds); self.off()
+
+    def pattern(self, on_ms=120, off_ms=120, times=3):
+        for _ in range(int(times)):
+            self.on();  self._clock.sleep(max(0.0, on_ms / 1000.0))
+            self.off(); self._clock.sleep(max(0.0, off_ms / 1000.0))
+
+    def close(self):
+        self.active = False
+
+
+__all__ = ["SimMotorController", "SimLidarDriver", "SimBuzzer"]
@@ -0,0 +1,208 @@
+#!/usr/bin/env python3
+# world.py
+# 2D warehouse map, mecanum base kinematics and vectorized LiDAR ray casting.
+# Author: Daniel Würmli
+
+"""
+Simulated world.
+
+Coordinates are millimetres in a right-handed world frame; the heading is
+the direction of the robot's forward axis (0 = +x, counter-clockwise
+positive). Map file layout (JSON):
+
+    {
+      "walls": [[[x, y], [x, y], ...], ...],   # polylines, closed when first == last
+      "start": {"x": -191, "y": 228, "heading_deg": 0}
+    }
+"""
+
+import json
+import math
+import os
+import threading
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from ..low_level.motor_controller import FWD, LEFT, CCW
+
+MAPS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "maps")
+DEFAULT_MAP = os.path.join(MAPS_DIR, "warehouse.json")
+
+# Mixing vectors are orthogonal, so each body axis is recovered by projection.
+_FWD = np.array(FWD, dtype=float)
+_LEFT = np.array(LEFT, dtype=float)
+_CCW = np.array(CCW, dtype=float)
+
+
+class WarehouseMap:
+    """Wall segments of the warehouse as an (N, 4) array of x1, y1, x2, y2."""
+
+    def __init__(self, segments, start: Optional[dict] = None):
+        segs = np.asarray(segments, dtype=float).reshape(-1, 4)
+        if not len(segs):
+            raise ValueError("Simulation map has no walls")
+        self.segments = segs
+        self.start = dict(start or {})
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WarehouseMap":
+        segments = []
+        for line in data.get("walls") or []:
+            pts = [(float(p[0]), float(p[1])) for p in line]
+            for (x1, y1), (x2, y2) in zip(pts, pts[1:]):
+                segments.append((x1, y1, x2, y2))
+        return cls(segments, data.get("start"))
+
+    @classmethod
+    def load(cls, path: str = DEFAULT_MAP) -> "WarehouseMap":
+        with open(path, "r") as f:
+            return cls.from_dict(json.load(f))
+
+    def raycast(self, ox: float, oy: float, angles_rad: np.ndarray, max_range: float) -> np.ndarray:
+        """Distance to the nearest wall along every ray (inf when nothing within max_range)."""
+        dx = np.cos(angles_rad)[:, None]
+        dy = np.sin(angles_rad)[:, None]
+        x1, y1, x2, y2 = (self.segments[:, i][None, :] for i in range(4))
+        ex, ey = x2 - x1, y2 - y1
+        wx, wy = x1 - ox, y1 - oy
+        denom = dx * ey - dy * ex
+        with np.errstate(divide="ignore", invalid="ignore"):
+            t = (wx * ey - wy * ex) / denom
+            u = (wx * dy - wy * dx) / denom
+        hit = (np.abs(denom) > 1e-9) & (t > 0.0) & (u >= 0.0) & (u <= 1.0)
+        dist = np.where(hit, t, np.inf).min(axis=1)
+        dist[dist > max_range] = np.inf
+        return dist
+
+    def clearance(self, px: float, py: float) -> float:
+        """Shortest distance from a point to any wall."""
+        x1, y1, x2, y2 = (self.segments[:, i] for i in range(4))
+        ex, ey = x2 - x1, y2 - y1
+        len2 = np.maximum(ex * ex + ey * ey, 1e-9)
+        u = np.clip(((px - x1) * ex + (py - y1) * ey) / len2, 0.0, 1.0)
+        cx, cy = x1 + u * ex, y1 + u * ey
+        return float(np.sqrt((px - cx) ** 2 + (py - cy) ** 2).min())
+
+
+class SimWorld:
+    """
+    Mecanum base on a warehouse map.
+
+    Wheel registers follow the MotorController convention; each wheel tracks
+    its commanded register with a first-order lag (motor_tau_s). Forward and
+    strafe speeds use the controller gain (register / g_vy = mm/s). Yaw
+    pulses below yaw_deadband_pulses do not turn the base (roller friction),
+    the rest turn it at yaw_deg_s_per_pulse; both are fitted so the turn
+    heuristics in NavigationSystem land a 90 deg command at 90 deg.
+    """
+
+    def __init__(self, wmap: WarehouseMap, g_vy: float = 0.25, yaw_deg_s_per_pulse: float = 2.02,
+                 yaw_deadband_pulses: float = 6.0, strafe_efficiency: float = 0.8, motor_tau_s: float = 0.08,
+                 robot_radius_mm: float = 130.0, lidar_step_deg: float = 0.8, lidar_max_mm: float = 12000.0,
+                 lidar_noise_mm: float = 0.0, seed: Optional[int] = 0):
+        self.map = wmap
+        self.g_vy = float(g_vy)
+        self.yaw_gain = math.radians(float(yaw_deg_s_per_pulse))
+        self.yaw_deadband = max(0.0, float(yaw_deadband_pulses))
+        self.strafe_efficiency = float(strafe_efficiency)
+        self.motor_tau_s = max(0.0, float(motor_tau_s))
+        self.robot_radius_mm = float(robot_radius_mm)
+        self.lidar_max_mm = float(lidar_max_mm)
+        self.lidar_noise_mm = float(lidar_noise_mm)
+        # LiDAR angles (0 = right, 180 = left, 270 = front) and their bearing relative to forward
+        self._lidar_deg = np.arange(0.0, 360.0, float(lidar_step_deg))
+        self._lidar_rel = np.radians(270.0 - self._lidar_deg)
+        self.seed = seed
+        self._lock = threading.Lock()
+
+        start = wmap.start
+        self.x = float(start.get("x", 0.0))
+        self.y = float(start.get("y", 0.0))
+        self.heading = math.radians(float(start.get("heading_deg", 0.0)))
+        self.t = 0.0
+        self.ticks = 0
+        self.collisions = 0
+        self._scan_tick = -1
+        self._scan: List[Tuple[float, float, int]] = []
+        self._cmd = np.zeros(4)
+        self._wheels = np.zeros(4)
+
+    @classmethod
+    def from_cfg(cls, sim_cfg: dict, map_path: Optional[str] = None) -> "SimWorld":
+        sim_cfg = sim_cfg if isinstance(sim_cfg, dict) else {}
+        wmap = WarehouseMap.load(map_path or sim_cfg.get("map") or DEFAULT_MAP)
+        return cls(
+            wmap,
+            yaw_deg_s_per_pulse=float(sim_cfg.get("yaw_deg_s_per_pulse", 2.02)),
+            yaw_deadband_pulses=float(sim_cfg.get("yaw_deadband_pulses", 6.0)),
+            strafe_efficiency=float(sim_cfg.get("strafe_efficiency", 0.8)),
+            motor_tau_s=float(sim_cfg.get("motor_tau_s", 0.08)),
+            robot_radius_mm=float(sim_cfg.get("robot_radius_mm", 130.0)),
+            lidar_step_deg=float(sim_cfg.get("lidar_step_deg", 0.8)),
+            lidar_noise_mm=float(sim_cfg.get("lidar_noise_mm", 0.0)),
+            seed=sim_cfg.get("seed", 0),
+        )
+
+    # ---------- Actuation ----------
+    def set_wheels(self, registers) -> None:
+        with self._lock:
+            self._cmd = np.asarray([float(r) for r in registers], dtype=float)
+
+    def body_velocity(self) -> Tuple[float, float, float]:
+        """(vx mm/s forward, vy mm/s left, wz rad/s CCW) from the current wheel state."""
+        w = self._wheels
+        vx = float(_FWD @ w) / 4.0 / self.g_vy
+        vy = float(_LEFT @ w) / 4.0 / self.g_vy * self.strafe_efficiency
+        yaw = float(_CCW @ w) / 4.0
+        wz = math.copysign(max(0.0, abs(yaw) - self.yaw_deadband), yaw) * self.yaw_gain
+        return vx, vy, wz
+
+    def step(self, dt: float) -> None:
+        with self._lock:
+            if self.motor_tau_s > 0.0:
+                self._wheels += (self._cmd - self._wheels) * (1.0 - math.exp(-dt / self.motor_tau_s))
+            else:
+                self._wheels = self._cmd.copy()
+            vx, vy, wz = self.body_velocity()
+            c, s = math.cos(self.heading), math.sin(self.heading)
+            nx = self.x + (vx * c - vy * s) * dt
+            ny = self.y + (vx * s + vy * c) * dt
+            if self.map.clearance(nx, ny) < self.robot_radius_mm:
+                if self.collisions == 0:
+                    print(f"[SIM] Collision at x={nx:.0f} y={ny:.0f}; translation blocked")
+                self.collisions += 1
+            else:
+                self.x, self.y = nx, ny
+            self.heading = (self.heading + wz * dt + math.pi) % (2.0 * math.pi) - math.pi
+            self.t += dt
+            self.ticks += 1
+
+    # ---------- Sensing ----------
+    def scan(self) -> List[Tuple[float, float, int]]:
+        """
+        One LiDAR revolution as (angle_deg, distance_mm, intensity) from the sensor centre.
+        Cached per physics tick with noise drawn from (seed, tick), so extra readers such
+        as the LiDAR stream thread cannot change what the navigation sees.
+        """
+        with self._lock:
+            x, y, heading, tick = self.x, self.y, self.heading, self.ticks
+            if tick == self._scan_tick:
+                return self._scan
+        dist = self.map.raycast(x, y, heading + self._lidar_rel, self.lidar_max_mm)
+        if self.lidar_noise_mm > 0.0:
+            rng = np.random.default_rng(None if self.seed is None else (int(self.seed), tick))
+            dist = dist + rng.normal(0.0, self.lidar_noise_mm, size=dist.shape)
+        ok = np.isfinite(dist)
+        pts = [(float(a), float(d), 100) for a, d in zip(self._lidar_deg[ok], dist[ok])]
+        with self._lock:
+            if tick == self.ticks:
+                self._scan_tick, self._scan = tick, pts
+        return pts
+
+    def pose(self) -> Tuple[float, float, float]:
+        with self._lock:
+            return self.x, self.y, math.degrees(self.heading)
+
+
+__all__ = ["WarehouseMap", "SimWorld", "DEFAULT_MAP", "MAPS_DIR"]
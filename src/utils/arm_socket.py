@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+# arm_socket.py
+# Client side of the arm daemon socket protocol (stdlib only, imported before the control stack).
+# Author: Daniel Würmli
+
+"""
+Arm daemon protocol.
+
+The daemon (--arm_daemon) owns the servo bus and listens on a Unix domain
+socket. Each connection carries one request and one reply, both a single
+line of JSON:
+
+    {"argv": ["--arm_home", "--arm_gripper_open"]}        arm flags, as on the CLI
+    {"batch": [{"module": "home", "kwargs": {}}, ...]}     arm modes by name
+    {"op": "ping"} or {"op": "telemetry"}
+
+    {"ok": true, "output": "...", "results": [...], "elapsed_s": 0.84}
+    {"ok": false, "error": "...", "output": "..."}
+
+forward_cli() is called by the CLI entry point before the control stack is
+imported: when every flag is an arm flag and a daemon answers, the command
+runs there and the CLI never opens the serial port itself.
+"""
+
+import json
+import os
+import socket
+import sys
+from typing import List, Optional
+
+DEFAULT_SOCKET = os.environ.get("LOADLIFTER_ARM_SOCKET", "/tmp/loadlifter_arm.sock")
+CONNECT_TIMEOUT_S = 0.2
+
+# Flags that always run in-process (daemon control, interactive modes)
+LOCAL_FLAGS = {"--arm_daemon", "--arm_direct", "--arm_calibrate"}
+
+
+def connect(path: str = DEFAULT_SOCKET, timeout: float = CONNECT_TIMEOUT_S) -> Optional[socket.socket]:
+    """Connected socket to a running daemon, or None when none is listening."""
+    if not path or not os.path.exists(path):
+        return None
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(path)
+    except OSError:
+        sock.close()
+        return None
+    sock.settimeout(None)
+    return sock
+
+
+def send_line(sock: socket.socket, payload: dict) -> None:
+    sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+
+
+def recv_line(sock: socket.socket) -> Optional[dict]:
+    buf = bytearray()
+    while not buf.endswith(b"\n"):
+        chunk = sock.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    if not buf.strip():
+        return None
+    return json.loads(buf.decode("utf-8"))
+
+
+def request(payload: dict, path: str = DEFAULT_SOCKET, timeout: Optional[float] = None) -> Optional[dict]:
+    """Send one request; returns the reply, or None when no daemon is running."""
+    sock = connect(path)
+    if sock is None:
+        return None
+    try:
+        sock.settimeout(timeout)
+        send_line(sock, payload)
+        reply = recv_line(sock)
+    finally:
+        sock.close()
+    if reply is None:
+        raise ConnectionError("arm daemon closed the connection without a reply")
+    return reply
+
+
+def socket_path_from_argv(argv: List[str]) -> str:
+    for i, tok in enumerate(argv):
+        if tok == "--arm_socket" and i + 1 < len(argv):
+            return argv[i + 1]
+        if tok.startswith("--arm_socket="):
+            return tok.split("=", 1)[1]
+    return DEFAULT_SOCKET
+
+
+def forward_cli(argv: List[str]) -> Optional[int]:
+    """
+    Run an arm-only command line on the daemon. Returns the exit code, or None
+    when the command has to run in-process (other flags, --arm_direct, no daemon).
+    """
+    flags = [tok.split("=", 1)[0] for tok in argv if tok.startswith("--")]
+    if not flags or any(not f.startswith("--arm_") or f in LOCAL_FLAGS for f in flags):
+        return None
+    try:
+        reply = request({"argv": list(argv)}, socket_path_from_argv(argv))
+    except (OSError, ValueError) as exc:
+        # the daemon may have moved the arm already, so do not retry in-process
+        print(f"[FATAL] Arm daemon request failed: {exc}")
+        return 1
+    if reply is None:
+        return None
+    output = reply.get("output") or ""
+    if output:
+        sys.stdout.write(output if output.endswith("\n") else output + "\n")
+    if not reply.get("ok"):
+        print(f"[FATAL] {reply.get('error', 'arm daemon request failed')}")
+        return int(reply.get("code", 1))
+    return 0
+
+
+__all__ = ["DEFAULT_SOCKET", "LOCAL_FLAGS", "connect", "request", "send_line", "recv_line",
+           "socket_path_from_argv", "forward_cli"]
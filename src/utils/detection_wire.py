@@ -0,0 +1,116 @@
+#!/usr/bin/env python3
+# detection_wire.py
+# Wire format for detection boxes pushed to the camera bridge (stdlib only).
+# Author: Daniel Würmli
+
+"""
+Detection push format (POST /push_detections).
+
+Instead of an annotated JPEG the overlay client sends the boxes it found and
+the sequence number of the camera frame it ran on (the X-Frame-Seq header of
+the /raw stream). Two encodings:
+
+JSON (Content-Type application/json):
+
+    {"seq": 1234, "width": 1280, "height": 720,
+     "boxes": [[x1, y1, x2, y2, cls, conf], ...],
+     "names": {"0": "box", ...}}                          names optional
+
+    A message with only "names" updates the class names and nothing else.
+
+Binary (Content-Type application/x-boxes), little endian:
+
+    header  uint32 seq (0xFFFFFFFF = unknown), uint16 width, uint16 height, uint16 count
+    box     uint16 x1, y1, x2, y2, uint8 cls, uint8 conf * 255
+
+Box coordinates are pixels of the frame as received. A frame with three
+boxes is 40 bytes in binary.
+"""
+
+import json
+import struct
+from typing import Dict, List, Optional, Tuple
+
+CONTENT_TYPE_JSON = "application/json"
+CONTENT_TYPE_BINARY = "application/x-boxes"
+
+HEADER = struct.Struct("<IHHH")
+BOX = struct.Struct("<4HBB")
+NO_SEQ = 0xFFFFFFFF
+
+Box = Tuple[int, int, int, int, int, float]     # x1, y1, x2, y2, cls, conf
+
+
+def _u16(v) -> int:
+    return min(0xFFFF, max(0, int(round(float(v)))))
+
+
+def pack(seq: Optional[int], width: int, height: int, boxes: List[Box]) -> bytes:
+    out = [HEADER.pack(NO_SEQ if seq is None else int(seq) & 0xFFFFFFFF, _u16(width), _u16(height), len(boxes))]
+    for x1, y1, x2, y2, cls, conf in boxes:
+        if not 0 <= int(cls) <= 0xFF:
+            raise ValueError(f"class id {cls} does not fit the binary format (use JSON)")
+        out.append(BOX.pack(_u16(x1), _u16(y1), _u16(x2), _u16(y2), int(cls),
+                            min(255, max(0, int(round(float(conf) * 255))))))
+    return b"".join(out)
+
+
+def unpack(buf: bytes) -> dict:
+    if len(buf) < HEADER.size:
+        raise ValueError("short header")
+    seq, width, height, count = HEADER.unpack_from(buf, 0)
+    if len(buf) != HEADER.size + count * BOX.size:
+        raise ValueError(f"expected {count} boxes, got {len(buf) - HEADER.size} bytes")
+    boxes = []
+    for i in range(count):
+        x1, y1, x2, y2, cls, conf = BOX.unpack_from(buf, HEADER.size + i * BOX.size)
+        boxes.append((x1, y1, x2, y2, cls, conf / 255.0))
+    return {"seq": None if seq == NO_SEQ else seq, "width": width, "height": height, "boxes": boxes, "names": None}
+
+
+def to_json(seq: Optional[int], width: int, height: int, boxes: List[Box],
+            names: Optional[Dict[int, str]] = None) -> bytes:
+    msg = {"seq": seq, "width": int(width), "height": int(height),
+           "boxes": [[int(x1), int(y1), int(x2), int(y2), int(c), round(float(p), 3)] for x1, y1, x2, y2, c, p in boxes]}
+    if names:
+        msg["names"] = {str(k): str(v) for k, v in names.items()}
+    return json.dumps(msg, separators=(",", ":")).encode("utf-8")
+
+
+def names_json(names: Dict[int, str]) -> bytes:
+    return json.dumps({"names": {str(k): str(v) for k, v in names.items()}}).encode("utf-8")
+
+
+def from_json(buf: bytes) -> dict:
+    try:
+        msg = json.loads(buf)
+    except (UnicodeDecodeError, json.JSONDecodeError) as exc:
+        raise ValueError(f"invalid JSON ({exc})") from None
+    if not isinstance(msg, dict):
+        raise ValueError("expected a JSON object")
+    names = msg.get("names")
+    out = {"seq": None, "width": 0, "height": 0, "boxes": None,
+           "names": {int(k): str(v) for k, v in names.items()} if isinstance(names, dict) else None}
+    if "boxes" not in msg:
+        return out
+    try:
+        out["seq"] = None if msg.get("seq") is None else int(msg["seq"])
+        out["width"], out["height"] = int(msg["width"]), int(msg["height"])
+        out["boxes"] = [(int(b[0]), int(b[1]), int(b[2]), int(b[3]), int(b[4]), float(b[5])) for b in msg["boxes"]]
+    except (KeyError, TypeError, ValueError, IndexError) as exc:
+        raise ValueError(f"malformed detections ({exc})") from None
+    return out
+
+
+def decode(body: bytes, content_type: Optional[str]) -> dict:
+    """Parse a push by content type; "boxes" is None for a names-only message. Raises ValueError."""
+    kind = (content_type or "").split(";")[0].strip().lower()
+    if kind == CONTENT_TYPE_BINARY:
+        return unpack(body)
+    if kind == CONTENT_TYPE_JSON:
+        return from_json(body)
+    raise ValueError(f"unsupported content type '{content_type}'")
+
+
+__all__ = ["pack", "unpack", "to_json", "from_json", "names_json", "decode",
+           "CONTENT_TYPE_JSON", "CONTENT_TYPE_BINARY"]
@@ -0,0 +1,216 @@
+#!/usr/bin/env python3
+# timeline.py
+# Mission timeline profiler: records start, end and outcome of every step.
+# Author: Daniel Würmli
+
+"""
+Mission timeline.
+
+Instrumented code calls `span(kind, name)` around a step; nothing is recorded
+unless a Timeline has been activated (control_system --timeline), so the
+hooks cost one global lookup otherwise.
+
+    with span("nav", "rotate_left_deg") as s:
+        ...
+        s.outcome = "done"
+
+At the end of a mission the timeline is written as JSON and `summary()` lists
+the time per kind and the slowest individual steps.
+"""
+
+import json
+import os
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+class Span:
+    """One recorded step; times are seconds relative to the timeline start."""
+
+    __slots__ = ("kind", "name", "start", "end", "outcome", "depth", "thread", "meta")
+
+    def __init__(self, kind: str, name: str, start: float, depth: int = 0, thread: str = "", meta: dict = None):
+        self.kind = kind
+        self.name = name
+        self.start = start
+        self.end: Optional[float] = None
+        self.outcome = None
+        self.depth = depth
+        self.thread = thread
+        self.meta = meta or {}
+
+    @property
+    def duration(self) -> float:
+        return 0.0 if self.end is None else self.end - self.start
+
+    def to_dict(self) -> dict:
+        out = {
+            "kind": self.kind,
+            "name": self.name,
+            "start_s": round(self.start, 4),
+            "end_s": None if self.end is None else round(self.end, 4),
+            "duration_s": round(self.duration, 4),
+            "outcome": self.outcome if isinstance(self.outcome, (str, int, float, bool, type(None))) else str(self.outcome),
+            "depth": self.depth,
+            "thread": self.thread,
+        }
+        if self.meta:
+            out["meta"] = self.meta
+        return out
+
+
+class _SpanContext:
+    def __init__(self, timeline: "Timeline", span: Span):
+        self._timeline = timeline
+        self._span = span
+
+    def __enter__(self) -> Span:
+        return self._span
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None and self._span.outcome is None:
+            self._span.outcome = f"error:{exc_type.__name__}"
+        self._timeline._close(self._span)
+        return False
+
+
+class _NullSpan:
+    """Stand-in used while no timeline is active; attribute writes are ignored."""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *_):
+        return False
+
+    def __setattr__(self, key, value):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Timeline:
+    def __init__(self, name: str = "mission", clock: Callable[[], float] = time.monotonic):
+        self.name = name
+        self._clock = clock
+        self._t0 = clock()
+        self._wall_start = time.time()
+        self._spans: List[Span] = []
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._main_thread = threading.current_thread().name
+
+    def now(self) -> float:
+        return self._clock() - self._t0
+
+    # ---------- Recording ----------
+    def span(self, kind: str, name: str, **meta) -> _SpanContext:
+        stack = self._stack()
+        span = Span(kind, name, self.now(), depth=len(stack),
+                    thread=threading.current_thread().name, meta=meta)
+        stack.append(span)
+        with self._lock:
+            self._spans.append(span)
+        return _SpanContext(self, span)
+
+    def record(self, kind: str, name: str, duration_s: float, outcome=None, **meta) -> Span:
+        """Add a finished step that starts now and lasts duration_s (e.g. a commanded servo move)."""
+        start = self.now()
+        span = Span(kind, name, start, depth=len(self._stack()),
+                    thread=threading.current_thread().name, meta=meta)
+        span.end = start + max(0.0, float(duration_s))
+        span.outcome = outcome
+        with self._lock:
+            self._spans.append(span)
+        return span
+
+    def _stack(self) -> list:
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        return stack
+
+    def _close(self, span: Span) -> None:
+        span.end = self.now()
+        stack = self._stack()
+        if span in stack:
+            del stack[stack.index(span):]
+
+    # ---------- Output ----------
+    def spans(self) -> List[Span]:
+        with self._lock:
+            return list(self._spans)
+
+    def to_dict(self) -> dict:
+        spans = self.spans()
+        return {
+            "name": self.name,
+            "started_at": time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(self._wall_start)),
+            "total_s": round(self.now(), 4),
+            "spans": [s.to_dict() for s in spans],
+        }
+
+    def write(self, path: str) -> str:
+        folder = os.path.dirname(os.path.abspath(path))
+        os.makedirs(folder, exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+        return path
+
+    def summary(self, top: int = 10) -> str:
+        """
+        Human-readable breakdown: time per kind and the slowest steps. The per-kind
+        totals only count top-level steps of the mission thread, so work that runs
+        in parallel (arm tasks in a worker thread) does not add up twice.
+        """
+        spans = [s for s in self.spans() if s.end is not None]
+        total = self.now()
+        lines = [f"[TIMELINE] {self.name}: {total:.2f}s total, {len(spans)} steps"]
+
+        per_kind = {}
+        for s in spans:
+            if s.depth == 0 and s.thread == self._main_thread:
+                per_kind[s.kind] = per_kind.get(s.kind, 0.0) + s.duration
+        for kind, dur in sorted(per_kind.items(), key=lambda kv: -kv[1]):
+            share = (100.0 * dur / total) if total > 0 else 0.0
+            lines.append(f"  {kind:<8} {dur:8.2f}s  {share:5.1f}%")
+
+        lines.append(f"  slowest {min(top, len(spans))} steps:")
+        for s in sorted(spans, key=lambda s: -s.duration)[:top]:
+            outcome = "" if s.outcome is None else f" -> {s.outcome}"
+            lines.append(f"    {s.duration:7.2f}s  @{s.start:7.2f}s  {s.kind}:{s.name}{outcome}")
+        return "\n".join(lines)
+
+
+# ---------- Active timeline ----------
+_active: Optional[Timeline] = None
+
+
+def activate(timeline: Optional[Timeline]) -> Optional[Timeline]:
+    """Make timeline the target of span()/record(); pass None to stop recording."""
+    global _active
+    _active = timeline
+    return timeline
+
+
+def current() -> Optional[Timeline]:
+    return _active
+
+
+def span(kind: str, name: str, **meta):
+    """Context manager recording one step on the active timeline (no-op when inactive)."""
+    timeline = _active
+    if timeline is None:
+        return _NULL_SPAN
+    return timeline.span(kind, name, **meta)
+
+
+def record(kind: str, name: str, duration_s: float, outcome=None, **meta) -> None:
+    timeline = _active
+    if timeline is not None:
+        timeline.record(kind, name, duration_s, outcome=outcome, **meta)
+
+
+__all__ = ["Timeline", "Span", "activate", "current", "span", "record"]
@@ -3,9 +3,180 @@
 # YOLO overlay client for the Pi video stream.
 # Author: Daniel Würmli
 
-import argparse, time, requests, cv2, os
+"""
+Overlay client, run as a pipeline of four threads:
+
+    capture -> inference -> pack (or annotate/encode) -> upload
+
+Neighbouring stages are connected by drop-oldest slots of size one: a stage
+always takes the newest result of the previous one and never works through a
+backlog. While the network runs on frame n, frame n-1 is encoded and frame
+n-2 uploaded, so the overlay rate is set by the slowest stage instead of the
+sum of all of them. Uploads reuse one keep-alive HTTP session.
+
+By default only the boxes go back to the Pi (--push detections): a few
+dozen bytes per frame, tagged with the X-Frame-Seq of the /raw part they were
+found on, and the Pi draws them onto its own copy of that frame. --push jpeg
+sends the annotated frame instead (old behaviour).
+
+--track N runs YOLO only on every N-th frame (and earlier when the tracker
+starts losing boxes); on the frames in between BoxTracker moves the last
+boxes along with sparse optical flow, so boxes update at stream rate.
+--fps then caps the YOLO runs only.
+
+Per-stage timings are printed every --report seconds.
+"""
+
+import argparse, os, queue, threading, time
+import cv2, numpy as np, requests
 from ultralytics import YOLO
 
+from ..low_level.box_tracker import BoxTracker
+from ..low_level.detector import Detection
+from ..utils import detection_wire
+
+
+class Latest:
+    """Drop-oldest queue of size one: put() replaces an item nobody has taken yet."""
+    def __init__(self):
+        self.q = queue.Queue(maxsize=1)
+        self.dropped = 0
+
+    def put(self, item):
+        while True:
+            try:
+                self.q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.q.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    pass
+
+    def get(self, timeout=0.5):
+        try:
+            return self.q.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+
+class Stage(threading.Thread):
+    """Runs fn on the newest item of inq and puts the result into outq; items start with the capture time."""
+    def __init__(self, name, fn, stop, inq=None, outq=None, min_dt=0.0):
+        super().__init__(name=name, daemon=True)
+        self.fn, self.stop, self.inq, self.outq, self.min_dt = fn, stop, inq, outq, min_dt
+        self.n = 0
+        self.busy = 0.0
+        self.last = 0.0
+
+    def run(self):
+        while not self.stop.is_set():
+            if self.min_dt:
+                wait = self.last + self.min_dt - time.time()
+                if wait > 0 and self.stop.wait(wait):
+                    break
+            item = None
+            if self.inq is not None:
+                item = self.inq.get()
+                if item is None:
+                    continue
+            self.last = time.time()
+            t0 = time.perf_counter()
+            try:
+                out = self.fn(item)
+            except Exception as exc:
+                print(f"[WARN] {self.name}: {exc}")
+                out = None
+            if out is None:
+                continue
+            self.busy += time.perf_counter() - t0
+            self.n += 1
+            if self.outq is not None:
+                self.outq.put(out)
+
+    def take(self):
+        """(count, busy seconds) since the last call."""
+        n, busy = self.n, self.busy
+        self.n, self.busy = 0, 0.0
+        return n, busy
+
+
+def mjpeg_parts(session, url, timeout=5.0):
+    """(seq, jpeg bytes) for each part of a multipart MJPEG stream; seq None without X-Frame-Seq."""
+    with session.get(url, stream=True, timeout=timeout) as resp:
+        resp.raise_for_status()
+        buf = bytearray()
+        for chunk in resp.iter_content(chunk_size=65536):
+            buf += chunk
+            while True:
+                start = buf.find(b"--frame")
+                head_end = buf.find(b"\r\n\r\n", start) if start >= 0 else -1
+                if head_end < 0:
+                    break
+                headers = {}
+                for line in bytes(buf[start:head_end]).split(b"\r\n")[1:]:
+                    k, _, v = line.decode("latin-1").partition(":")
+                    headers[k.strip().lower()] = v.strip()
+                body = head_end + 4
+                if "content-length" in headers:
+                    end = body + int(headers["content-length"])
+                    if len(buf) < end:
+                        break
+                else:
+                    eoi = buf.find(b"\xff\xd9", body)
+                    if eoi < 0:
+                        break
+                    end = eoi + 2
+                seq = headers.get("x-frame-seq")
+                yield (int(seq) if seq else None), bytes(buf[body:end])
+                del buf[:end]
+
+
+def detections_of(r, names):
+    """ultralytics result -> [Detection, ...] in frame pixels."""
+    b = r.boxes
+    if b is None or not len(b):
+        return []
+    xyxy, cls, conf = b.xyxy.cpu().numpy().astype(int), b.cls.cpu().numpy().astype(int), b.conf.cpu().numpy()
+    return [Detection(int(c), names.get(int(c), str(c)), float(p), tuple(box.tolist()))
+            for box, c, p in zip(xyxy, cls, conf)]
+
+
+def draw(img, dets):
+    for d in dets:
+        x1, y1, x2, y2 = d.box
+        cv2.rectangle(img, (x1, y1), (x2, y2), (0, 200, 255), 2)
+        cv2.putText(img, f"{d.name} {d.conf:.2f}", (x1, max(12, y1 - 4)), cv2.FONT_HERSHEY_SIMPLEX, 0.5,
+                    (0, 200, 255), 1, cv2.LINE_AA)
+    return img
+
+
+def report(stages, net, period):
+    """One line per period: ms per item and items/s for each stage, frames dropped between stages."""
+    parts = []
+    for s in stages:
+        n, busy = s.take()
+        ms = 1000.0 * busy / n if n else 0.0
+        text = f"{s.name} {ms:.0f} ms {n / period:.1f}/s"
+        if s.outq is not None and s.outq.dropped:
+            text += f" ({s.outq.dropped} dropped)"
+            s.outq.dropped = 0
+        parts.append(text)
+    if net["latency"] is not None:
+        parts.append(f"capture-to-push {1000.0 * net['latency']:.0f} ms")
+    if net["detected"] or net["tracked"]:
+        parts.append(f"{net['detected']} detected + {net['tracked']} tracked frames")
+        net["detected"] = net["tracked"] = 0
+    if net["sent"]:
+        parts.append(f"uplink {net['bytes'] / net['sent']:.0f} B/frame")
+        net["bytes"] = net["sent"] = 0
+    if net["failed"]:
+        parts.append(f"{net['failed']} uploads failed")
+        net["failed"] = 0
+    return "[INFO] " + " | ".join(parts)
+
+
 def main():
     ap = argparse.ArgumentParser(description="Run YOLO overlay on MJPEG stream from Pi")
     default_model = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..", "models", "best.pt"))
@@ -20,8 +191,14 @@ def main():
     ap.add_argument("--source", type=str, help="Optional explicit MJPEG source URL")
     ap.add_argument("--conf", type=float, default=0.25)
     ap.add_argument("--imgsz", type=int, default=640)
-    ap.add_argument("--fps", type=int, default=7) 
+    ap.add_argument("--fps", type=int, default=7, help="Max. inference rate (0 = as fast as possible)")
     ap.add_argument("--q", type=int, default=80)
+    ap.add_argument("--report", type=float, default=5.0, help="Seconds between stage timing reports (0 = off)")
+    ap.add_argument("--push", choices=["detections", "jpeg"], default="detections",
+                    help="Send boxes for the Pi to draw (default) or annotated JPEGs")
+    ap.add_argument("--wire", choices=["binary", "json"], default="binary", help="Box encoding for --push detections")
+    ap.add_argument("--track", type=int, default=0,
+                    help="Run YOLO every N frames and track boxes in between (0/1 = YOLO on every frame)")
     args = ap.parse_args()
 
     model_path = args.model
@@ -29,26 +206,107 @@ def main():
         raise SystemExit(f"Model file not found: {model_path}")
     model = YOLO(model_path)
     source_url = args.source if args.source else args.pi.rstrip("/") + "/raw"
-    cap = cv2.VideoCapture(source_url)
-    if not cap.isOpened(): raise SystemExit(f"Could not open stream: {source_url}")
-
-    min_dt = 1.0/max(1,args.fps); last=0
-    push_url = args.pi.rstrip("/") + "/push"
-    while True:
-        ok, frame = cap.read()
-        if not ok: time.sleep(0.01); continue
-        now = time.time()
-        if now - last < min_dt:
-            time.sleep(0.001); continue
-        last = now
+    base = args.pi.rstrip("/")
+    session = requests.Session()    # one keep-alive connection instead of a new one per frame
+    net = {"failed": 0, "latency": None, "bytes": 0, "sent": 0, "detected": 0, "tracked": 0}
+    boxes = args.push == "detections"
+    push_url = base + ("/push_detections" if boxes else "/push")
+    ctype = "image/jpeg"
+    if boxes:
+        ctype = detection_wire.CONTENT_TYPE_BINARY if args.wire == "binary" else detection_wire.CONTENT_TYPE_JSON
+
+    def parts():
+        # /raw parts carry the Pi's frame seq; reconnect when the stream drops
+        reader = requests.Session()
+        while True:
+            try:
+                yield from mjpeg_parts(reader, source_url)
+            except (requests.RequestException, ValueError) as exc:
+                print(f"[WARN] Stream {source_url}: {exc}")
+            time.sleep(0.5)
+    stream = parts()
+
+    def capture(_):
+        seq, jpg = next(stream)
+        frame = cv2.imdecode(np.frombuffer(jpg, np.uint8), cv2.IMREAD_COLOR)
+        return None if frame is None else (time.time(), seq, frame)
+
+    min_dt = 1.0 / args.fps if args.fps > 0 else 0.0
+    tracker = BoxTracker() if args.track > 1 else None
+    next_yolo = [0.0]
+
+    def infer(item):
+        t, seq, frame = item
+        if tracker is not None:
+            gray = tracker.prepare(frame)
+            if not (tracker.due(args.track) and time.time() >= next_yolo[0]):
+                net["tracked"] += 1
+                return t, seq, frame, tracker.update(gray), None
+            next_yolo[0] = time.time() + min_dt
         r = model.predict(frame, conf=args.conf, imgsz=args.imgsz, verbose=False)[0]
-        ann = r.plot()
-        ok2, jpg = cv2.imencode(".jpg", ann, [int(cv2.IMWRITE_JPEG_QUALITY), int(args.q)])
-        if not ok2: continue
+        dets = detections_of(r, model.names)
+        if tracker is not None:
+            tracker.reset(gray, dets)
+        net["detected"] += 1
+        return t, seq, frame, dets, r
+
+    def encode(item):
+        t, seq, frame, dets, r = item
+        if boxes:
+            h, w = frame.shape[:2]
+            pack = detection_wire.pack if args.wire == "binary" else detection_wire.to_json
+            return t, pack(seq, w, h, [(*d.box, d.cls, d.conf) for d in dets])
+        img = r.plot() if tracker is None else draw(frame, dets)
+        ok, jpg = cv2.imencode(".jpg", img, [int(cv2.IMWRITE_JPEG_QUALITY), int(args.q)])
+        return (t, jpg.tobytes()) if ok else None
+
+    def upload(item):
+        t, body = item
         try:
-            requests.post(push_url, data=jpg.tobytes(), headers={"Content-Type":"image/jpeg"}, timeout=0.5)
-        except Exception:
-            pass  # Pi temporarily unreachable; skip this frame
+            session.post(push_url, data=body, headers={"Content-Type": ctype}, timeout=0.5)
+        except requests.RequestException:
+            net["failed"] += 1  # Pi temporarily unreachable; skip this frame
+            return None
+        net["latency"] = time.time() - t
+        net["bytes"] += len(body)
+        net["sent"] += 1
+        return True
+
+    def send_names():
+        # class names travel separately; resent with every report in case the Pi restarted
+        try:
+            session.post(base + "/push_detections", data=detection_wire.names_json(model.names),
+                         headers={"Content-Type": detection_wire.CONTENT_TYPE_JSON}, timeout=0.5)
+        except requests.RequestException:
+            pass
+
+    stop = threading.Event()
+    frames, results, encoded = Latest(), Latest(), Latest()
+    stages = [
+        Stage("capture", capture, stop, outq=frames),
+        # with tracking the stage sees every frame and caps the YOLO runs itself
+        Stage("infer", infer, stop, inq=frames, outq=results, min_dt=0.0 if tracker else min_dt),
+        Stage("pack" if boxes else "encode", encode, stop, inq=results, outq=encoded),
+        Stage("upload", upload, stop, inq=encoded),
+    ]
+    for s in stages:
+        s.start()
+    print(f"[INFO] Overlay pipeline running: {source_url} -> {push_url}")
+
+    try:
+        while True:
+            if boxes:
+                send_names()
+            time.sleep(args.report if args.report > 0 else 5.0)
+            if args.report > 0:
+                print(report(stages, net, args.report))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        stop.set()
+        for s in stages:
+            s.join(timeout=1.0)
+        session.close()
 
 if __name__ == "__main__":
     main()